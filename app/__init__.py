@@ -1,10 +1,54 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, inspect, literal, text
 from config import Config
 
 # Inicializar extensões
 db = SQLAlchemy()
 
+def _configurar_sqlite(dbapi_connection, connection_record):
+    """Ativa o modo WAL para que leituras não bloqueiem a gravação dos logs"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.close()
+
+def _atualizar_esquema():
+    """
+    Acrescenta às tabelas já existentes as colunas e os índices criados depois delas
+    
+    db.create_all() cria apenas as tabelas que ainda não existem no banco.
+    Colunas obrigatórias (NOT NULL) são criadas com o seu valor padrão nas
+    linhas existentes.
+    
+    Raises:
+        RuntimeError: Se uma coluna obrigatória nova não tiver um valor padrão fixo
+    """
+    dialeto = db.engine.dialect
+    inspector = inspect(db.engine)
+    for tabela in db.metadata.sorted_tables:
+        if not inspector.has_table(tabela.name):
+            continue
+        existentes = {coluna['name'] for coluna in inspector.get_columns(tabela.name)}
+        for coluna in tabela.columns:
+            if coluna.name in existentes:
+                continue
+            definicao = f'{coluna.name} {coluna.type.compile(dialect=dialeto)}'
+            if not coluna.nullable:
+                if coluna.default is None or not coluna.default.is_scalar:
+                    raise RuntimeError(
+                        f"Não é possível acrescentar a coluna obrigatória '{tabela.name}.{coluna.name}' "
+                        f"ao banco existente: defina um valor padrão fixo ou atualize o banco manualmente"
+                    )
+                padrao = literal(coluna.default.arg, coluna.type).compile(
+                    dialect=dialeto, compile_kwargs={'literal_binds': True}
+                )
+                definicao += f' NOT NULL DEFAULT {padrao}'
+            with db.engine.begin() as conexao:
+                conexao.execute(text(f'ALTER TABLE {tabela.name} ADD COLUMN {definicao}'))
+        for indice in tabela.indexes:
+            indice.create(db.engine, checkfirst=True)
+
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
@@ -21,7 +65,30 @@ def create_app(config_class=Config):
     
     # Criar tabelas do banco de dados
     with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            event.listen(db.engine, 'connect', _configurar_sqlite)
         db.create_all()
+        _atualizar_esquema()
+    
+    # Aplicar o limite de memória do cache de planilhas
+    from app.utils.excel_cache import cache as excel_cache
+    excel_cache.init_app(app)
+    
+    # Aplicar o intervalo de verificação do inventário de arquivos
+    from app.utils.inventario import cache as inventario
+    inventario.init_app(app)
+    
+    # Inicializar a fila de jobs de processamento
+    from app.utils.jobs import job_manager
+    job_manager.init_app(app)
+    
+    # Inicializar a indexação dos PDFs de origem enviados
+    from app.utils.origens import source_indexer
+    source_indexer.init_app(app)
+    
+    # Registrar os comandos de linha de comando (flask projetos ...)
+    from app.cli import projetos_cli
+    app.cli.add_command(projetos_cli)
     
     return app
 
@@ -0,0 +1,93 @@
+import sys
+import time
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from app import db
+from app.models import Job, Projeto
+from app.utils.lote import IGNORADO, processar_lote, resumir_lote
+
+# Comandos de linha de comando: flask --app run projetos <comando>
+projetos_cli = AppGroup('projetos', help='Processamento de projetos pela linha de comando.')
+
+def _formatar_bytes(valor):
+    """Formata um tamanho em bytes como MB"""
+    return f"{valor / 1048576:.1f} MB"
+
+@projetos_cli.command('listar')
+def listar_projetos():
+    """Lista os projetos cadastrados."""
+    for projeto in Projeto.query.order_by(Projeto.id).all():
+        click.echo(f"{projeto.id:>5}  {projeto.nome}  ({projeto.caminho_diretorio})")
+
+@projetos_cli.command('processar')
+@click.argument('projetos', nargs=-1)
+@click.option('--todos', is_flag=True, help='Processa todos os projetos cadastrados.')
+@click.option('--workers', type=click.IntRange(min=1), default=None,
+              help='Processos de extração do lote inteiro (padrão: número de CPUs).')
+@click.option('--workers-por-projeto', type=click.IntRange(min=1), default=None,
+              help='Limite de processos de extração de cada projeto (padrão: EXTRACTION_WORKERS).')
+@click.option('--renomear/--sem-renomear', default=True, help='Renomear os caminhos no índice.')
+@click.option('--extrair/--sem-extrair', default=True, help='Extrair as páginas dos PDFs.')
+@click.option('--forcar', is_flag=True, help='Extrair novamente todos os documentos, mesmo os já atualizados.')
+@click.option('--bloquear-invalidos', is_flag=True, help='Não processar projetos com problemas no índice.')
+def processar_projetos(projetos, todos, workers, workers_por_projeto, renomear, extrair, forcar,
+                       bloquear_invalidos):
+    """Processa os PROJETOS informados (IDs ou nomes) e mostra um resumo combinado."""
+    if not renomear and not extrair:
+        raise click.UsageError('Selecione ao menos uma operação (renomear ou extrair).')
+    if todos == bool(projetos):
+        raise click.UsageError('Informe os projetos ou use --todos.')
+    
+    if todos:
+        selecionados = Projeto.query.order_by(Projeto.id).all()
+    else:
+        selecionados = []
+        for chave in projetos:
+            projeto = db.session.get(Projeto, int(chave)) if chave.isdigit() else Projeto.query.filter_by(nome=chave).first()
+            if projeto is None:
+                raise click.BadParameter(f"Projeto '{chave}' não encontrado.", param_hint='PROJETOS')
+            if projeto not in selecionados:
+                selecionados.append(projeto)
+    if not selecionados:
+        click.echo('Nenhum projeto para processar.')
+        return
+    
+    click.echo(f"Processando {len(selecionados)} projetos...")
+    inicio = time.perf_counter()
+    
+    def reportar(resultado):
+        click.echo(f"[{resultado['status']}] {resultado['nome'] or resultado['projeto_id']}: {resultado['mensagem']}")
+    
+    resultados = processar_lote(
+        current_app._get_current_object(),
+        [projeto.id for projeto in selecionados],
+        workers=workers,
+        workers_por_projeto=workers_por_projeto,
+        renomear=renomear,
+        extrair=extrair,
+        forcar=forcar,
+        bloquear_invalidos=bloquear_invalidos,
+        callback=reportar
+    )
+    
+    # Resumo combinado
+    click.echo('')
+    click.echo(f"{'ID':>5}  {'Projeto':<30} {'Status':<10} {'Tempo':>9} {'Linhas':>8} {'Páginas':>8}")
+    for resultado in resultados:
+        contadores = (resultado['metricas'] or {}).get('contadores', {})
+        duracao = f"{resultado['duracao']:.1f}s" if resultado['duracao'] is not None else '-'
+        click.echo(f"{resultado['projeto_id']:>5}  {(resultado['nome'] or '')[:30]:<30} {resultado['status']:<10} "
+                   f"{duracao:>9} {contadores.get('linhas_extraidas', 0):>8} {contadores.get('paginas', 0):>8}")
+    
+    resumo = resumir_lote(resultados)
+    status = ', '.join(f"{quantidade} {nome}" for nome, quantidade in sorted(resumo['status'].items()))
+    click.echo('')
+    click.echo(f"{resumo['projetos']} projetos ({status}) em {time.perf_counter() - inicio:.1f}s "
+               f"({resumo['duracao']:.1f}s somando os projetos): "
+               f"{resumo['linhas_extraidas']} linhas extraídas, {resumo['paginas']} páginas, "
+               f"{_formatar_bytes(resumo['bytes_escritos'])} gravados, "
+               f"{resumo['documentos_reaproveitados']} documentos compartilhados reaproveitados")
+    
+    if any(resultado['status'] not in (Job.CONCLUIDO, IGNORADO) for resultado in resultados):
+        sys.exit(1)
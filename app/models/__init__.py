@@ -1 +1 @@
-from app.models.db import Projeto, Log
\ No newline at end of file
+from app.models.db import Projeto, Log, Job, Matricula, Upload, ArquivoOrigem
\ No newline at end of file
@@ -14,6 +14,18 @@ class Projeto(db.Model):
     # Relacionamento com logs
     logs = db.relationship('Log', backref='projeto', lazy='dynamic')
     
+    # Relacionamento com jobs de processamento
+    jobs = db.relationship('Job', backref='projeto', lazy='dynamic')
+    
+    # Relacionamento com as linhas do índice de matrículas
+    matriculas = db.relationship('Matricula', backref='projeto', lazy='dynamic')
+    
+    # Relacionamento com os envios de arquivos em partes
+    uploads = db.relationship('Upload', backref='projeto', lazy='dynamic')
+    
+    # Relacionamento com o índice de páginas dos PDFs de origem
+    arquivos_origem = db.relationship('ArquivoOrigem', backref='projeto', lazy='dynamic')
+    
     def __repr__(self):
         return f'<Projeto {self.nome}>'
     
@@ -32,6 +44,9 @@ class Projeto(db.Model):
 
 class Log(db.Model):
     __tablename__ = 'logs'
+    __table_args__ = (
+        db.Index('ix_logs_projeto_data_hora', 'projeto_id', 'data_hora'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     projeto_id = db.Column(db.Integer, db.ForeignKey('projetos.id'))
@@ -40,4 +55,222 @@ class Log(db.Model):
     data_hora = db.Column(db.DateTime, default=datetime.utcnow)
     
     def __repr__(self):
-        return f'<Log {self.id}: {self.tipo}>'
\ No newline at end of file
+        return f'<Log {self.id}: {self.tipo}>'
+
+
+class Matricula(db.Model):
+    __tablename__ = 'matriculas'
+    __table_args__ = (
+        db.Index('ix_matriculas_projeto_matricula', 'projeto_id', 'matricula'),
+        db.Index('ix_matriculas_projeto_ordem', 'projeto_id', 'ordem'),
+    )
+    
+    # Correspondência entre as colunas da planilha de índice e os atributos do modelo
+    COLUNAS_EXCEL = {
+        'Matrícula': 'matricula',
+        'Nome do Documento': 'nome_documento',
+        'Data': 'data',
+        'Origem': 'origem',
+        'Volume': 'volume',
+        'Páginas': 'paginas',
+        'Obs': 'obs',
+        'Arquivo Extraído': 'arquivo_extraido',
+        'Documento Compartilhado': 'documento_compartilhado'
+    }
+    
+    id = db.Column(db.Integer, primary_key=True)
+    projeto_id = db.Column(db.Integer, db.ForeignKey('projetos.id'), nullable=False)
+    ordem = db.Column(db.Integer, nullable=False, default=0)
+    matricula = db.Column(db.String(255), nullable=False)
+    nome_documento = db.Column(db.String(255))
+    data = db.Column(db.String(50))
+    origem = db.Column(db.String(255))
+    volume = db.Column(db.String(50))
+    paginas = db.Column(db.String(50))
+    obs = db.Column(db.Text)
+    arquivo_extraido = db.Column(db.Text)
+    documento_compartilhado = db.Column(db.String(10), default='Não')
+    
+    def __repr__(self):
+        return f'<Matricula {self.id}: {self.matricula}>'
+    
+    def to_dict(self):
+        """Retorna a linha com os nomes de coluna da planilha de índice"""
+        dados = {coluna: getattr(self, atributo) for coluna, atributo in self.COLUNAS_EXCEL.items()}
+        dados['id'] = self.id
+        return dados
+
+
+class Job(db.Model):
+    __tablename__ = 'jobs'
+    
+    # Estados possíveis de um job
+    PENDENTE = 'pendente'
+    EXECUTANDO = 'executando'
+    CONCLUIDO = 'concluido'
+    ERRO = 'erro'
+    CANCELADO = 'cancelado'
+    ATIVOS = (PENDENTE, EXECUTANDO)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    projeto_id = db.Column(db.Integer, db.ForeignKey('projetos.id'), nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default=PENDENTE, index=True)
+    renomear = db.Column(db.Boolean, nullable=False, default=True)
+    extrair = db.Column(db.Boolean, nullable=False, default=True)
+    forcar = db.Column(db.Boolean, nullable=False, default=False)
+    bloquear_invalidos = db.Column(db.Boolean, default=False)
+    etapa = db.Column(db.String(50))
+    progresso = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    mensagem = db.Column(db.Text)
+    cancelamento_solicitado = db.Column(db.Boolean, nullable=False, default=False)
+    metricas = db.Column(db.Text)
+    data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
+    data_inicio = db.Column(db.DateTime)
+    data_fim = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<Job {self.id}: {self.status}>'
+    
+    @property
+    def ativo(self):
+        """Indica se o job ainda está na fila ou em execução"""
+        return self.status in self.ATIVOS
+    
+    @property
+    def resumo_metricas(self):
+        """Retorna o resumo das métricas da execução (tempo por etapa, taxas), se houver"""
+        import json
+        return json.loads(self.metricas) if self.metricas else None
+    
+    def to_dict(self):
+        """Retorna a representação do job para as respostas JSON"""
+        return {
+            'id': self.id,
+            'projeto_id': self.projeto_id,
+            'status': self.status,
+            'renomear': self.renomear,
+            'extrair': self.extrair,
+            'forcar': self.forcar,
+            'bloquear_invalidos': bool(self.bloquear_invalidos),
+            'etapa': self.etapa,
+            'progresso': self.progresso,
+            'total': self.total,
+            'mensagem': self.mensagem,
+            'cancelamento_solicitado': self.cancelamento_solicitado,
+            'data_criacao': self.data_criacao.strftime('%d/%m/%Y %H:%M:%S') if self.data_criacao else None,
+            'data_inicio': self.data_inicio.strftime('%d/%m/%Y %H:%M:%S') if self.data_inicio else None,
+            'data_fim': self.data_fim.strftime('%d/%m/%Y %H:%M:%S') if self.data_fim else None
+        }
+
+
+class Upload(db.Model):
+    __tablename__ = 'uploads'
+    
+    # Estados possíveis de um envio
+    PENDENTE = 'pendente'
+    CONCLUIDO = 'concluido'
+    ERRO = 'erro'
+    CANCELADO = 'cancelado'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    projeto_id = db.Column(db.Integer, db.ForeignKey('projetos.id'), nullable=False, index=True)
+    nome = db.Column(db.String(255), nullable=False)
+    tamanho = db.Column(db.BigInteger, nullable=False)
+    recebido = db.Column(db.BigInteger, nullable=False, default=0)
+    sha256 = db.Column(db.String(64))
+    sha256_recebido = db.Column(db.String(64))  # Hash SHA-256 calculado pelo servidor ao receber o arquivo
+    status = db.Column(db.String(20), nullable=False, default=PENDENTE)
+    mensagem = db.Column(db.Text)
+    data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
+    data_conclusao = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<Upload {self.id}: {self.nome}>'
+    
+    @property
+    def caminho_parcial(self):
+        """Retorna o caminho do arquivo parcial, gravado (oculto) na pasta de processos"""
+        import os
+        return os.path.join(self.projeto.caminho_processos, f'.upload_{self.id}.part')
+    
+    @property
+    def caminho_destino(self):
+        """Retorna o caminho final do arquivo na pasta de processos"""
+        import os
+        return os.path.join(self.projeto.caminho_processos, self.nome)
+    
+    def to_dict(self):
+        """Retorna a representação do envio para as respostas JSON"""
+        return {
+            'id': self.id,
+            'projeto_id': self.projeto_id,
+            'nome': self.nome,
+            'tamanho': self.tamanho,
+            'recebido': self.recebido,
+            'sha256': self.sha256,
+            'sha256_recebido': self.sha256_recebido,
+            'status': self.status,
+            'mensagem': self.mensagem,
+            'data_criacao': self.data_criacao.strftime('%d/%m/%Y %H:%M:%S') if self.data_criacao else None,
+            'data_conclusao': self.data_conclusao.strftime('%d/%m/%Y %H:%M:%S') if self.data_conclusao else None
+        }
+
+
+class ArquivoOrigem(db.Model):
+    __tablename__ = 'arquivos_origem'
+    __table_args__ = (
+        db.UniqueConstraint('projeto_id', 'nome', name='uq_arquivos_origem_projeto_nome'),
+    )
+    
+    # Estados possíveis da indexação de um PDF de origem
+    PENDENTE = 'pendente'
+    VALIDO = 'valido'
+    INVALIDO = 'invalido'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    projeto_id = db.Column(db.Integer, db.ForeignKey('projetos.id'), nullable=False, index=True)
+    nome = db.Column(db.String(255), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default=PENDENTE)
+    tamanho = db.Column(db.BigInteger)
+    mtime = db.Column(db.BigInteger)
+    sha256 = db.Column(db.String(64))
+    paginas = db.Column(db.Integer)
+    referencias = db.Column(db.Text)
+    mensagem = db.Column(db.Text)
+    data_indexacao = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<ArquivoOrigem {self.id}: {self.nome}>'
+    
+    @property
+    def caminho(self):
+        """Retorna o caminho do arquivo na pasta de processos"""
+        import os
+        return os.path.join(self.projeto.caminho_processos, self.nome)
+    
+    def entrada_indice(self):
+        """Retorna o índice de páginas no formato usado pelo extrator (ver app.utils.page_index)"""
+        import json
+        return {
+            'tamanho': self.tamanho,
+            'mtime': self.mtime,
+            'paginas': self.paginas,
+            'referencias': json.loads(self.referencias) if self.referencias else [],
+            'valido': self.status == self.VALIDO,
+            'mensagem': self.mensagem
+        }
+    
+    def to_dict(self):
+        """Retorna a representação do arquivo indexado para as respostas JSON"""
+        return {
+            'id': self.id,
+            'projeto_id': self.projeto_id,
+            'nome': self.nome,
+            'status': self.status,
+            'tamanho': self.tamanho,
+            'sha256': self.sha256,
+            'paginas': self.paginas,
+            'mensagem': self.mensagem,
+            'data_indexacao': self.data_indexacao.strftime('%d/%m/%Y %H:%M:%S') if self.data_indexacao else None
+        }
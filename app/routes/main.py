@@ -1,11 +1,15 @@
 import os
 import datetime
-import pandas as pd
-from flask import Blueprint, render_template, redirect, url_for, request, flash, current_app, jsonify
+from flask import Blueprint, render_template, redirect, url_for, request, flash, current_app, jsonify, send_file, Response, stream_with_context, abort
 from app import db
-from app.models import Projeto, Log
+from app.models import Projeto, Log, Job, Matricula, Upload
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
-from app.utils import extract_pdfs, rename_paths
+from werkzeug.wsgi import wrap_file
+from app.utils import excel_cache, importacao, indice, inventario, origens, pacotes, paginacao, uploads, validacao
+from app.utils.eventos import formatar_sse, progress_broker
+from app.utils.jobs import job_manager
+from app.utils.origens import source_indexer
 
 main = Blueprint('main', __name__)
 
@@ -78,74 +82,53 @@ def projeto(projeto_id):
     """Página de detalhes do projeto"""
     projeto = Projeto.query.get_or_404(projeto_id)
     
-    # Listar arquivos na pasta de processos
-    arquivos_origem = []
-    processos_dir = os.path.join(projeto.caminho_diretorio, 'processos')
-    
-    if os.path.exists(processos_dir):
-        for filename in os.listdir(processos_dir):
-            file_path = os.path.join(processos_dir, filename)
-            if os.path.isfile(file_path):
-                stats = os.stat(file_path)
-                arquivos_origem.append({
-                    'nome': filename,
-                    'caminho': os.path.join('processos', filename),
-                    'tamanho': stats.st_size,
-                    'data_upload': datetime.datetime.fromtimestamp(stats.st_mtime).strftime('%d/%m/%Y %H:%M:%S')
-                })
-    
-    # Listar arquivos na pasta de docs
-    arquivos_extraidos = []
-    docs_dir = os.path.join(projeto.caminho_diretorio, 'docs')
-    
-    if os.path.exists(docs_dir):
-        for root, dirs, files in os.walk(docs_dir):
-            for filename in files:
-                file_path = os.path.join(root, filename)
-                rel_path = os.path.relpath(file_path, docs_dir)
-                stats = os.stat(file_path)
-                arquivos_extraidos.append({
-                    'nome': filename,
-                    'caminho': os.path.join('docs', rel_path),
-                    'tamanho': stats.st_size,
-                    'data_extracao': datetime.datetime.fromtimestamp(stats.st_mtime).strftime('%d/%m/%Y %H:%M:%S')
-                })
-    
-    # Carregar matrículas do arquivo Excel
-    matriculas = []
+    # Listar arquivos na pasta de processos (as demais abas são carregadas sob demanda),
+    # com o número de páginas gravado na indexação (apenas leitura: a indexação ocorre no
+    # envio, na validação e no processamento)
+    arquivos = _listar_diretorio(projeto, 'processos')
+    indexados = source_indexer.consultar(projeto, arquivos)
+    arquivos_origem = [
+        {
+            'nome': arquivo['name'],
+            'caminho': arquivo['path'],
+            'tamanho': arquivo['size'],
+            'data_upload': arquivo['modified'],
+            'indice': indexados.get(arquivo['name'])
+        }
+        for arquivo in arquivos
+    ]
+    
+    # Importar a planilha de índice de projetos antigos
     try:
-        if os.path.exists(projeto.caminho_excel):
-            df = pd.read_excel(projeto.caminho_excel)
-            # Converter DataFrame para lista de dicionários
-            matriculas = df.to_dict('records')
+        indice.garantir_indice(projeto)
     except Exception as e:
         flash(f"Erro ao carregar matrículas: {str(e)}", "warning")
     
+    # Métricas do último processamento finalizado
+    ultimo_job = projeto.jobs.filter(Job.metricas.isnot(None)).order_by(Job.id.desc()).first()
+    
     return render_template('projeto.html',
                           projeto=projeto,
                           arquivos_origem=arquivos_origem,
-                          arquivos_extraidos=arquivos_extraidos,
-                          matriculas=matriculas)
+                          job_ativo=job_manager.job_ativo(projeto.id),
+                          ultimo_job=ultimo_job)
 
 @main.route('/projeto/<int:projeto_id>/upload', methods=['POST'])
 def upload_arquivo(projeto_id):
-    """Upload de arquivo para o projeto"""
+    """Upload de arquivos para o projeto (formulário simples, sem envio em partes)"""
     projeto = Projeto.query.get_or_404(projeto_id)
     
-    if 'arquivo' not in request.files:
-        flash('Nenhum arquivo selecionado', 'danger')
-        return redirect(url_for('main.projeto', projeto_id=projeto_id))
-    
-    arquivo = request.files['arquivo']
-    
-    if arquivo.filename == '':
+    arquivos = [arquivo for arquivo in request.files.getlist('arquivo') if arquivo.filename]
+    if not arquivos:
         flash('Nenhum arquivo selecionado', 'danger')
         return redirect(url_for('main.projeto', projeto_id=projeto_id))
     
-    if arquivo:
+    enviados = []
+    for arquivo in arquivos:
         filename = secure_filename(arquivo.filename)
         caminho_destino = os.path.join(projeto.caminho_processos, filename)
         arquivo.save(caminho_destino)
+        enviados.append(filename)
         
         # Adicionar log
         log = Log(
@@ -155,95 +138,240 @@ def upload_arquivo(projeto_id):
         )
         
         db.session.add(log)
-        db.session.commit()
-        
         flash(f'Arquivo "{filename}" enviado com sucesso', 'success')
     
+    db.session.commit()
+    inventario.invalidate(projeto.caminho_diretorio, 'processos')
+    
+    # Indexar as páginas dos PDFs enviados em segundo plano
+    for filename in enviados:
+        source_indexer.agendar(projeto, filename)
+    
     return redirect(url_for('main.projeto', projeto_id=projeto_id))
 
-@main.route('/projeto/<int:projeto_id>/processar')
-def processar_projeto(projeto_id):
-    """Processar arquivos do projeto"""
+@main.route('/projeto/<int:projeto_id>/uploads', methods=['POST'])
+def iniciar_uploads(projeto_id):
+    """Iniciar (ou retomar) o envio em partes de um ou mais arquivos (para AJAX)"""
     projeto = Projeto.query.get_or_404(projeto_id)
     
-    # Obter parâmetros
-    renomear = request.args.get('renomear', 'true') == 'true'
-    extrair = request.args.get('extrair', 'true') == 'true'
+    dados = request.get_json(silent=True) or {}
+    arquivos = dados.get('arquivos')
+    if not arquivos or not isinstance(arquivos, list):
+        return jsonify({'error': 'Nenhum arquivo informado'}), 400
     
-    # Verificar se o arquivo Excel existe
-    if not os.path.exists(projeto.caminho_excel):
-        flash(f"Erro: Arquivo Excel não encontrado em {projeto.caminho_excel}", "danger")
-        return redirect(url_for('main.projeto', projeto_id=projeto_id))
+    resultado = []
+    for arquivo in arquivos:
+        try:
+            upload = uploads.iniciar(projeto, arquivo.get('nome'), arquivo.get('tamanho'), arquivo.get('sha256'))
+        except uploads.ErroUpload as e:
+            return jsonify({'error': str(e)}), e.status
+        item = upload.to_dict()
+        item['url'] = url_for('main.enviar_parte', upload_id=upload.id)
+        resultado.append(item)
+    
+    return jsonify({
+        'uploads': resultado,
+        'tamanho_parte': current_app.config.get('UPLOAD_CHUNK_MB', 8) * 1024 * 1024
+    })
+
+@main.route('/upload/<int:upload_id>', methods=['GET'])
+def status_upload(upload_id):
+    """Consultar quantos bytes de um envio já foram recebidos (para retomar)"""
+    upload = Upload.query.get_or_404(upload_id)
+    if upload.status == Upload.PENDENTE:
+        upload.recebido = uploads.recebido(upload)
+    return jsonify({'upload': upload.to_dict()})
+
+@main.route('/upload/<int:upload_id>', methods=['PUT'])
+def enviar_parte(upload_id):
+    """
+    Receber uma parte de um arquivo
     
-    # Função de callback para registrar logs
-    def log_callback(mensagem, tipo='info'):
-        log = Log(
-            projeto=projeto,
-            tipo=tipo,
-            mensagem=mensagem
+    O corpo da requisição contém os bytes da parte; o cabeçalho X-Upload-Offset
+    informa a posição da parte no arquivo e X-Chunk-SHA256 (opcional) o hash
+    da parte, verificado antes de aceitá-la.
+    """
+    upload = Upload.query.get_or_404(upload_id)
+    
+    try:
+        offset = int(request.headers.get('X-Upload-Offset', ''))
+    except ValueError:
+        return jsonify({'error': 'Cabeçalho X-Upload-Offset ausente ou inválido'}), 400
+    
+    try:
+        uploads.receber_parte(
+            upload,
+            request.stream,
+            offset,
+            tamanho_parte=request.content_length,
+            sha256_parte=request.headers.get('X-Chunk-SHA256')
         )
-        db.session.add(log)
-        db.session.commit()
+    except uploads.ErroUpload as e:
+        return jsonify({'error': str(e), 'upload': upload.to_dict()}), e.status
     
-    # Processar renomeação de caminhos
-    if renomear:
-        try:
-            # Caminho para o diretório docs do projeto
-            docs_dir = os.path.join(projeto.caminho_diretorio, 'docs')
-            
-            # Garantir que o diretório docs existe
-            if not os.path.exists(docs_dir):
-                os.makedirs(docs_dir)
-            
-            # Renomear caminhos no Excel
-            success = rename_paths.rename_paths_in_excel(
-                projeto.caminho_excel,
-                projeto.caminho_excel,
-                docs_dir,
-                log_callback
-            )
-            
-            if success:
-                flash("Caminhos renomeados com sucesso no arquivo Excel", "success")
-            else:
-                flash("Erro ao renomear caminhos no arquivo Excel", "danger")
-                return redirect(url_for('main.projeto', projeto_id=projeto_id))
-        
-        except Exception as e:
-            flash(f"Erro ao renomear caminhos: {str(e)}", "danger")
-            log_callback(f"Erro ao renomear caminhos: {str(e)}", 'error')
-            return redirect(url_for('main.projeto', projeto_id=projeto_id))
+    return jsonify({'upload': upload.to_dict()})
+
+@main.route('/upload/<int:upload_id>/cancelar', methods=['POST'])
+def cancelar_upload(upload_id):
+    """Cancelar um envio em partes, descartando os bytes recebidos"""
+    upload = Upload.query.get_or_404(upload_id)
     
-    # Processar extração de PDFs
-    if extrair:
-        try:
-            # Extrair PDFs
-            stats = extract_pdfs.extract_from_excel(
-                projeto.caminho_excel,
-                projeto.caminho_diretorio,
-                log_callback
-            )
-            
-            if stats['success'] > 0:
-                flash(f"Extração concluída: {stats['success']} documentos extraídos com sucesso, {stats['error']} erros", "success")
-            else:
-                flash(f"Nenhum documento extraído com sucesso. {stats['error']} erros encontrados.", "warning")
+    if not uploads.cancelar(upload):
+        return jsonify({'error': 'O envio já foi finalizado', 'upload': upload.to_dict()}), 409
+    
+    return jsonify({'upload': upload.to_dict()})
+
+@main.route('/projeto/<int:projeto_id>/processar', methods=['GET', 'POST'])
+def processar_projeto(projeto_id):
+    """Colocar o processamento dos arquivos do projeto na fila"""
+    projeto = Projeto.query.get_or_404(projeto_id)
+    
+    # Obter parâmetros (no formulário, caixas desmarcadas não são enviadas)
+    if request.method == 'POST':
+        renomear = request.form.get('renomear') == 'true'
+        extrair = request.form.get('extrair') == 'true'
+    else:
+        renomear = request.args.get('renomear', 'true') == 'true'
+        extrair = request.args.get('extrair', 'true') == 'true'
+    forcar = request.values.get('forcar', 'false') == 'true'
+    bloquear = request.values.get('bloquear', 'false') == 'true'
+    
+    # Verificar se o índice de matrículas está preenchido
+    indice.garantir_indice(projeto)
+    if projeto.matriculas.first() is None:
+        flash("Erro: O índice de matrículas do projeto está vazio", "danger")
+        return redirect(url_for('main.projeto', projeto_id=projeto_id))
+    
+    job, criado = job_manager.submeter(projeto, renomear, extrair, forcar, bloquear)
+    
+    if criado:
+        flash(f"Processamento #{job.id} iniciado. Acompanhe o progresso na aba Logs.", "info")
+    else:
+        flash(f"Já existe um processamento em andamento para este projeto (#{job.id})", "warning")
+    
+    return redirect(url_for('main.projeto', projeto_id=projeto_id, _anchor='logs'))
+
+@main.route('/projeto/<int:projeto_id>/jobs', methods=['GET', 'POST'])
+def jobs_projeto(projeto_id):
+    """Listar os jobs do projeto ou submeter um novo job (para AJAX)"""
+    projeto = Projeto.query.get_or_404(projeto_id)
+    
+    if request.method == 'GET':
+        jobs = projeto.jobs.order_by(Job.id.desc()).limit(20).all()
+        return jsonify({'jobs': [job.to_dict() for job in jobs]})
+    
+    dados = request.get_json(silent=True) or request.form
+    renomear = str(dados.get('renomear', 'true')).lower() == 'true'
+    extrair = str(dados.get('extrair', 'true')).lower() == 'true'
+    forcar = str(dados.get('forcar', 'false')).lower() == 'true'
+    bloquear = str(dados.get('bloquear', 'false')).lower() == 'true'
+    
+    indice.garantir_indice(projeto)
+    if projeto.matriculas.first() is None:
+        return jsonify({'error': 'O índice de matrículas do projeto está vazio'}), 400
+    
+    job, criado = job_manager.submeter(projeto, renomear, extrair, forcar, bloquear)
+    
+    if not criado:
+        return jsonify({'error': 'Já existe um processamento em andamento para este projeto', 'job': job.to_dict()}), 409
+    
+    return jsonify({'job': job.to_dict()}), 202
+
+@main.route('/projeto/<int:projeto_id>/validar')
+def validar_indice(projeto_id):
+    """Verificar todas as linhas do índice (origens, intervalos de páginas) antes do processamento (para AJAX)"""
+    projeto = Projeto.query.get_or_404(projeto_id)
+    
+    indice.garantir_indice(projeto)
+    df = indice.carregar_dataframe(projeto)
+    source_indexer.sincronizar(projeto, _listar_diretorio(projeto, 'processos'), aguardar=True)
+    relatorio = validacao.validar_dataframe(
+        df,
+        projeto.caminho_diretorio,
+        origens.carregar_indice(projeto),
+        verificar_destino=request.args.get('renomear', 'true') != 'true'
+    )
+    for problema in relatorio['problemas']:
+        if problema['id'] is not None:
+            problema['editar_url'] = url_for('main.editar_matricula', projeto_id=projeto_id, matricula_id=problema['id'])
+    return jsonify(relatorio)
+
+@main.route('/job/<int:job_id>')
+def status_job(job_id):
+    """Consultar o status de um job (para AJAX)"""
+    job = Job.query.get_or_404(job_id)
+    return jsonify({'job': job.to_dict()})
+
+@main.route('/job/<int:job_id>/eventos')
+def eventos_job(job_id):
+    """Transmitir o progresso de um job em tempo real (Server-Sent Events)"""
+    job = Job.query.get_or_404(job_id)
+    ativo = job.ativo
+    estado = job.to_dict()
+    ultimo = progress_broker.sequencia(request.headers.get('Last-Event-ID'))
+    intervalo = current_app.config.get('SSE_HEARTBEAT', 15)
+    # Não manter a conexão com o banco aberta durante a transmissão
+    db.session.close()
+    
+    def gerar():
+        # Estado gravado no banco, enviado antes dos eventos do worker
+        yield 'retry: 3000\n'
+        yield formatar_sse('progresso' if ativo else 'fim', estado)
+        if not ativo:
+            return
         
-        except Exception as e:
-            flash(f"Erro ao extrair PDFs: {str(e)}", "danger")
-            log_callback(f"Erro ao extrair PDFs: {str(e)}", 'error')
+        for evento in progress_broker.eventos(job_id, ultimo, intervalo):
+            if evento is None:
+                # Nenhum evento no intervalo: consultar o banco, caso o job tenha
+                # sido executado por outro processo do servidor
+                job = db.session.get(Job, job_id)
+                estado_atual = job.to_dict() if job else None
+                db.session.close()
+                if estado_atual is None or estado_atual['status'] not in Job.ATIVOS:
+                    yield formatar_sse('fim', estado_atual or estado)
+                    return
+                yield ': keep-alive\n\n'
+                continue
+            identificador, nome, dados = evento
+            yield formatar_sse(nome, dados, identificador)
+    
+    return Response(stream_with_context(gerar()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@main.route('/job/<int:job_id>/metricas')
+def metricas_job(job_id):
+    """Exportar as métricas de um processamento em JSON"""
+    job = Job.query.get_or_404(job_id)
+    
+    metricas = job.resumo_metricas
+    if metricas is None:
+        return jsonify({'error': 'Nenhuma métrica registrada para este processamento'}), 404
+    
+    resposta = jsonify({'job': job.to_dict(), 'metricas': metricas})
+    if request.args.get('download'):
+        resposta.headers['Content-Disposition'] = f'attachment; filename=metricas_job_{job.id}.json'
+    return resposta
+
+@main.route('/job/<int:job_id>/cancelar', methods=['POST'])
+def cancelar_job(job_id):
+    """Solicitar o cancelamento de um job"""
+    job = Job.query.get_or_404(job_id)
+    
+    if not job_manager.cancelar(job):
+        return jsonify({'error': 'O processamento já foi finalizado', 'job': job.to_dict()}), 409
     
-    return redirect(url_for('main.projeto', projeto_id=projeto_id, _anchor='documentos'))
+    return jsonify({'job': job.to_dict()})
 
-@main.route('/projeto/<int:projeto_id>/editar_matricula/<int:index>', methods=['GET', 'POST'])
-def editar_matricula(projeto_id, index):
+@main.route('/projeto/<int:projeto_id>/editar_matricula/<int:matricula_id>', methods=['GET', 'POST'])
+def editar_matricula(projeto_id, matricula_id):
     """Editar uma matrícula existente"""
     projeto = Projeto.query.get_or_404(projeto_id)
     
-    # Carregar o arquivo Excel
     try:
-        df = pd.read_excel(projeto.caminho_excel)
-        if index >= len(df):
+        registro = Matricula.query.filter_by(id=matricula_id, projeto_id=projeto.id).first()
+        if registro is None:
             flash("Matrícula não encontrada", "danger")
             return redirect(url_for('main.projeto', projeto_id=projeto_id))
         
@@ -260,19 +388,16 @@ def editar_matricula(projeto_id, index):
             # Verificar campos obrigatórios
             if not all([matricula, nome_documento, origem, volume, paginas]):
                 flash("Todos os campos obrigatórios devem ser preenchidos", "danger")
-                return render_template('editar_matricula.html', projeto=projeto, matricula=df.iloc[index])
+                return redirect(url_for('main.editar_matricula', projeto_id=projeto_id, matricula_id=matricula_id))
             
             # Atualizar dados
-            df.at[index, 'Matrícula'] = matricula
-            df.at[index, 'Nome do Documento'] = nome_documento
-            df.at[index, 'Data'] = data if data else None
-            df.at[index, 'Origem'] = origem
-            df.at[index, 'Volume'] = volume
-            df.at[index, 'Páginas'] = paginas
-            df.at[index, 'Obs'] = obs if obs else None
-            
-            # Salvar o arquivo Excel
-            df.to_excel(projeto.caminho_excel, index=False)
+            registro.matricula = matricula
+            registro.nome_documento = nome_documento
+            registro.data = data if data else None
+            registro.origem = origem
+            registro.volume = volume
+            registro.paginas = paginas
+            registro.obs = obs if obs else None
             
             # Registrar log
             log = Log(
@@ -288,54 +413,42 @@ def editar_matricula(projeto_id, index):
         
         # Método GET - exibir formulário de edição
         # Listar arquivos na pasta de processos para o dropdown de origem
-        arquivos_origem = []
-        processos_dir = os.path.join(projeto.caminho_diretorio, 'processos')
-        
-        if os.path.exists(processos_dir):
-            for filename in os.listdir(processos_dir):
-                file_path = os.path.join(processos_dir, filename)
-                if os.path.isfile(file_path):
-                    stats = os.stat(file_path)
-                    arquivos_origem.append({
-                        'nome': filename,
-                        'caminho': os.path.join('processos', filename),
-                        'tamanho': stats.st_size,
-                        'data_upload': datetime.datetime.fromtimestamp(stats.st_mtime).strftime('%d/%m/%Y %H:%M:%S')
-                    })
+        arquivos_origem = [
+            {
+                'nome': arquivo['name'],
+                'caminho': arquivo['path'],
+                'tamanho': arquivo['size'],
+                'data_upload': arquivo['modified']
+            }
+            for arquivo in _listar_diretorio(projeto, 'processos')
+        ]
         
         return render_template('editar_matricula.html',
                               projeto=projeto,
-                              matricula=df.iloc[index].to_dict(),
+                              matricula=registro.to_dict(),
                               arquivos_origem=arquivos_origem)
     
     except Exception as e:
+        db.session.rollback()
         flash(f"Erro ao editar matrícula: {str(e)}", "danger")
         return redirect(url_for('main.projeto', projeto_id=projeto_id))
 
-@main.route('/projeto/<int:projeto_id>/excluir_matricula/<int:index>')
-def excluir_matricula(projeto_id, index):
+@main.route('/projeto/<int:projeto_id>/excluir_matricula/<int:matricula_id>')
+def excluir_matricula(projeto_id, matricula_id):
     """Excluir uma matrícula existente"""
     projeto = Projeto.query.get_or_404(projeto_id)
     
     try:
-        # Carregar o arquivo Excel
-        df = pd.read_excel(projeto.caminho_excel)
-        
-        if index >= len(df):
+        registro = Matricula.query.filter_by(id=matricula_id, projeto_id=projeto.id).first()
+        if registro is None:
             flash("Matrícula não encontrada", "danger")
             return redirect(url_for('main.projeto', projeto_id=projeto_id))
         
         # Obter informações da matrícula antes de excluí-la
-        matricula_info = df.iloc[index]['Matrícula']
+        matricula_info = registro.matricula
         
         # Excluir a linha
-        df = df.drop(index)
-        
-        # Resetar os índices
-        df = df.reset_index(drop=True)
-        
-        # Salvar o arquivo Excel
-        df.to_excel(projeto.caminho_excel, index=False)
+        db.session.delete(registro)
         
         # Registrar log
         log = Log(
@@ -346,9 +459,15 @@ def excluir_matricula(projeto_id, index):
         db.session.add(log)
         db.session.commit()
         
+        # Com o índice vazio, a planilha também é esvaziada para que não
+        # seja importada novamente por indice.garantir_indice
+        if projeto.matriculas.first() is None and os.path.exists(projeto.caminho_excel):
+            indice.exportar_excel(projeto)
+        
         flash(f'Matrícula "{matricula_info}" excluída com sucesso', 'success')
     
     except Exception as e:
+        db.session.rollback()
         flash(f"Erro ao excluir matrícula: {str(e)}", "danger")
     
     return redirect(url_for('main.projeto', projeto_id=projeto_id, _anchor='matriculas'))
@@ -373,34 +492,24 @@ def adicionar_matricula(projeto_id):
         return redirect(url_for('main.projeto', projeto_id=projeto_id))
     
     try:
-        # Carregar o arquivo Excel existente ou criar um novo
-        excel_path = projeto.caminho_excel
-        try:
-            df = pd.read_excel(excel_path)
-        except FileNotFoundError:
-            # Criar DataFrame vazio com as colunas necessárias
-            df = pd.DataFrame(columns=[
-                'Matrícula', 'Nome do Documento', 'Data', 'Origem',
-                'Volume', 'Páginas', 'Obs', 'Arquivo Extraído', 'Documento Compartilhado'
-            ])
+        # Importar a planilha existente antes de adicionar a primeira linha
+        indice.garantir_indice(projeto)
         
         # Adicionar nova linha
-        nova_linha = {
-            'Matrícula': matricula,
-            'Nome do Documento': nome_documento,
-            'Data': data if data else None,
-            'Origem': origem,
-            'Volume': volume,
-            'Páginas': paginas,
-            'Obs': obs if obs else None,
-            'Arquivo Extraído': '',
-            'Documento Compartilhado': 'Não'
-        }
-        
-        df = pd.concat([df, pd.DataFrame([nova_linha])], ignore_index=True)
-        
-        # Salvar o arquivo Excel
-        df.to_excel(excel_path, index=False)
+        registro = Matricula(
+            projeto=projeto,
+            ordem=indice.proxima_ordem(projeto),
+            matricula=matricula,
+            nome_documento=nome_documento,
+            data=data if data else None,
+            origem=origem,
+            volume=volume,
+            paginas=paginas,
+            obs=obs if obs else None,
+            arquivo_extraido='',
+            documento_compartilhado='Não'
+        )
+        db.session.add(registro)
         
         # Registrar log
         log = Log(
@@ -414,6 +523,7 @@ def adicionar_matricula(projeto_id):
         flash(f'Matrícula "{matricula}" adicionada com sucesso', 'success')
     
     except Exception as e:
+        db.session.rollback()
         flash(f"Erro ao adicionar matrícula: {str(e)}", "danger")
         # Registrar log de erro
         log = Log(
@@ -426,34 +536,238 @@ def adicionar_matricula(projeto_id):
     
     return redirect(url_for('main.projeto', projeto_id=projeto_id, _anchor='matriculas'))
 
+@main.route('/projeto/<int:projeto_id>/importar_matriculas', methods=['POST'])
+def importar_matriculas(projeto_id):
+    """Importar matrículas em lote de uma planilha xlsx ou de um arquivo CSV"""
+    projeto = Projeto.query.get_or_404(projeto_id)
+    destino = url_for('main.projeto', projeto_id=projeto_id, _anchor='matriculas')
+    
+    arquivo = request.files.get('arquivo')
+    if arquivo is None or not arquivo.filename:
+        flash('Nenhum arquivo selecionado', 'danger')
+        return redirect(destino)
+    modo = request.form.get('modo', importacao.ACRESCENTAR)
+    
+    try:
+        resultado = importacao.importar_matriculas(projeto, arquivo.stream, arquivo.filename, modo)
+    except importacao.ErroImportacao as e:
+        detalhes = '; '.join(f"linha {problema['linha']}: {problema['mensagem']}" for problema in e.problemas[:10])
+        if e.total_problemas > 10:
+            detalhes += f" (e mais {e.total_problemas - 10})"
+        flash(f"Erro ao importar \"{arquivo.filename}\": {e}" + (f". {detalhes}" if detalhes else ''), 'danger')
+        return redirect(destino)
+    except Exception as e:
+        flash(f"Erro ao importar matrículas: {str(e)}", "danger")
+        return redirect(destino)
+    
+    mensagem = (f'Importação de "{arquivo.filename}" ({modo}): {resultado["lidas"]} linhas lidas, '
+                f'{resultado["inseridas"]} inseridas, {resultado["atualizadas"]} atualizadas, '
+                f'{resultado["removidas"]} removidas')
+    db.session.add(Log(projeto=projeto, tipo='info', mensagem=mensagem))
+    db.session.commit()
+    
+    flash(mensagem, 'success')
+    return redirect(destino)
+
+@main.route('/projeto/<int:projeto_id>/exportar_excel')
+def exportar_excel(projeto_id):
+    """Exportar o índice de matrículas para a planilha do projeto e baixá-la"""
+    projeto = Projeto.query.get_or_404(projeto_id)
+    
+    try:
+        indice.garantir_indice(projeto)
+        caminho = indice.exportar_excel(projeto)
+    except Exception as e:
+        flash(f"Erro ao exportar planilha: {str(e)}", "danger")
+        return redirect(url_for('main.projeto', projeto_id=projeto_id, _anchor='matriculas'))
+    
+    return send_file(caminho, as_attachment=True, download_name=os.path.basename(caminho))
+
+@main.route('/projeto/<int:projeto_id>/baixar_documentos')
+def baixar_documentos(projeto_id):
+    """Baixar os documentos extraídos (todos, de algumas pastas ou apenas os compartilhados) em um arquivo ZIP"""
+    projeto = Projeto.query.get_or_404(projeto_id)
+    
+    pastas = request.args.getlist('pasta')
+    entradas = pacotes.documentos_do_projeto(projeto, pastas, request.args.get('compartilhados') == '1')
+    if not entradas:
+        flash("Nenhum documento extraído para baixar.", "warning")
+        return redirect(url_for('main.projeto', projeto_id=projeto_id, _anchor='documentos'))
+    
+    # Pacote montado durante o envio, sem arquivo temporário; o tamanho é conhecido de
+    # antemão, o que permite retomar o download (Range/If-Range)
+    pacote = pacotes.PacoteZip(entradas)
+    nome = secure_filename(projeto.nome) or f'projeto_{projeto.id}'
+    if len(pastas) == 1:
+        nome = f"{nome}_{secure_filename(pastas[0])}"
+    elif request.args.get('compartilhados') == '1':
+        nome = f"{nome}_compartilhados"
+    
+    resposta = current_app.response_class(
+        wrap_file(request.environ, pacote, pacotes.BLOCO),
+        mimetype='application/zip',
+        direct_passthrough=True
+    )
+    resposta.content_length = pacote.tamanho
+    resposta.accept_ranges = 'bytes'
+    resposta.headers.set('Content-Disposition', 'attachment', filename=f'{nome}_docs.zip')
+    resposta.set_etag(pacote.etag)
+    resposta.last_modified = pacote.mtime
+    return resposta.make_conditional(request, accept_ranges=True, complete_length=pacote.tamanho)
+
+@main.route('/projeto/<int:projeto_id>/arquivo/<path:caminho>')
+def visualizar_arquivo(projeto_id, caminho):
+    """Enviar um arquivo de origem ou um documento extraído (com suporte a Range, para leitura parcial de PDFs grandes)"""
+    projeto = Projeto.query.get_or_404(projeto_id)
+    
+    # Apenas arquivos visíveis de 'processos' e 'docs', sem sair do diretório (inclusive por links simbólicos)
+    partes = caminho.split('/')
+    if partes[0] not in ('processos', 'docs') or any(parte.startswith('.') for parte in partes):
+        abort(404)
+    base_dir = os.path.realpath(os.path.join(projeto.caminho_diretorio, partes[0]))
+    arquivo = safe_join(projeto.caminho_diretorio, caminho)
+    if arquivo is None:
+        abort(404)
+    arquivo = os.path.realpath(arquivo)
+    if not arquivo.startswith(base_dir + os.sep) or not os.path.isfile(arquivo):
+        abort(404)
+    
+    # send_file responde a Range, If-Range e If-None-Match (ETag) e usa o envio direto do
+    # servidor (wsgi.file_wrapper/sendfile) quando disponível
+    resposta = send_file(
+        arquivo,
+        conditional=True,
+        etag=True,
+        as_attachment=request.args.get('download') == '1',
+        download_name=os.path.basename(arquivo)
+    )
+    # Anunciado também na resposta completa: o PDF.js só faz leituras parciais se o servidor aceitar Range
+    resposta.accept_ranges = 'bytes'
+    return resposta
+
+def _listar_diretorio(projeto, subpath):
+    """
+    Lista os arquivos de um diretório do projeto (ver app.utils.inventario)
+    
+    Args:
+        projeto (Projeto): Projeto
+        subpath (str): 'processos' (apenas o primeiro nível) ou 'docs' (inclui subdiretórios)
+    
+    Returns:
+        list: Arquivos com nome, caminho relativo ao projeto, tamanho e data de modificação
+    """
+    return inventario.list_files(projeto, subpath)
+
 @main.route('/projeto/<int:projeto_id>/listar_arquivos/<path:subpath>')
 def listar_arquivos(projeto_id, subpath):
-    """Listar arquivos em um diretório do projeto (para AJAX)"""
+    """Listar arquivos em um diretório do projeto, com paginação, ordenação e filtro (para AJAX)"""
     projeto = Projeto.query.get_or_404(projeto_id)
     
     # Determinar o caminho completo
-    if subpath == 'processos':
-        path = os.path.join(projeto.caminho_diretorio, 'processos')
-    elif subpath == 'docs':
-        path = os.path.join(projeto.caminho_diretorio, 'docs')
-    else:
+    if subpath not in ('processos', 'docs'):
         return jsonify({'error': 'Caminho inválido'}), 400
     
     # Verificar se o diretório existe
-    if not os.path.exists(path):
-        return jsonify({'files': [], 'message': 'Diretório não encontrado'})
-    
-    # Listar arquivos
-    files = []
-    for filename in os.listdir(path):
-        file_path = os.path.join(path, filename)
-        if os.path.isfile(file_path):
-            stats = os.stat(file_path)
-            files.append({
-                'name': filename,
-                'path': os.path.join(subpath, filename),
-                'size': stats.st_size,
-                'modified': datetime.datetime.fromtimestamp(stats.st_mtime).strftime('%d/%m/%Y %H:%M:%S')
-            })
-    
-    return jsonify({'files': files})
\ No newline at end of file
+    if not os.path.exists(os.path.join(projeto.caminho_diretorio, subpath)):
+        return jsonify({'files': [], 'items': [], 'total': 0, 'message': 'Diretório não encontrado'})
+    
+    arquivos = _listar_diretorio(projeto, subpath)
+    
+    # Arquivos de origem: número de páginas e validade gravados na indexação
+    if subpath == 'processos':
+        indexados = source_indexer.consultar(projeto, arquivos)
+        for arquivo in arquivos:
+            indexado = indexados.get(arquivo['name'])
+            arquivo['pages'] = indexado.paginas if indexado else None
+            arquivo['index_status'] = indexado.status if indexado else None
+            arquivo['index_message'] = indexado.mensagem if indexado else None
+    
+    params = paginacao.parametros(request.args, ('name', 'path', 'size', 'modified'), 'path')
+    files, total = paginacao.paginar_lista(
+        arquivos,
+        params,
+        ['name', 'path'],
+        {'modified': 'mtime'}
+    )
+    
+    for arquivo in files:
+        arquivo['url'] = url_for('main.visualizar_arquivo', projeto_id=projeto.id, caminho=arquivo['path'])
+    
+    dados = paginacao.resposta(files, total, params)
+    dados['files'] = files
+    return jsonify(dados)
+
+@main.route('/projeto/<int:projeto_id>/listar_matriculas')
+def listar_matriculas(projeto_id):
+    """Listar as matrículas do índice, com paginação, ordenação e filtro (para AJAX)"""
+    projeto = Projeto.query.get_or_404(projeto_id)
+    
+    colunas = {
+        'ordem': Matricula.ordem,
+        'matricula': Matricula.matricula,
+        'nome_documento': Matricula.nome_documento,
+        'data': Matricula.data,
+        'origem': Matricula.origem,
+        'volume': Matricula.volume,
+        'paginas': Matricula.paginas
+    }
+    params = paginacao.parametros(request.args, colunas, 'ordem')
+    
+    consulta = Matricula.query.filter_by(projeto_id=projeto.id)
+    if params['q']:
+        termo = f"%{params['q']}%"
+        consulta = consulta.filter(db.or_(
+            Matricula.matricula.ilike(termo),
+            Matricula.nome_documento.ilike(termo),
+            Matricula.origem.ilike(termo),
+            Matricula.obs.ilike(termo),
+            Matricula.arquivo_extraido.ilike(termo)
+        ))
+    
+    matriculas, total = paginacao.paginar_consulta(consulta, params, colunas, Matricula.id)
+    
+    itens = []
+    for matricula in matriculas:
+        item = matricula.to_dict()
+        item['editar_url'] = url_for('main.editar_matricula', projeto_id=projeto.id, matricula_id=matricula.id)
+        item['excluir_url'] = url_for('main.excluir_matricula', projeto_id=projeto.id, matricula_id=matricula.id)
+        itens.append(item)
+    
+    return jsonify(paginacao.resposta(itens, total, params))
+
+@main.route('/projeto/<int:projeto_id>/listar_logs')
+def listar_logs(projeto_id):
+    """Listar os logs do projeto, com paginação, ordenação e filtro (para AJAX)"""
+    projeto = Projeto.query.get_or_404(projeto_id)
+    
+    colunas = {'data_hora': Log.data_hora, 'tipo': Log.tipo}
+    params = paginacao.parametros(request.args, colunas, 'data_hora', 'desc')
+    
+    consulta = Log.query.filter_by(projeto_id=projeto.id)
+    if request.args.get('tipo'):
+        consulta = consulta.filter(Log.tipo == request.args['tipo'])
+    if params['q']:
+        consulta = consulta.filter(Log.mensagem.ilike(f"%{params['q']}%"))
+    
+    logs, total = paginacao.paginar_consulta(consulta, params, colunas, Log.id)
+    
+    itens = [
+        {
+            'id': log.id,
+            'tipo': log.tipo,
+            'mensagem': log.mensagem,
+            'data_hora': log.data_hora.strftime('%d/%m/%Y %H:%M:%S') if log.data_hora else ''
+        }
+        for log in logs
+    ]
+    return jsonify(paginacao.resposta(itens, total, params))
+
+@main.route('/cache/planilhas')
+def estatisticas_cache_planilhas():
+    """Contadores do cache de planilhas (para monitoramento)"""
+    return jsonify(excel_cache.cache.stats())
+
+@main.route('/cache/arquivos')
+def estatisticas_cache_arquivos():
+    """Contadores do inventário de arquivos dos projetos (para monitoramento)"""
+    return jsonify(inventario.cache.stats())
\ No newline at end of file
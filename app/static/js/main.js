@@ -68,4 +68,425 @@ document.addEventListener('DOMContentLoaded', function() {
         const data = new Date(dataString);
         return data.toLocaleDateString('pt-BR') + ' ' + data.toLocaleTimeString('pt-BR');
     };
-});
\ No newline at end of file
+    
+    // Acompanhar o processamento em andamento (se houver)
+    var jobProgresso = document.getElementById('jobProgresso');
+    if (jobProgresso) {
+        var statusUrl = jobProgresso.dataset.statusUrl;
+        var eventosUrl = jobProgresso.dataset.eventosUrl;
+        var cancelUrl = jobProgresso.dataset.cancelUrl;
+        var barra = jobProgresso.querySelector('.job-barra');
+        var etapa = jobProgresso.querySelector('.job-etapa');
+        var mensagem = jobProgresso.querySelector('.job-mensagem');
+        var listaEventos = jobProgresso.querySelector('.job-eventos');
+        var etapas = {'renomear': 'Renomeando caminhos', 'extrair': 'Extraindo PDFs'};
+        
+        var exibirProgresso = function(job) {
+            var percentual = job.total > 0 ? Math.round(100 * job.progresso / job.total) : 0;
+            barra.style.width = percentual + '%';
+            barra.textContent = percentual + '%';
+            etapa.textContent = job.status === 'executando' ? (etapas[job.etapa] || 'Executando') : job.status;
+            if (job.total > 0) {
+                var texto = job.progresso + ' de ' + job.total + ' itens';
+                if (job.item) {
+                    texto += ' - Matrícula ' + job.item;
+                }
+                if (job.erros) {
+                    texto += ' (' + job.erros + (job.erros === 1 ? ' erro' : ' erros') + ')';
+                }
+                mensagem.textContent = texto;
+            }
+        };
+        
+        var finalizarJob = function(job) {
+            // Processamento finalizado: recarregar para exibir os resultados
+            exibirProgresso(job);
+            mensagem.textContent = job.mensagem || '';
+            setTimeout(function() { window.location.reload(); }, 1500);
+        };
+        
+        // Avisos e erros recebidos durante o processamento (apenas os mais recentes)
+        var exibirLog = function(log) {
+            var item = document.createElement('li');
+            item.className = log.tipo === 'error' ? 'text-danger' : 'text-warning';
+            item.textContent = log.mensagem;
+            listaEventos.insertBefore(item, listaEventos.firstChild);
+            while (listaEventos.children.length > 5) {
+                listaEventos.removeChild(listaEventos.lastChild);
+            }
+        };
+        
+        var atualizarJob = function() {
+            fetch(statusUrl)
+                .then(function(resposta) { return resposta.json(); })
+                .then(function(dados) {
+                    var job = dados.job;
+                    if (job.status === 'pendente' || job.status === 'executando') {
+                        exibirProgresso(job);
+                        setTimeout(atualizarJob, 2000);
+                    } else {
+                        finalizarJob(job);
+                    }
+                })
+                .catch(function() {
+                    setTimeout(atualizarJob, 5000);
+                });
+        };
+        
+        jobProgresso.querySelector('.job-cancelar').addEventListener('click', function() {
+            window.confirmarAcao('Tem certeza que deseja cancelar o processamento?', function() {
+                fetch(cancelUrl, {method: 'POST'});
+            });
+        });
+        
+        if (window.EventSource && eventosUrl) {
+            // Progresso transmitido pelo servidor a cada linha (o navegador reconecta sozinho)
+            var fonte = new EventSource(eventosUrl);
+            fonte.addEventListener('progresso', function(evento) {
+                exibirProgresso(JSON.parse(evento.data));
+            });
+            fonte.addEventListener('log', function(evento) {
+                exibirLog(JSON.parse(evento.data));
+            });
+            fonte.addEventListener('fim', function(evento) {
+                fonte.close();
+                finalizarJob(JSON.parse(evento.data));
+            });
+        } else {
+            atualizarJob();
+        }
+    }
+    
+    // Escapar texto antes de inseri-lo nas tabelas
+    var escaparHtml = function(texto) {
+        var div = document.createElement('div');
+        div.textContent = texto === null || texto === undefined ? '' : String(texto);
+        return div.innerHTML;
+    };
+    
+    // Montagem das linhas de cada tabela carregada sob demanda
+    var badgesLog = {
+        'info': '<span class="badge bg-info">Info</span>',
+        'warning': '<span class="badge bg-warning">Aviso</span>',
+        'error': '<span class="badge bg-danger">Erro</span>'
+    };
+    var renderizadores = {
+        'matriculas': function(item) {
+            return '<td>' + escaparHtml(item['Matrícula']) + '</td>' +
+                '<td>' + escaparHtml(item['Nome do Documento']) + '</td>' +
+                '<td>' + escaparHtml(item['Data']) + '</td>' +
+                '<td>' + escaparHtml(item['Origem']) + '</td>' +
+                '<td>' + escaparHtml(item['Volume']) + '</td>' +
+                '<td>' + escaparHtml(item['Páginas']) + '</td>' +
+                '<td><div class="btn-group">' +
+                '<a href="' + escaparHtml(item.editar_url) + '" class="btn btn-sm btn-outline-primary" title="Editar"><i class="fas fa-edit"></i></a>' +
+                '<a href="' + escaparHtml(item.excluir_url) + '" class="btn btn-sm btn-outline-danger" title="Excluir" onclick="return confirm(\'Tem certeza que deseja excluir esta matrícula?\')"><i class="fas fa-trash"></i></a>' +
+                '</div></td>';
+        },
+        'documentos': function(item, tabela) {
+            // Pasta do documento dentro de docs/ (ex: Livro2A_fls123_Mat4567), baixada em um ZIP
+            var partes = item.path.split('/').slice(1, -1);
+            var baixarPasta = partes.length ?
+                '<a href="' + escaparHtml(tabela.dataset.zipUrl + '?pasta=' + encodeURIComponent(partes.join('/'))) + '" class="btn btn-sm btn-outline-secondary" title="Baixar a pasta (ZIP)"><i class="fas fa-file-archive"></i></a>' : '';
+            return '<td>' + escaparHtml(item.name) + '</td>' +
+                '<td><small class="text-muted">' + escaparHtml(item.path) + '</small></td>' +
+                '<td>' + (item.size / 1024).toFixed(1) + ' KB</td>' +
+                '<td>' + escaparHtml(item.modified) + '</td>' +
+                '<td><div class="btn-group"><a href="' + escaparHtml(item.url) + '" class="btn btn-sm btn-outline-primary" title="Visualizar" target="_blank"><i class="fas fa-eye"></i></a>' + baixarPasta + '</div></td>';
+        },
+        'logs': function(item) {
+            return '<td>' + escaparHtml(item.data_hora) + '</td>' +
+                '<td>' + (badgesLog[item.tipo] || '<span class="badge bg-secondary">' + escaparHtml(item.tipo) + '</span>') + '</td>' +
+                '<td>' + escaparHtml(item.mensagem) + '</td>';
+        }
+    };
+    
+    // Tabelas paginadas no servidor: carregadas quando a aba é exibida pela primeira vez
+    document.querySelectorAll('.tabela-paginada').forEach(function(tabela) {
+        var estado = {
+            offset: 0,
+            limit: 50,
+            sort: tabela.dataset.sort,
+            dir: tabela.dataset.dir,
+            q: ''
+        };
+        var corpo = tabela.querySelector('tbody');
+        var colunas = tabela.querySelectorAll('thead th').length;
+        var info = tabela.querySelector('.tabela-info');
+        var anterior = tabela.querySelector('.tabela-anterior');
+        var proxima = tabela.querySelector('.tabela-proxima');
+        var filtroTipo = tabela.querySelector('.tabela-tipo');
+        var renderizar = renderizadores[tabela.dataset.tipo];
+        var carregada = false;
+        var requisicao = 0;
+        
+        var mensagemLinha = function(texto) {
+            corpo.innerHTML = '<tr><td colspan="' + colunas + '" class="text-center text-muted py-4">' +
+                '<i class="fas fa-info-circle me-2"></i>' + escaparHtml(texto) + '</td></tr>';
+        };
+        
+        var carregar = function() {
+            carregada = true;
+            var atual = ++requisicao;
+            var params = new URLSearchParams(estado);
+            if (filtroTipo && filtroTipo.value) {
+                params.set('tipo', filtroTipo.value);
+            }
+            
+            fetch(tabela.dataset.url + '?' + params.toString())
+                .then(function(resposta) { return resposta.json(); })
+                .then(function(dados) {
+                    // Ignorar respostas de requisições já substituídas por outra
+                    if (atual !== requisicao) return;
+                    
+                    var itens = dados.items || [];
+                    var total = dados.total || 0;
+                    if (itens.length === 0) {
+                        mensagemLinha(estado.q || (filtroTipo && filtroTipo.value) ? 'Nenhum resultado para o filtro informado.' : tabela.dataset.vazio);
+                    } else {
+                        corpo.innerHTML = itens.map(function(item) {
+                            return '<tr>' + renderizar(item, tabela) + '</tr>';
+                        }).join('');
+                    }
+                    
+                    info.textContent = total > 0 ?
+                        (estado.offset + 1) + '–' + (estado.offset + itens.length) + ' de ' + total : '';
+                    anterior.disabled = estado.offset === 0;
+                    proxima.disabled = estado.offset + itens.length >= total;
+                })
+                .catch(function() {
+                    if (atual === requisicao) mensagemLinha('Erro ao carregar os dados.');
+                });
+        };
+        
+        // Ordenação ao clicar no cabeçalho das colunas
+        tabela.querySelectorAll('th[data-sort]').forEach(function(th) {
+            th.addEventListener('click', function() {
+                if (estado.sort === th.dataset.sort) {
+                    estado.dir = estado.dir === 'asc' ? 'desc' : 'asc';
+                } else {
+                    estado.sort = th.dataset.sort;
+                    estado.dir = 'asc';
+                }
+                estado.offset = 0;
+                carregar();
+            });
+        });
+        
+        // Filtro de texto (aguarda o usuário parar de digitar)
+        var temporizador = null;
+        tabela.querySelector('.tabela-filtro').addEventListener('input', function(event) {
+            clearTimeout(temporizador);
+            temporizador = setTimeout(function() {
+                estado.q = event.target.value;
+                estado.offset = 0;
+                carregar();
+            }, 300);
+        });
+        
+        if (filtroTipo) {
+            filtroTipo.addEventListener('change', function() {
+                estado.offset = 0;
+                carregar();
+            });
+        }
+        
+        anterior.addEventListener('click', function() {
+            estado.offset = Math.max(estado.offset - estado.limit, 0);
+            carregar();
+        });
+        
+        proxima.addEventListener('click', function() {
+            estado.offset += estado.limit;
+            carregar();
+        });
+        
+        // Carregar apenas quando a aba for exibida
+        var painel = tabela.closest('.tab-pane');
+        if (!painel || painel.classList.contains('active')) {
+            carregar();
+        } else {
+            var botaoAba = document.querySelector('button[data-bs-target="#' + painel.id + '"]');
+            botaoAba.addEventListener('shown.bs.tab', function() {
+                if (!carregada) carregar();
+            });
+        }
+    });
+    
+    // Envio de arquivos em partes, retomando do último byte recebido em caso de falha
+    var uploadForm = document.getElementById('uploadForm');
+    if (uploadForm && window.fetch && window.Blob && Blob.prototype.slice) {
+        var areaProgresso = uploadForm.querySelector('.upload-progresso');
+        
+        // Apenas cada parte tem o hash calculado no navegador (a API lê os bytes inteiros na memória);
+        // o hash do arquivo inteiro é calculado pelo servidor durante o recebimento
+        var hashParte = function(parte) {
+            // O hash só é calculado quando o navegador oferece a API (contextos seguros)
+            if (!window.crypto || !window.crypto.subtle) {
+                return Promise.resolve(null);
+            }
+            return parte.arrayBuffer()
+                .then(function(buffer) { return window.crypto.subtle.digest('SHA-256', buffer); })
+                .then(function(digest) {
+                    return Array.from(new Uint8Array(digest)).map(function(b) {
+                        return b.toString(16).padStart(2, '0');
+                    }).join('');
+                });
+        };
+        
+        var esperar = function(ms) {
+            return new Promise(function(resolve) { setTimeout(resolve, ms); });
+        };
+        
+        var enviarArquivo = function(arquivo, upload, tamanhoParte, barra) {
+            var tentativas = 0;
+            
+            var atualizarBarra = function(recebido) {
+                var percentual = upload.tamanho > 0 ? Math.round(100 * recebido / upload.tamanho) : 100;
+                barra.style.width = percentual + '%';
+                barra.textContent = percentual + '%';
+            };
+            
+            var enviarDe = function(offset) {
+                atualizarBarra(offset);
+                if (offset >= upload.tamanho) {
+                    return Promise.resolve();
+                }
+                
+                var parte = arquivo.slice(offset, Math.min(offset + tamanhoParte, upload.tamanho));
+                return hashParte(parte)
+                    .then(function(hash) {
+                        var cabecalhos = {'Content-Type': 'application/octet-stream', 'X-Upload-Offset': String(offset)};
+                        if (hash) cabecalhos['X-Chunk-SHA256'] = hash;
+                        return fetch(upload.url, {method: 'PUT', headers: cabecalhos, body: parte});
+                    })
+                    .then(function(resposta) {
+                        return resposta.json().then(function(dados) {
+                            if (resposta.ok) {
+                                tentativas = 0;
+                                return enviarDe(dados.upload.recebido);
+                            }
+                            // Posição divergente: continuar de onde o servidor parou
+                            if (resposta.status === 409 && dados.upload && dados.upload.status === 'pendente') {
+                                return enviarDe(dados.upload.recebido);
+                            }
+                            throw new Error(dados.error || 'Erro no envio');
+                        });
+                    }, function() {
+                        // Falha de rede: consultar a posição no servidor e tentar novamente
+                        if (++tentativas > 5) throw new Error('Falha de conexão');
+                        return esperar(1000 * tentativas)
+                            .then(function() { return fetch(upload.url).then(function(r) { return r.json(); }); })
+                            .then(function(dados) { return enviarDe(dados.upload.recebido); }, function() { return enviarDe(offset); });
+                    });
+            };
+            
+            return enviarDe(upload.recebido);
+        };
+        
+        uploadForm.addEventListener('submit', function(event) {
+            var arquivos = Array.from(uploadForm.querySelector('input[type="file"]').files);
+            if (arquivos.length === 0) return;
+            event.preventDefault();
+            
+            var botao = uploadForm.querySelector('button[type="submit"]');
+            botao.disabled = true;
+            areaProgresso.innerHTML = '';
+            
+            fetch(uploadForm.dataset.uploadsUrl, {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({arquivos: arquivos.map(function(arquivo) {
+                    return {nome: arquivo.name, tamanho: arquivo.size};
+                })})
+            })
+                .then(function(resposta) {
+                    return resposta.json().then(function(dados) {
+                        if (!resposta.ok) throw new Error(dados.error || 'Erro ao iniciar o envio');
+                        return dados;
+                    });
+                })
+                .then(function(dados) {
+                    // Enviar os arquivos um de cada vez
+                    var erros = [];
+                    return dados.uploads.reduce(function(anterior, upload, i) {
+                        var linha = document.createElement('div');
+                        linha.className = 'mb-2';
+                        linha.innerHTML = '<small>' + escaparHtml(upload.nome) + '</small>' +
+                            '<div class="progress"><div class="progress-bar" role="progressbar" style="width: 0%">0%</div></div>';
+                        areaProgresso.appendChild(linha);
+                        var barra = linha.querySelector('.progress-bar');
+                        
+                        return anterior.then(function() {
+                            return enviarArquivo(arquivos[i], upload, dados.tamanho_parte, barra)
+                                .then(function() {
+                                    barra.classList.add('bg-success');
+                                }, function(erro) {
+                                    barra.classList.add('bg-danger');
+                                    erros.push(upload.nome + ': ' + erro.message);
+                                });
+                        });
+                    }, Promise.resolve()).then(function() { return erros; });
+                })
+                .then(function(erros) {
+                    if (erros.length > 0) {
+                        alert('Alguns arquivos não foram enviados:\n' + erros.join('\n') + '\nEnvie-os novamente para continuar de onde pararam.');
+                        botao.disabled = false;
+                    } else {
+                        window.location.reload();
+                    }
+                })
+                .catch(function(erro) {
+                    alert(erro.message);
+                    botao.disabled = false;
+                });
+        });
+    }
+    
+    // Validação de todas as linhas do índice (origens e intervalos de páginas), exibida em uma tabela
+    var botaoValidar = document.getElementById('validarIndice');
+    if (botaoValidar) {
+        var resultadoValidacao = document.getElementById('validacaoIndice');
+        
+        botaoValidar.addEventListener('click', function() {
+            botaoValidar.disabled = true;
+            resultadoValidacao.innerHTML = '<div class="text-muted mb-3"><i class="fas fa-spinner fa-spin me-2"></i>Validando o índice...</div>';
+            
+            fetch(botaoValidar.dataset.url)
+                .then(function(resposta) { return resposta.json(); })
+                .then(function(dados) {
+                    if (dados.linhas_invalidas === 0) {
+                        resultadoValidacao.innerHTML = '<div class="alert alert-success">' +
+                            '<i class="fas fa-check-circle me-2"></i>Nenhum problema encontrado nas ' +
+                            dados.total + ' linhas do índice.</div>';
+                        return;
+                    }
+                    var linhas = dados.problemas.map(function(problema) {
+                        var matricula = escaparHtml(problema.matricula);
+                        if (problema.editar_url) {
+                            matricula = '<a href="' + escaparHtml(problema.editar_url) + '">' + matricula + '</a>';
+                        }
+                        return '<tr><td>' + problema.linha + '</td><td>' + matricula + '</td>' +
+                            '<td>' + escaparHtml(problema.origem) + '</td>' +
+                            '<td>' + escaparHtml(problema.volume) + '</td>' +
+                            '<td>' + escaparHtml(problema.paginas) + '</td>' +
+                            '<td class="text-danger">' + escaparHtml(problema.mensagem) + '</td></tr>';
+                    }).join('');
+                    var omitidos = dados.total_problemas - dados.problemas.length;
+                    resultadoValidacao.innerHTML = '<div class="alert alert-danger">' +
+                        '<i class="fas fa-exclamation-circle me-2"></i>' + dados.total_problemas + ' problemas em ' +
+                        dados.linhas_invalidas + ' de ' + dados.total + ' linhas' +
+                        (omitidos > 0 ? ' (' + omitidos + ' não exibidos)' : '') + '.</div>' +
+                        '<div class="table-responsive mb-3" style="max-height: 400px;"><table class="table table-sm table-hover">' +
+                        '<thead class="table-light"><tr><th>Linha</th><th>Matrícula</th><th>Origem</th><th>Volume</th>' +
+                        '<th>Páginas</th><th>Problema</th></tr></thead><tbody>' + linhas + '</tbody></table></div>';
+                })
+                .catch(function() {
+                    resultadoValidacao.innerHTML = '<div class="alert alert-warning">Não foi possível validar o índice.</div>';
+                })
+                .then(function() {
+                    botaoValidar.disabled = false;
+                });
+        });
+    }
+});
@@ -0,0 +1,135 @@
+import os
+import re
+import sys
+import shutil
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Formas de gravar a cópia de um arquivo, da mais barata para a mais cara
+HARDLINK = 'hardlink'
+REFLINK = 'reflink'
+COPIA = 'copy'
+METODOS = (HARDLINK, REFLINK, COPIA)
+
+# ioctl FICLONE do Linux (cópia por referência em Btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+# Arquivos temporários gravados ao lado do destino: .<nome>.<pid>.tmp
+TEMP_PATTERN = re.compile(r'^\..+\.\d+\.tmp$')
+
+def temp_path(destino):
+    """Retorna o caminho do arquivo temporário usado para gravar `destino` neste processo"""
+    diretorio, nome = os.path.split(destino)
+    return os.path.join(diretorio, f'.{nome}.{os.getpid()}.tmp')
+
+@contextmanager
+def atomic_write(destino):
+    """
+    Abre um arquivo temporário que substitui `destino` quando o bloco termina sem erros
+    
+    O destino nunca fica gravado pela metade: se o processo for interrompido,
+    resta apenas o arquivo temporário (ver clean_temp_files). Em caso de erro,
+    o temporário é removido e o destino anterior é mantido.
+    
+    Args:
+        destino (str): Arquivo a ser criado ou substituído
+    
+    Yields:
+        file: Arquivo temporário aberto para gravação binária
+    """
+    temporario = temp_path(destino)
+    try:
+        with open(temporario, 'wb') as arquivo:
+            yield arquivo
+        os.replace(temporario, destino)
+    except BaseException:
+        try:
+            os.remove(temporario)
+        except OSError:
+            pass
+        raise
+
+def clean_temp_files(diretorio, antes_de):
+    """
+    Remove os arquivos temporários deixados por gravações interrompidas
+    
+    Args:
+        diretorio (str): Diretório verificado (sem subdiretórios)
+        antes_de (float): Apenas os temporários não modificados desde este instante (time.time()) são removidos
+    
+    Returns:
+        int: Número de arquivos removidos
+    """
+    removidos = 0
+    try:
+        entradas = list(os.scandir(diretorio))
+    except OSError:
+        return 0
+    for entrada in entradas:
+        if not TEMP_PATTERN.match(entrada.name):
+            continue
+        try:
+            if entrada.is_file(follow_symlinks=False) and entrada.stat(follow_symlinks=False).st_mtime < antes_de:
+                os.remove(entrada.path)
+                removidos += 1
+        except OSError:
+            pass
+    return removidos
+
+def _reflink(origem, destino):
+    """Cria `destino` compartilhando os blocos de `origem` no disco (cópia sob demanda)"""
+    if fcntl is None or not sys.platform.startswith('linux'):
+        raise OSError('reflink não suportado nesta plataforma')
+    with open(origem, 'rb') as entrada, open(destino, 'wb') as saida:
+        try:
+            fcntl.ioctl(saida.fileno(), FICLONE, entrada.fileno())
+        except OSError:
+            saida.close()
+            os.remove(destino)
+            raise
+
+def _criar(metodo, origem, destino):
+    if metodo == HARDLINK:
+        os.link(origem, destino)
+    elif metodo == REFLINK:
+        _reflink(origem, destino)
+    else:
+        shutil.copyfile(origem, destino)
+
+def link_or_copy(origem, destino, metodo=HARDLINK):
+    """
+    Grava em `destino` um arquivo idêntico a `origem` da forma mais barata suportada
+    
+    A partir do método informado, tenta o hardlink (nenhum byte gravado), a
+    cópia por referência (reflink, blocos compartilhados até que um dos
+    arquivos seja alterado) e, por fim, a cópia comum. O destino é
+    substituído de uma só vez, sem ficar incompleto.
+    
+    Args:
+        origem (str): Arquivo existente
+        destino (str): Arquivo a ser criado ou substituído
+        metodo (str): Primeiro método a tentar ('hardlink', 'reflink' ou 'copy')
+    
+    Returns:
+        str: Método usado
+    """
+    if metodo == HARDLINK and os.path.exists(destino) and os.path.samefile(origem, destino):
+        return HARDLINK
+    
+    temporario = temp_path(destino)
+    if os.path.lexists(temporario):
+        os.remove(temporario)
+    metodos = METODOS[METODOS.index(metodo):]
+    for usado in metodos:
+        try:
+            _criar(usado, origem, temporario)
+            break
+        except OSError:
+            if usado == metodos[-1]:
+                raise
+    os.replace(temporario, destino)
+    return usado
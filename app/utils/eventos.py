@@ -0,0 +1,184 @@
+import json
+import time
+import threading
+from collections import deque
+
+# Avisos e erros mantidos por job, para reenviar a clientes que reconectam
+MAX_EVENTOS = 200
+
+# Tempo (segundos) em que os eventos de um job finalizado continuam disponíveis
+RETENCAO = 300
+
+class _Canal:
+    """Eventos de um job: último progresso, avisos/erros recentes e o evento final"""
+    __slots__ = ('sequencia', 'progresso', 'eventos', 'fim', 'erros', 'avisos', 'encerrado_em')
+    
+    def __init__(self):
+        self.sequencia = 0
+        self.progresso = None
+        self.eventos = deque(maxlen=MAX_EVENTOS)
+        self.fim = None
+        self.erros = 0
+        self.avisos = 0
+        self.encerrado_em = None
+
+class ProgressBroker:
+    """
+    Distribui em memória os eventos de progresso dos jobs aos clientes conectados (SSE)
+    
+    O worker publica cada linha processada sem acessar o banco. Do progresso,
+    apenas o estado mais recente de cada job é mantido: um cliente lento
+    recebe o último estado, e não cada linha. Avisos e erros ficam em uma fila
+    limitada, reenviada a quem reconecta informando o último evento recebido.
+    
+    Os eventos são numerados como "<instância>-<sequência>", para que um
+    cliente conectado antes de o servidor reiniciar receba tudo novamente.
+    """
+    
+    def __init__(self):
+        self.instancia = format(int(time.time() * 1000), 'x')
+        self._condicao = threading.Condition()
+        self._canais = {}
+    
+    def _canal(self, job_id):
+        canal = self._canais.get(job_id)
+        if canal is None:
+            canal = self._canais[job_id] = _Canal()
+        return canal
+    
+    def progresso(self, job_id, etapa, atual, total, item=None):
+        """
+        Publica o progresso de um job
+        
+        Args:
+            job_id (int): ID do job
+            etapa (str): Etapa em execução ('renomear', 'extrair')
+            atual (int): Linhas processadas
+            total (int): Total de linhas
+            item (str): Item processado por último (ex: matrícula), se houver
+        """
+        with self._condicao:
+            canal = self._canal(job_id)
+            canal.sequencia += 1
+            canal.progresso = (canal.sequencia, 'progresso', {
+                'status': 'executando',
+                'etapa': etapa,
+                'progresso': atual,
+                'total': total,
+                'item': item,
+                'erros': canal.erros,
+                'avisos': canal.avisos
+            })
+            self._condicao.notify_all()
+    
+    def log(self, job_id, mensagem, tipo):
+        """
+        Publica um aviso ou erro de um job
+        
+        Args:
+            job_id (int): ID do job
+            mensagem (str): Mensagem
+            tipo (str): Tipo da mensagem ('warning', 'error')
+        """
+        with self._condicao:
+            canal = self._canal(job_id)
+            if tipo == 'error':
+                canal.erros += 1
+            else:
+                canal.avisos += 1
+            canal.sequencia += 1
+            canal.eventos.append((canal.sequencia, 'log', {'tipo': tipo, 'mensagem': mensagem}))
+            self._condicao.notify_all()
+    
+    def encerrar(self, job_id, dados):
+        """
+        Publica o evento final de um job
+        
+        Args:
+            job_id (int): ID do job
+            dados (dict): Estado final do job (Job.to_dict())
+        """
+        with self._condicao:
+            canal = self._canal(job_id)
+            canal.sequencia += 1
+            canal.fim = (canal.sequencia, 'fim', dict(dados, erros=canal.erros, avisos=canal.avisos))
+            canal.encerrado_em = time.monotonic()
+            self._condicao.notify_all()
+            self._limpar()
+    
+    def _limpar(self):
+        """Descarta os eventos dos jobs finalizados há mais de RETENCAO segundos"""
+        limite = time.monotonic() - RETENCAO
+        for job_id in [job_id for job_id, canal in self._canais.items()
+                       if canal.encerrado_em is not None and canal.encerrado_em < limite]:
+            del self._canais[job_id]
+    
+    def _pendentes(self, job_id, ultimo):
+        """Eventos do job posteriores ao último recebido, em ordem"""
+        canal = self._canais.get(job_id)
+        if canal is None:
+            return []
+        pendentes = [evento for evento in canal.eventos if evento[0] > ultimo]
+        for evento in (canal.progresso, canal.fim):
+            if evento is not None and evento[0] > ultimo:
+                pendentes.append(evento)
+        pendentes.sort(key=lambda evento: evento[0])
+        return pendentes
+    
+    def sequencia(self, ultimo_id):
+        """
+        Converte o identificador do último evento recebido (Last-Event-ID) em sequência
+        
+        Returns:
+            int: Sequência do evento, ou 0 se o identificador for de outra instância
+        """
+        instancia, _, sequencia = (ultimo_id or '').partition('-')
+        if instancia != self.instancia or not sequencia.isdigit():
+            return 0
+        return int(sequencia)
+    
+    def eventos(self, job_id, ultimo=0, intervalo=15):
+        """
+        Gera os eventos de um job à medida que são publicados, até o evento final
+        
+        Args:
+            job_id (int): ID do job
+            ultimo (int): Sequência do último evento já recebido pelo cliente
+            intervalo (float): Tempo máximo (segundos) de espera por um novo evento
+        
+        Yields:
+            tuple: (id, evento, dados), ou None quando nada foi publicado no intervalo
+        """
+        while True:
+            with self._condicao:
+                pendentes = self._condicao.wait_for(lambda: self._pendentes(job_id, ultimo), intervalo)
+            if not pendentes:
+                yield None
+                continue
+            for sequencia, evento, dados in pendentes:
+                ultimo = sequencia
+                yield f'{self.instancia}-{sequencia}', evento, dados
+                if evento == 'fim':
+                    return
+
+def formatar_sse(evento, dados, id=None):
+    """
+    Formata um evento no protocolo Server-Sent Events
+    
+    Args:
+        evento (str): Nome do evento
+        dados (dict): Dados do evento (serializados em JSON)
+        id (str): Identificador do evento, reenviado pelo navegador ao reconectar
+    
+    Returns:
+        str: Evento formatado
+    """
+    linhas = []
+    if id is not None:
+        linhas.append(f'id: {id}')
+    linhas.append(f'event: {evento}')
+    linhas.append(f'data: {json.dumps(dados, ensure_ascii=False)}')
+    return '\n'.join(linhas) + '\n\n'
+
+# Instância única, compartilhada pelos workers de jobs e pelas rotas
+progress_broker = ProgressBroker()
@@ -0,0 +1,118 @@
+import os
+import threading
+from collections import OrderedDict
+import pandas as pd
+from app.utils import planilhas
+
+# Limite padrão de memória ocupada pelas planilhas em cache
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+class DataFrameCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Inicializa o cache de planilhas já carregadas
+        
+        As planilhas são identificadas por (caminho, mtime, tamanho): qualquer
+        alteração do arquivo no disco invalida a entrada automaticamente. As
+        entradas menos usadas são descartadas quando o total ultrapassa
+        `max_bytes`. Quando a planilha tem uma cópia CSV/Parquet atualizada
+        (ver planilhas.write_xlsx), a cópia é lida no lugar da planilha.
+        
+        Args:
+            max_bytes (int): Memória máxima ocupada pelos DataFrames em cache
+        """
+        self.max_bytes = max_bytes
+        self.sidecar = planilhas.SIDECAR_CSV
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+    
+    def init_app(self, app):
+        """Aplica o limite de memória e o formato da cópia das planilhas configurados na aplicação"""
+        self.max_bytes = app.config.get('EXCEL_CACHE_MAX_MB', DEFAULT_MAX_BYTES // (1024 * 1024)) * 1024 * 1024
+        self.sidecar = app.config.get('EXCEL_SIDECAR', planilhas.SIDECAR_CSV)
+    
+    def read_excel(self, path):
+        """
+        Lê uma planilha, reaproveitando o resultado de leituras anteriores
+        
+        Args:
+            path (str): Caminho da planilha
+        
+        Returns:
+            pandas.DataFrame: Cópia do conteúdo da planilha
+        """
+        path = os.path.abspath(path)
+        stats = os.stat(path)
+        chave = (stats.st_mtime_ns, stats.st_size)
+        
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == chave:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1].copy()
+            self.misses += 1
+        
+        df = planilhas.read_sidecar(path, stats)
+        if df is None:
+            df = pd.read_excel(path)
+        nbytes = int(df.memory_usage(deep=True).sum())
+        
+        with self._lock:
+            self._discard(path)
+            if nbytes <= self.max_bytes:
+                self._entries[path] = (chave, df, nbytes)
+                self._total_bytes += nbytes
+                while self._total_bytes > self.max_bytes:
+                    self._discard(next(iter(self._entries)))
+        
+        return df.copy()
+    
+    def invalidate(self, path=None):
+        """
+        Descarta a planilha informada (ou todas) do cache
+        
+        Args:
+            path (str): Caminho da planilha; se None, limpa o cache inteiro
+        """
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._total_bytes = 0
+            else:
+                self._discard(os.path.abspath(path))
+    
+    def stats(self):
+        """Retorna os contadores do cache"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes
+            }
+    
+    def _discard(self, path):
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._total_bytes -= entry[2]
+
+# Cache único do processo
+cache = DataFrameCache()
+
+def read_excel(path):
+    """Lê uma planilha através do cache do processo"""
+    return cache.read_excel(path)
+
+def write_excel(path, df):
+    """Grava uma planilha (e a sua cópia no formato configurado) e a descarta do cache do processo"""
+    planilhas.write_dataframe(path, df, cache.sidecar)
+    cache.invalidate(path)
+
+def invalidate(path=None):
+    """Descarta uma planilha (ou todas) do cache do processo"""
+    cache.invalidate(path)
@@ -1,9 +1,65 @@
 import os
 import re
+import mmap
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from PyPDF2 import PdfReader, PdfWriter
+from app.utils.arquivos import COPIA, HARDLINK, atomic_write, clean_temp_files, link_or_copy
+from app.utils.manifest import ExtractionManifest
+from app.utils.metricas import NULL_METRICS, RunMetrics, current_rss
+from app.utils.page_index import IndexedPages, is_current, matches_reader
+from app.utils.pdf_slicer import RawPageSlicer, UnsupportedSource
+from app.utils.progresso import ProcessamentoCancelado
+
+# Número padrão de PDFs de origem mantidos abertos simultaneamente
+DEFAULT_MAX_READERS = 4
+
+# Limites a partir dos quais a memória do volume em extração é liberada (ver limit_source_memory):
+# crescimento da memória residente desde a última liberação ou, sem essa medida, objetos lidos pelo PdfReader
+RELEASE_RSS = 64 * 1024 * 1024
+RELEASE_OBJECTS = 5000
+
+# Modos de gravação dos PDFs extraídos: reconstrução pelo PdfWriter ou cópia direta dos bytes dos objetos
+MODE_WRITER = 'writer'
+MODE_BYTES = 'bytes'
+
+# Documentos compartilhados (mesmo volume e intervalo) são extraídos uma vez e gravados nos
+# demais destinos por hardlink, reflink ou cópia (ver link_or_copy); 'off' extrai cada linha
+DEDUP_OFF = 'off'
+
+def open_source(input_pdf):
+    """
+    Abre um PDF de origem mapeado na memória (mmap)
+    
+    O PdfReader lê o arquivo mapeado: as páginas do arquivo são carregadas
+    sob demanda e ficam no cache de páginas do sistema, compartilhado entre
+    os processos de extração, em vez de o volume inteiro ser copiado para a
+    memória de cada processo.
+    
+    Args:
+        input_pdf (str): Caminho do PDF de origem
+    
+    Returns:
+        tuple: (PdfReader, mapeamento a ser fechado junto com o leitor, ou None)
+    """
+    try:
+        with open(input_pdf, 'rb') as f:
+            mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        # Arquivo vazio ou sistema de arquivos sem suporte a mmap: leitura comum
+        return PdfReader(input_pdf), None
+    
+    try:
+        return PdfReader(mapa), mapa
+    except Exception:
+        mapa.close()
+        raise
 
 class PDFExtractor:
-    def __init__(self, projeto_path=None, excel_path=None, callback=None):
+    def __init__(self, projeto_path=None, excel_path=None, callback=None, max_readers=DEFAULT_MAX_READERS,
+                 progress_callback=None, cancel_check=None, workers=1, manifest=None, force=False,
+                 metrics=None, mode=MODE_WRITER, source_index=None, dedup=HARDLINK):
         """
         Inicializa o extrator de PDFs
         
@@ -11,11 +67,214 @@ class PDFExtractor:
             projeto_path (str): Caminho para o diretório do projeto
             excel_path (str): Caminho para o arquivo Excel
             callback (function): Função de callback para reportar progresso
+            max_readers (int): Número máximo de PDFs de origem mantidos abertos (LRU)
+            progress_callback (function): Função chamada com (processados, total, matrícula) a cada linha
+            cancel_check (function): Função que retorna True quando o processamento deve ser interrompido
+            workers (int): Número de processos de extração (1 = extração no processo atual)
+            manifest (ExtractionManifest): Manifesto usado para ignorar arquivos já atualizados
+            force (bool): Se True, extrai todas as linhas mesmo que estejam atualizadas
+            metrics (RunMetrics): Métricas da execução (tempo por etapa, páginas, bytes gravados)
+            mode (str): 'writer' (PdfWriter) ou 'bytes' (cópia direta dos objetos, ver RawPageSlicer)
+            source_index (dict): Índice de páginas dos PDFs de origem, por nome de arquivo (ver app.utils.origens)
+            dedup (str): Como gravar os documentos compartilhados: 'hardlink', 'reflink', 'copy' ou 'off'
         """
         self.projeto_path = projeto_path
         self.excel_path = excel_path
         self.callback = callback or (lambda msg, tipo='info': None)
+        self.progress_callback = progress_callback or (lambda atual, total, item=None: None)
+        self.cancel_check = cancel_check or (lambda: False)
         self.processos_dir = os.path.join(projeto_path, 'processos') if projeto_path else None
+        self.max_readers = max(1, max_readers)
+        self.workers = max(1, workers)
+        self.manifest = manifest
+        self.force = force
+        self.metrics = metrics or NULL_METRICS
+        self.mode = mode
+        self.source_index = source_index or {}
+        self.dedup = dedup
+        self.shared_count = 0
+        self._compartilhados = {}
+        self._readers = OrderedDict()
+        self._mapas = {}
+        self._slicers = {}
+        self._paginas = {}
+        self._entradas = {}
+        self._origem_atual = None
+        self._rss_base = None
+    
+    def get_reader(self, input_pdf):
+        """
+        Retorna o leitor do PDF de origem, reaproveitando leitores já abertos
+        
+        Os leitores são mantidos em um cache LRU limitado a `max_readers`
+        entradas, de modo que cada volume é analisado uma única vez por
+        execução sem que a memória cresça com o número de volumes. Os
+        volumes são lidos por mmap (ver open_source).
+        
+        Args:
+            input_pdf (str): Caminho do PDF de origem
+        
+        Returns:
+            PdfReader: Leitor do PDF
+        """
+        reader = self._readers.get(input_pdf)
+        if reader is not None:
+            self._readers.move_to_end(input_pdf)
+            return reader
+        
+        with self.metrics.span('abrir_pdf'):
+            reader, mapa = open_source(input_pdf)
+        self._readers[input_pdf] = reader
+        self._mapas[input_pdf] = mapa
+        while len(self._readers) > self.max_readers:
+            self._discard_reader(next(iter(self._readers)))
+        return reader
+    
+    def _discard_reader(self, input_pdf):
+        """Descarta o leitor de um PDF de origem e fecha o seu mapeamento"""
+        self._readers.pop(input_pdf, None)
+        self._slicers.pop(input_pdf, None)
+        self._paginas.pop(input_pdf, None)
+        mapa = self._mapas.pop(input_pdf, None)
+        if mapa is not None:
+            mapa.close()
+    
+    def release_source(self, input_pdf):
+        """
+        Libera a memória ocupada pelo PDF de origem
+        
+        Os objetos lidos pelo PdfReader (imagens, conteúdo das páginas) são
+        descartados do seu cache, e as páginas do arquivo mapeado deixam a
+        memória do processo: continuam no cache do sistema e são recarregadas
+        sob demanda. O leitor continua aberto.
+        
+        Args:
+            input_pdf (str): Caminho do PDF de origem
+        """
+        reader = self._readers.get(input_pdf)
+        if reader is not None:
+            reader.resolved_objects.clear()
+        mapa = self._mapas.get(input_pdf)
+        if mapa is not None and hasattr(mmap, 'MADV_DONTNEED'):
+            mapa.madvise(mmap.MADV_DONTNEED)
+        self._rss_base = current_rss()
+    
+    def use_source(self, input_pdf):
+        """
+        Marca o PDF de origem do próximo documento, liberando a memória do volume anterior
+        
+        Os objetos lidos de um volume (fontes, recursos e conteúdo compartilhados
+        entre documentos) são reaproveitados enquanto a extração continua no
+        mesmo volume; ao passar para outro volume, a memória do anterior é
+        liberada (ver release_source). Leitores descartados pelo LRU liberam
+        a memória ao serem fechados.
+        
+        Args:
+            input_pdf (str): Caminho do PDF de origem
+        """
+        if self._origem_atual is not None and self._origem_atual != input_pdf:
+            self.release_source(self._origem_atual)
+        elif self._rss_base is None:
+            self._rss_base = current_rss()
+        self._origem_atual = input_pdf
+    
+    def limit_source_memory(self, input_pdf):
+        """
+        Libera a memória do PDF de origem se ela passar do limite, após a extração de um documento
+        
+        A memória residente pode crescer até RELEASE_RSS desde a última
+        liberação (sem essa medida, até RELEASE_OBJECTS objetos lidos), de
+        modo que um volume grande não é mantido inteiro na memória sem que
+        os objetos compartilhados sejam lidos novamente a cada documento.
+        
+        Args:
+            input_pdf (str): Caminho do PDF de origem
+        """
+        reader = self._readers.get(input_pdf)
+        if reader is None:
+            return
+        rss = current_rss()
+        if rss is not None and self._rss_base is not None:
+            excedido = rss - self._rss_base > RELEASE_RSS
+        else:
+            excedido = len(reader.resolved_objects) > RELEASE_OBJECTS
+        if excedido:
+            self.release_source(input_pdf)
+    
+    def source_entry(self, input_pdf):
+        """
+        Retorna o índice de páginas do PDF de origem, se estiver atualizado
+        
+        O índice é gravado em segundo plano quando o arquivo é enviado; um
+        índice de um arquivo alterado depois da indexação é ignorado.
+        
+        Args:
+            input_pdf (str): Caminho do PDF de origem
+        
+        Returns:
+            dict: Índice do PDF (ver ArquivoOrigem.entrada_indice), ou None
+        """
+        if input_pdf not in self._entradas:
+            entrada = self.source_index.get(os.path.basename(input_pdf))
+            try:
+                if entrada is not None and not is_current(entrada, os.stat(input_pdf)):
+                    entrada = None
+            except OSError:
+                entrada = None
+            self._entradas[input_pdf] = entrada
+        return self._entradas[input_pdf]
+    
+    def get_pages(self, input_pdf, reader):
+        """
+        Retorna as páginas do PDF de origem
+        
+        Com o índice gravado no upload, cada página é lida pela sua referência
+        (IndexedPages); sem ele, pelo PdfReader, que percorre a árvore de
+        páginas do volume inteiro no primeiro acesso.
+        
+        Args:
+            input_pdf (str): Caminho do PDF de origem
+            reader (PdfReader): Leitor do PDF (ver get_reader)
+        
+        Returns:
+            Sequência de páginas (IndexedPages ou reader.pages)
+        """
+        paginas = self._paginas.get(input_pdf)
+        if paginas is None:
+            entrada = self.source_entry(input_pdf)
+            if entrada is not None and entrada['valido'] and matches_reader(entrada, reader):
+                paginas = IndexedPages(reader, entrada['referencias'])
+            else:
+                paginas = reader.pages
+            self._paginas[input_pdf] = paginas
+        return paginas
+    
+    def get_slicer(self, input_pdf, reader):
+        """
+        Retorna o fatiador por cópia de bytes do PDF de origem, criado uma vez por volume
+        
+        Args:
+            input_pdf (str): Caminho do PDF de origem
+            reader (PdfReader): Leitor do PDF (ver get_reader)
+        
+        Returns:
+            RawPageSlicer: Fatiador, ou None se o PDF não puder ser fatiado por cópia
+        """
+        if input_pdf in self._slicers:
+            return self._slicers[input_pdf]
+        
+        try:
+            slicer = RawPageSlicer(reader, self.get_pages(input_pdf, reader))
+        except UnsupportedSource as e:
+            self.callback(f"Aviso: cópia direta indisponível para '{input_pdf}' ({e}); usando PdfWriter.", 'warning')
+            slicer = None
+        self._slicers[input_pdf] = slicer
+        return slicer
+    
+    def close_readers(self):
+        """Descarta todos os leitores de PDF mantidos em cache"""
+        for input_pdf in list(self._readers):
+            self._discard_reader(input_pdf)
     
     def parse_page_range(self, page_str):
         """
@@ -23,7 +282,7 @@ class PDFExtractor:
         
         Args:
             page_str (str): String com o intervalo de páginas (ex: "1-5" ou "3")
-            
+        
         Returns:
             tuple: (página inicial, página final) ou (None, None) se inválido
         """
@@ -47,20 +306,79 @@ class PDFExtractor:
         Args:
             origem (str): Nome da origem
             volume (str): Número do volume
-            
+        
         Returns:
             str: Nome do arquivo formatado
         """
         origem_clean = origem
         return f"{origem_clean}_{volume}.pdf"
     
+    def resolve_source(self, data_row):
+        """
+        Determina o PDF de origem e o intervalo de páginas de uma linha
+        
+        Args:
+            data_row (dict): Dicionário com os dados da linha
+        
+        Returns:
+            tuple: (caminho do PDF de origem, página inicial, página final)
+        """
+        origem = str(data_row["Origem"]).strip()
+        volume = str(data_row["Volume"]).strip()
+        input_pdf = os.path.join(self.processos_dir, self.get_input_pdf_name(origem, volume))
+        start_page, end_page = self.parse_page_range(data_row["Páginas"])
+        return input_pdf, start_page, end_page
+    
+    def is_up_to_date(self, data_row):
+        """
+        Verifica no manifesto se o arquivo extraído da linha já está atualizado
+        
+        Args:
+            data_row (dict): Dicionário com os dados da linha
+        
+        Returns:
+            bool: True se a extração da linha pode ser ignorada
+        """
+        if self.manifest is None:
+            return False
+        # Uma extração forçada interrompida continua a partir das linhas que não terminou
+        if self.force and data_row["Arquivo Extraído"] not in self.manifest.recovered:
+            return False
+        input_pdf, start_page, end_page = self.resolve_source(data_row)
+        if start_page is None:
+            return False
+        return self.manifest.is_current(data_row["Arquivo Extraído"], input_pdf, start_page, end_page)
+    
+    def record_result(self, data_row, success, sha256=None):
+        """
+        Atualiza o manifesto com o resultado da extração de uma linha
+        
+        Args:
+            data_row (dict): Dicionário com os dados da linha
+            success (bool): Se a extração foi bem-sucedida
+            sha256 (str): Hash do arquivo gravado, se já conhecido
+        """
+        if self.manifest is None:
+            return
+        output_path = data_row["Arquivo Extraído"]
+        if not success:
+            self.manifest.discard(output_path)
+            return
+        try:
+            input_pdf, start_page, end_page = self.resolve_source(data_row)
+            with self.metrics.span('registrar_manifesto'):
+                self.manifest.record(output_path, input_pdf, start_page, end_page, sha256)
+        except OSError as e:
+            self.manifest.discard(output_path)
+            self.callback(f"Aviso: não foi possível registrar '{output_path}' no manifesto: {e}", 'warning')
+    
     def extract_pages(self, data_row):
         """
         Extrai páginas de um PDF com base nas informações da linha
         
         Args:
             data_row (dict): Dicionário com os dados da linha
-            
+        
         Returns:
             tuple: (sucesso, mensagem)
         """
@@ -98,10 +416,21 @@ class PDFExtractor:
         if num_pages > 10:
             self.callback(f"Aviso: Intervalo longo ({start_page}-{end_page}, {num_pages} páginas) para Matrícula {matricula}. Verificando...", 'warning')
         
+        self.use_source(input_pdf)
+        
+        # Arquivo de origem indexado como inválido no upload: não é aberto novamente
+        entrada = self.source_entry(input_pdf)
+        if entrada is not None and not entrada['valido']:
+            msg = f"Erro: Arquivo de origem '{input_pdf}' inválido ({entrada['mensagem']}) para Matrícula {matricula}."
+            self.callback(msg, 'error')
+            return False, msg
+        
         try:
-            # Abrir PDF de origem
-            reader = PdfReader(input_pdf)
-            total_pages = len(reader.pages)
+            # Total de páginas do índice gravado no upload; sem ele, o PDF é analisado
+            if entrada is not None:
+                total_pages = entrada['paginas']
+            else:
+                total_pages = len(self.get_pages(input_pdf, self.get_reader(input_pdf)))
             
             # Verificar se o intervalo está dentro do total de páginas
             if end_page > total_pages:
@@ -109,20 +438,36 @@ class PDFExtractor:
                 self.callback(msg, 'error')
                 return False, msg
             
+            # Abrir PDF de origem (reaproveitado entre linhas do mesmo volume)
+            reader = self.get_reader(input_pdf)
+            pages = self.get_pages(input_pdf, reader)
+            
             # Criar diretório de saída se não existir
             output_dir = os.path.dirname(output_path)
             if not os.path.exists(output_dir):
-                os.makedirs(output_dir)
+                with self.metrics.span('criar_diretorios'):
+                    os.makedirs(output_dir)
                 self.callback(f"Diretório criado: {output_dir}", 'info')
             
-            # Criar PDF de saída
-            writer = PdfWriter()
-            for page_num in range(start_page - 1, end_page):
-                writer.add_page(reader.pages[page_num])
+            # Copiar os objetos das páginas diretamente para o arquivo de saída
+            bytes_written = None
+            if self.mode == MODE_BYTES:
+                bytes_written = self.write_raw(input_pdf, reader, start_page, end_page, output_path)
             
-            # Salvar PDF extraído
-            with open(output_path, "wb") as output_file:
-                writer.write(output_file)
+            if bytes_written is None:
+                # Criar PDF de saída
+                with self.metrics.span('montar_paginas'):
+                    writer = PdfWriter()
+                    for page_num in range(start_page - 1, end_page):
+                        writer.add_page(pages[page_num])
+                
+                # Salvar PDF extraído (em um arquivo temporário, renomeado ao final)
+                with self.metrics.span('gravar_pdf'):
+                    with atomic_write(output_path) as output_file:
+                        writer.write(output_file)
+                        bytes_written = output_file.tell()
+            self.metrics.count('paginas', num_pages)
+            self.metrics.count('bytes_escritos', bytes_written)
             
             msg = f"PDF extraído salvo em: {output_path} ({num_pages} páginas)"
             self.callback(msg, 'info')
@@ -132,6 +477,37 @@ class PDFExtractor:
             msg = f"Erro ao extrair páginas {start_page}-{end_page} de '{input_pdf}' para Matrícula {matricula}: {e}"
             self.callback(msg, 'error')
             return False, msg
+        
+        finally:
+            self.limit_source_memory(input_pdf)
+    
+    def write_raw(self, input_pdf, reader, start_page, end_page, output_path):
+        """
+        Grava o intervalo de páginas copiando os bytes dos objetos do PDF de origem
+        
+        Args:
+            input_pdf (str): Caminho do PDF de origem
+            reader (PdfReader): Leitor do PDF de origem
+            start_page (int): Página inicial
+            end_page (int): Página final
+            output_path (str): Caminho do PDF de saída
+        
+        Returns:
+            int: Bytes gravados, ou None se o PDF deve ser gravado pelo PdfWriter
+        """
+        slicer = self.get_slicer(input_pdf, reader)
+        if slicer is None:
+            return None
+        
+        try:
+            with self.metrics.span('copiar_objetos'):
+                with atomic_write(output_path) as output_file:
+                    return slicer.write(start_page, end_page, output_file)
+        except UnsupportedSource as e:
+            # Estrutura não suportada encontrada durante a cópia: usar o PdfWriter para este volume
+            self.callback(f"Aviso: cópia direta indisponível para '{input_pdf}' ({e}); usando PdfWriter.", 'warning')
+            self._slicers[input_pdf] = None
+            return None
     
     def process_dataframe(self, df):
         """
@@ -139,42 +515,364 @@ class PDFExtractor:
         
         Args:
             df (pandas.DataFrame): DataFrame com os dados
-            
+        
         Returns:
             dict: Estatísticas do processamento
         """
         total_rows = len(df)
-        success_count = 0
-        error_count = 0
+        inicio = time.time()
         
         self.callback(f"Iniciando extração de {total_rows} documentos...", 'info')
         
-        # Criar diretórios para arquivos extraídos
-        for file_path in df["Arquivo Extraído"]:
-            output_dir = os.path.dirname(file_path)
-            if not os.path.exists(output_dir):
-                os.makedirs(output_dir)
-                self.callback(f"Diretório criado: {output_dir}", 'info')
+        # Execução anterior interrompida: as linhas registradas no diário são conferidas pelo hash
+        if self.manifest is not None and self.manifest.recovered:
+            self.callback(f"Retomando extração interrompida: {len(self.manifest.recovered)} documentos "
+                          f"já gravados serão conferidos.", 'warning')
+        
+        # Ignorar as linhas cujo arquivo extraído já está atualizado
+        skipped_count = 0
+        if self.manifest is not None and self.manifest.entries and (not self.force or self.manifest.recovered):
+            with self.metrics.span('verificar_manifesto'):
+                atualizados = [self.is_up_to_date(row) for row in df.to_dict('records')]
+            skipped_count = sum(atualizados)
+            if skipped_count:
+                df = df[[not atualizado for atualizado in atualizados]]
+                self.callback(f"{skipped_count} documentos já estão atualizados e serão ignorados.", 'info')
+                self.progress_callback(skipped_count, total_rows)
+        
+        # Criar diretórios para arquivos extraídos e remover os temporários de gravações interrompidas
+        criados = []
+        temporarios = 0
+        with self.metrics.span('criar_diretorios'):
+            for output_dir in set(os.path.dirname(file_path) for file_path in df["Arquivo Extraído"]):
+                if not os.path.exists(output_dir):
+                    os.makedirs(output_dir)
+                    criados.append(output_dir)
+                else:
+                    temporarios += clean_temp_files(output_dir, inicio)
+        for output_dir in sorted(criados):
+            self.callback(f"Diretório criado: {output_dir}", 'info')
+        if temporarios:
+            self.callback(f"{temporarios} arquivos temporários de gravações interrompidas removidos.", 'warning')
+        
+        # Documentos compartilhados: cada (Origem, Volume, intervalo) é extraído uma única vez
+        df = self.group_shared(df)
+        if self._compartilhados:
+            copias = sum(len(linhas) for linhas in self._compartilhados.values())
+            self.callback(f"{copias} documentos compartilhados serão gravados a partir de {len(self._compartilhados)} extrações.", 'info')
+        
+        # Agrupar as linhas por arquivo de origem (Origem, Volume),
+        # para que cada volume seja aberto uma única vez
+        origens = df["Origem"].map(str).str.strip()
+        volumes = df["Volume"].map(str).str.strip()
+        grupos = [grupo for _, grupo in df.groupby([origens, volumes], sort=False)]
         
-        # Processar cada linha
-        for index, row in df.iterrows():
-            self.callback(f"Processando item {index+1}/{total_rows}: Matrícula {row['Matrícula']}", 'info')
-            success, _ = self.extract_pages(row)
-            if success:
-                success_count += 1
+        self.shared_count = 0
+        try:
+            if self.workers > 1 and len(grupos) > 1:
+                success_count, error_count = self._process_parallel(grupos, total_rows, skipped_count)
             else:
-                error_count += 1
+                success_count, error_count = self._process_serial(grupos, total_rows, skipped_count)
+        finally:
+            self._compartilhados = {}
+            if self.manifest is not None:
+                with self.metrics.span('gravar_manifesto'):
+                    self.manifest.save()
         
         # Resumo final
-        self.callback(f"Extração concluída. Total: {total_rows}, Sucesso: {success_count}, Erros: {error_count}", 'info')
+        self.callback(f"Extração concluída. Total: {total_rows}, Sucesso: {success_count}, Erros: {error_count}, "
+                      f"Ignorados: {skipped_count}, Compartilhados reaproveitados: {self.shared_count}", 'info')
         
         return {
             'total': total_rows,
             'success': success_count,
-            'error': error_count
+            'error': error_count,
+            'skipped': skipped_count,
+            'shared': self.shared_count
         }
+    
+    def group_shared(self, df):
+        """
+        Separa as linhas que repetem o (Origem, Volume, intervalo de páginas) de uma linha anterior
+        
+        Apenas a primeira linha de cada documento é extraída; as demais recebem
+        uma cópia do arquivo gravado (ver fill_shared).
+        
+        Args:
+            df (pandas.DataFrame): Linhas a extrair
+        
+        Returns:
+            pandas.DataFrame: Uma linha por documento distinto
+        """
+        self._compartilhados = {}
+        if self.dedup == DEDUP_OFF or df.empty:
+            return df
+        
+        intervalos = {}
+        primeiras = {}
+        manter = []
+        origens = df["Origem"].map(str).str.strip()
+        volumes = df["Volume"].map(str).str.strip()
+        for index, origem, volume, paginas in zip(df.index, origens, volumes, df["Páginas"]):
+            if paginas not in intervalos:
+                intervalos[paginas] = self.parse_page_range(paginas)
+            start_page, end_page = intervalos[paginas]
+            chave = (origem, volume, start_page, end_page)
+            if start_page is None or chave not in primeiras:
+                primeiras.setdefault(chave, index)
+                manter.append(True)
+            else:
+                self._compartilhados.setdefault(primeiras[chave], []).append(index)
+                manter.append(False)
+        
+        if not self._compartilhados:
+            return df
+        for index, copias in self._compartilhados.items():
+            self._compartilhados[index] = [(copia, df.loc[copia].to_dict()) for copia in copias]
+        return df[manter]
+    
+    def fill_shared(self, index, data_row, success):
+        """
+        Grava o documento extraído de uma linha nos destinos das linhas que o compartilham
+        
+        O arquivo é ligado (hardlink), clonado (reflink) ou copiado, conforme
+        o suporte do sistema de arquivos, sem extrair as páginas novamente.
+        
+        Args:
+            index: Índice da linha extraída
+            data_row (dict): Dados da linha extraída
+            success (bool): Se a extração da linha foi bem-sucedida
+        
+        Yields:
+            tuple: (dados da linha que compartilha o documento, sucesso)
+        """
+        for _, copia in self._compartilhados.pop(index, []):
+            matricula = copia["Matrícula"]
+            if not success:
+                msg = f"Erro: Documento compartilhado com a Matrícula {data_row['Matrícula']} não foi extraído para Matrícula {matricula}."
+                self.callback(msg, 'error')
+                self.record_result(copia, False)
+                yield copia, False
+                continue
+            
+            origem_path = data_row["Arquivo Extraído"]
+            output_path = copia["Arquivo Extraído"]
+            try:
+                with self.metrics.span('reaproveitar_compartilhados'):
+                    if os.path.abspath(output_path) == os.path.abspath(origem_path):
+                        metodo = None
+                    else:
+                        metodo = link_or_copy(origem_path, output_path, self.dedup)
+                    tamanho = os.path.getsize(output_path)
+            except OSError as e:
+                msg = f"Erro ao gravar o documento compartilhado '{output_path}' para Matrícula {matricula}: {e}"
+                self.callback(msg, 'error')
+                self.record_result(copia, False)
+                yield copia, False
+                continue
+            
+            start_page, end_page = self.parse_page_range(copia["Páginas"])
+            self.metrics.count('documentos_reaproveitados')
+            self.metrics.count('paginas_reaproveitadas', end_page - start_page + 1)
+            if metodo == COPIA:
+                self.metrics.count('bytes_escritos', tamanho)
+            else:
+                self.metrics.count('bytes_reaproveitados', tamanho)
+            if metodo is not None:
+                self.metrics.count(f'reaproveitados_{metodo}')
+            self.callback(f"PDF compartilhado com a Matrícula {data_row['Matrícula']} salvo em: {output_path} ({metodo or 'mesmo arquivo'})", 'info')
+            
+            registro = self.manifest.entries.get(origem_path) if self.manifest is not None else None
+            self.record_result(copia, True, registro['sha256'] if registro else None)
+            self.shared_count += 1
+            yield copia, True
+    
+    def _check_cancel(self, processados, total_rows):
+        """Interrompe a extração se o cancelamento tiver sido solicitado"""
+        if self.cancel_check():
+            self.callback(f"Extração cancelada após {processados} de {total_rows} documentos.", 'warning')
+            raise ProcessamentoCancelado("Extração cancelada")
+    
+    def _process_serial(self, grupos, total_rows, skipped_count=0):
+        """
+        Extrai os grupos de linhas no processo atual
+        
+        Args:
+            grupos (list): DataFrames com as linhas de cada arquivo de origem
+            total_rows (int): Total de linhas do índice
+            skipped_count (int): Linhas ignoradas por já estarem atualizadas
+        
+        Returns:
+            tuple: (sucessos, erros)
+        """
+        success_count = 0
+        error_count = 0
+        try:
+            for grupo in grupos:
+                for index, row in grupo.iterrows():
+                    self._check_cancel(skipped_count + success_count + error_count, total_rows)
+                    
+                    self.callback(f"Processando item {index+1}/{total_rows}: Matrícula {row['Matrícula']}", 'info')
+                    inicio = time.perf_counter()
+                    success, _ = self.extract_pages(row)
+                    self.metrics.row(f"Matrícula {row['Matrícula']}", time.perf_counter() - inicio)
+                    self.metrics.count('linhas_extraidas')
+                    self.record_result(row, success)
+                    if success:
+                        success_count += 1
+                    else:
+                        error_count += 1
+                    self.progress_callback(skipped_count + success_count + error_count, total_rows, row['Matrícula'])
+                    
+                    for copia, copia_success in self.fill_shared(index, row, success):
+                        if copia_success:
+                            success_count += 1
+                        else:
+                            error_count += 1
+                        self.progress_callback(skipped_count + success_count + error_count, total_rows, copia['Matrícula'])
+        finally:
+            self.close_readers()
+        
+        return success_count, error_count
+    
+    def _process_parallel(self, grupos, total_rows, skipped_count=0):
+        """
+        Extrai os grupos de linhas em um pool de processos, um volume por tarefa
+        
+        As mensagens de cada linha são coletadas no worker e repassadas ao
+        callback neste processo, na ordem em que os volumes são concluídos.
+        A falha de um worker é registrada como erro em cada linha do volume.
+        Os tempos medidos nos workers são somados às métricas desta execução.
+        
+        Args:
+            grupos (list): DataFrames com as linhas de cada arquivo de origem
+            total_rows (int): Total de linhas do índice
+            skipped_count (int): Linhas ignoradas por já estarem atualizadas
+        
+        Returns:
+            tuple: (sucessos, erros)
+        """
+        success_count = 0
+        error_count = 0
+        
+        self.callback(f"Extraindo {len(grupos)} volumes com {self.workers} processos em paralelo", 'info')
+        
+        executor = ProcessPoolExecutor(max_workers=min(self.workers, len(grupos)))
+        try:
+            futures = {}
+            for grupo in grupos:
+                linhas = [(index, row.to_dict()) for index, row in grupo.iterrows()]
+                # Apenas o índice de páginas do volume do grupo é enviado ao worker
+                nome = os.path.basename(self.resolve_source(linhas[0][1])[0])
+                indice = {nome: self.source_index[nome]} if nome in self.source_index else None
+                future = executor.submit(_extract_group, self.projeto_path, linhas, self.max_readers,
+                                         self.metrics.enabled, self.mode, indice)
+                futures[future] = linhas
+            
+            for future in as_completed(futures):
+                self._check_cancel(skipped_count + success_count + error_count, total_rows)
+                linhas = futures[future]
+                
+                try:
+                    resultados, metricas_worker = future.result()
+                    self.metrics.merge(metricas_worker)
+                except Exception as e:
+                    # Falha do worker: reportar cada linha do volume como erro
+                    resultados = []
+                    for index, row in linhas:
+                        msg = f"Erro no processo de extração para Matrícula {row['Matrícula']}: {e}"
+                        resultados.append((index, False, [(msg, 'error')]))
+                
+                for (index, row), (_, success, mensagens) in zip(linhas, resultados):
+                    self.metrics.count('linhas_extraidas')
+                    self.callback(f"Processando item {index+1}/{total_rows}: Matrícula {row['Matrícula']}", 'info')
+                    for msg, tipo in mensagens:
+                        self.callback(msg, tipo)
+                    self.record_result(row, success)
+                    if success:
+                        success_count += 1
+                    else:
+                        error_count += 1
+                    self.progress_callback(skipped_count + success_count + error_count, total_rows, row['Matrícula'])
+                    
+                    for copia, copia_success in self.fill_shared(index, row, success):
+                        if copia_success:
+                            success_count += 1
+                        else:
+                            error_count += 1
+                        self.progress_callback(skipped_count + success_count + error_count, total_rows, copia['Matrícula'])
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        
+        return success_count, error_count
 
-def extract_from_excel(excel_path, projeto_path, callback=None):
+def _extract_group(projeto_path, linhas, max_readers, metricas=False, mode=MODE_WRITER, source_index=None):
+    """
+    Extrai as linhas de um mesmo arquivo de origem em um processo worker
+    
+    Args:
+        projeto_path (str): Caminho para o diretório do projeto
+        linhas (list): Pares (índice, dados da linha)
+        max_readers (int): Número máximo de PDFs de origem mantidos abertos
+        metricas (bool): Se as métricas de tempo devem ser coletadas
+        mode (str): Modo de gravação dos PDFs extraídos
+        source_index (dict): Índice de páginas do PDF de origem do grupo, por nome de arquivo
+    
+    Returns:
+        tuple: (tuplas (índice, sucesso, mensagens) na ordem das linhas, métricas do worker)
+    """
+    mensagens = []
+    metrics = RunMetrics(enabled=metricas)
+    extractor = PDFExtractor(projeto_path, callback=lambda msg, tipo='info': mensagens.append((msg, tipo)),
+                             max_readers=max_readers, metrics=metrics, mode=mode, source_index=source_index)
+    resultados = []
+    try:
+        for index, row in linhas:
+            inicio = time.perf_counter()
+            try:
+                success, _ = extractor.extract_pages(row)
+            except Exception as e:
+                success = False
+                mensagens.append((f"Erro ao extrair páginas para Matrícula {row['Matrícula']}: {e}", 'error'))
+            metrics.row(f"Matrícula {row['Matrícula']}", time.perf_counter() - inicio)
+            resultados.append((index, success, list(mensagens)))
+            mensagens.clear()
+    finally:
+        extractor.close_readers()
+    return resultados, metrics.to_dict()
+
+def extract_from_dataframe(df, projeto_path, callback=None, max_readers=DEFAULT_MAX_READERS,
+                           progress_callback=None, cancel_check=None, workers=1, force=False, metrics=None,
+                           mode=MODE_WRITER, source_index=None, dedup=HARDLINK):
+    """
+    Função auxiliar para extrair PDFs a partir de um DataFrame com o índice de matrículas
+    
+    Args:
+        df (pandas.DataFrame): DataFrame com os dados
+        projeto_path (str): Caminho para o diretório do projeto
+        callback (function): Função de callback para reportar progresso
+        max_readers (int): Número máximo de PDFs de origem mantidos abertos
+        progress_callback (function): Função chamada com (processados, total, matrícula) a cada linha
+        cancel_check (function): Função que retorna True quando o processamento deve ser interrompido
+        workers (int): Número de processos de extração (1 = extração no processo atual)
+        force (bool): Se True, extrai todas as linhas mesmo que estejam atualizadas no manifesto
+        metrics (RunMetrics): Métricas da execução
+        mode (str): 'writer' (PdfWriter) ou 'bytes' (cópia direta dos objetos)
+        source_index (dict): Índice de páginas dos PDFs de origem, por nome de arquivo
+        dedup (str): Como gravar os documentos compartilhados: 'hardlink', 'reflink', 'copy' ou 'off'
+    
+    Returns:
+        dict: Estatísticas do processamento
+    """
+    manifest = ExtractionManifest.for_project(projeto_path)
+    extractor = PDFExtractor(projeto_path, None, callback, max_readers,
+                             progress_callback, cancel_check, workers, manifest, force, metrics, mode,
+                             source_index, dedup)
+    return extractor.process_dataframe(df)
+
+def extract_from_excel(excel_path, projeto_path, callback=None, max_readers=DEFAULT_MAX_READERS,
+                       progress_callback=None, cancel_check=None, workers=1, force=False, metrics=None,
+                       mode=MODE_WRITER, source_index=None, dedup=HARDLINK):
     """
     Função auxiliar para extrair PDFs a partir de um arquivo Excel
     
@@ -182,21 +880,33 @@ def extract_from_excel(excel_path, projeto_path, callback=None):
         excel_path (str): Caminho para o arquivo Excel
         projeto_path (str): Caminho para o diretório do projeto
         callback (function): Função de callback para reportar progresso
-        
+        max_readers (int): Número máximo de PDFs de origem mantidos abertos
+        progress_callback (function): Função chamada com (processados, total, matrícula) a cada linha
+        cancel_check (function): Função que retorna True quando o processamento deve ser interrompido
+        workers (int): Número de processos de extração (1 = extração no processo atual)
+        force (bool): Se True, extrai todas as linhas mesmo que estejam atualizadas no manifesto
+        metrics (RunMetrics): Métricas da execução
+        mode (str): 'writer' (PdfWriter) ou 'bytes' (cópia direta dos objetos)
+        source_index (dict): Índice de páginas dos PDFs de origem, por nome de arquivo
+        dedup (str): Como gravar os documentos compartilhados: 'hardlink', 'reflink', 'copy' ou 'off'
+    
     Returns:
         dict: Estatísticas do processamento
     """
     try:
-        import pandas as pd
-        
-        # Inicializar extrator
-        extractor = PDFExtractor(projeto_path, excel_path, callback)
+        from app.utils import excel_cache
         
         # Carregar planilha
-        df = pd.read_excel(excel_path)
+        with (metrics or NULL_METRICS).span('ler_planilha'):
+            df = excel_cache.read_excel(excel_path)
         
         # Processar DataFrame
-        return extractor.process_dataframe(df)
+        return extract_from_dataframe(df, projeto_path, callback, max_readers,
+                                      progress_callback, cancel_check, workers, force, metrics, mode,
+                                      source_index, dedup)
+    
+    except ProcessamentoCancelado:
+        raise
     
     except Exception as e:
         if callback:
@@ -0,0 +1,259 @@
+import io
+import csv
+import os
+import codecs
+from openpyxl import load_workbook
+from app import db
+from app.models import Matricula
+from app.utils import indice
+from app.utils.extract_pdfs import PDFExtractor
+
+# Colunas que a planilha importada deve conter (as demais colunas do índice são opcionais)
+COLUNAS_OBRIGATORIAS = ['Matrícula', 'Nome do Documento', 'Origem', 'Volume', 'Páginas']
+
+# Formas de combinar as linhas importadas com o índice atual
+ACRESCENTAR = 'acrescentar'
+SUBSTITUIR = 'substituir'
+ATUALIZAR = 'atualizar'
+MODOS = (ACRESCENTAR, SUBSTITUIR, ATUALIZAR)
+
+# Atributos que identificam um documento no modo 'atualizar'
+CHAVE = ('matricula', 'origem', 'volume', 'paginas')
+
+# Extensões aceitas
+EXTENSOES = ('.xlsx', '.xlsm', '.csv')
+
+# Bytes do início de um CSV usados para detectar a codificação e o separador
+AMOSTRA_CSV = 1024 * 1024
+
+# Número máximo de problemas detalhados no relatório (o total é sempre informado)
+MAX_PROBLEMAS = 100
+
+class ErroImportacao(Exception):
+    """Arquivo que não pode ser importado (formato, colunas ou linhas inválidas)"""
+    
+    def __init__(self, mensagem, problemas=None, total_problemas=0):
+        super().__init__(mensagem)
+        self.problemas = problemas or []
+        self.total_problemas = total_problemas
+
+def _normalizar(nome):
+    return str(nome).strip().casefold() if nome is not None else ''
+
+def _linhas_xlsx(stream):
+    """Lê as linhas de uma planilha xlsx em modo somente leitura (linha a linha, sem carregar a planilha inteira)"""
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        for linha in workbook.worksheets[0].iter_rows(values_only=True):
+            yield linha
+    finally:
+        workbook.close()
+
+def _linhas_csv(stream):
+    """
+    Lê as linhas de um CSV separado por ';' ou ',' (UTF-8, ou Windows-1252 se não for UTF-8 válido)
+    
+    A codificação e o separador são detectados em uma amostra do início do
+    arquivo; as linhas são decodificadas à medida que são lidas, sem carregar
+    o arquivo inteiro na memória.
+    """
+    amostra = stream.read(AMOSTRA_CSV)
+    stream.seek(0)
+    try:
+        # Um caractere cortado no fim da amostra não invalida o UTF-8
+        texto = codecs.getincrementaldecoder('utf-8-sig')().decode(amostra, final=len(amostra) < AMOSTRA_CSV)
+        encoding = 'utf-8-sig'
+    except UnicodeDecodeError:
+        texto = amostra.decode('cp1252', errors='replace')
+        encoding = 'cp1252'
+    delimitador = ';' if texto.count(';') > texto.count(',') else ','
+    
+    texto = io.TextIOWrapper(stream, encoding=encoding, newline='')
+    try:
+        yield from csv.reader(texto, delimiter=delimitador)
+    except UnicodeDecodeError:
+        raise ErroImportacao('O arquivo CSV mistura codificações: salve-o em UTF-8 e envie novamente')
+    finally:
+        # O arquivo enviado continua aberto para quem o recebeu
+        texto.detach()
+
+def ler_arquivo(stream, nome_arquivo):
+    """
+    Lê as linhas de um índice de matrículas em xlsx ou CSV
+    
+    Args:
+        stream (file): Arquivo aberto em modo binário
+        nome_arquivo (str): Nome do arquivo enviado (define o formato pela extensão)
+    
+    Returns:
+        tuple: (número da linha na planilha, valores por coluna do índice) para cada linha não vazia
+    
+    Raises:
+        ErroImportacao: Se o formato não for suportado ou faltarem colunas obrigatórias
+    """
+    extensao = os.path.splitext(nome_arquivo)[1].lower()
+    if extensao not in EXTENSOES:
+        raise ErroImportacao(f"Formato não suportado: use {', '.join(EXTENSOES)}")
+    
+    try:
+        linhas = _linhas_csv(stream) if extensao == '.csv' else _linhas_xlsx(stream)
+        
+        # Cabeçalho: primeira linha não vazia
+        cabecalho = None
+        for numero, valores in enumerate(linhas, 1):
+            if any(_normalizar(valor) for valor in valores):
+                cabecalho = valores
+                break
+        if cabecalho is None:
+            raise ErroImportacao('O arquivo está vazio')
+        
+        conhecidas = {_normalizar(coluna): coluna for coluna in indice.COLUNAS}
+        posicoes = {}
+        for posicao, valor in enumerate(cabecalho):
+            coluna = conhecidas.get(_normalizar(valor))
+            if coluna is not None and coluna not in posicoes:
+                posicoes[coluna] = posicao
+        faltando = [coluna for coluna in COLUNAS_OBRIGATORIAS if coluna not in posicoes]
+        if faltando:
+            raise ErroImportacao(f"Colunas obrigatórias ausentes: {', '.join(faltando)}")
+        
+        resultado = []
+        for numero, valores in enumerate(linhas, numero + 1):
+            linha = {
+                coluna: valores[posicao] if posicao < len(valores) else None
+                for coluna, posicao in posicoes.items()
+            }
+            if any(indice.valor_texto(valor) is not None for valor in linha.values()):
+                resultado.append((numero, linha))
+        return resultado
+    except ErroImportacao:
+        raise
+    except Exception as e:
+        raise ErroImportacao(f"Não foi possível ler o arquivo: {e}")
+
+def validar_linhas(linhas):
+    """
+    Verifica se as colunas obrigatórias estão preenchidas e se os intervalos de páginas são legíveis
+    
+    Args:
+        linhas (list): Linhas retornadas por ler_arquivo
+    
+    Returns:
+        tuple: (problemas (até MAX_PROBLEMAS), total de problemas)
+    """
+    parse_page_range = PDFExtractor().parse_page_range
+    intervalos = {}
+    problemas = []
+    total = 0
+    for numero, linha in linhas:
+        mensagens = [
+            f"Coluna '{coluna}' não preenchida"
+            for coluna in COLUNAS_OBRIGATORIAS
+            if indice.valor_texto(linha.get(coluna)) is None
+        ]
+        paginas = indice.valor_texto(linha.get('Páginas'))
+        if paginas is not None:
+            if paginas not in intervalos:
+                intervalos[paginas] = parse_page_range(paginas)
+            inicio, fim = intervalos[paginas]
+            if inicio is None or inicio < 1 or fim < inicio:
+                mensagens.append(f"Intervalo de páginas inválido '{paginas}'")
+        
+        total += len(mensagens)
+        for mensagem in mensagens:
+            if len(problemas) < MAX_PROBLEMAS:
+                problemas.append({'linha': numero, 'matricula': indice.valor_texto(linha.get('Matrícula')), 'mensagem': mensagem})
+    return problemas, total
+
+def importar_matriculas(projeto, stream, nome_arquivo, modo=ACRESCENTAR):
+    """
+    Importa as matrículas de uma planilha xlsx ou de um CSV para o índice do projeto
+    
+    Todas as linhas são lidas e validadas antes de qualquer alteração: se
+    alguma linha tiver problemas, nada é gravado. As linhas válidas são
+    gravadas em uma única transação, com inserções e atualizações em lote.
+    
+    Args:
+        projeto (Projeto): Projeto de destino
+        stream (file): Arquivo enviado, aberto em modo binário
+        nome_arquivo (str): Nome do arquivo enviado
+        modo (str): 'acrescentar' (no final do índice), 'substituir' (o índice inteiro) ou
+            'atualizar' (linhas com a mesma matrícula, origem, volume e páginas são atualizadas; as demais, acrescentadas)
+    
+    Returns:
+        dict: Linhas lidas, inseridas, atualizadas e removidas
+    
+    Raises:
+        ErroImportacao: Se o arquivo não puder ser lido ou tiver linhas inválidas
+    """
+    if modo not in MODOS:
+        raise ErroImportacao(f"Modo de importação inválido '{modo}'")
+    
+    linhas = ler_arquivo(stream, nome_arquivo)
+    problemas, total_problemas = validar_linhas(linhas)
+    if total_problemas:
+        raise ErroImportacao(
+            f"{total_problemas} problemas encontrados no arquivo; nenhuma matrícula foi importada",
+            problemas, total_problemas
+        )
+    
+    # Projetos antigos: a planilha existente entra no índice antes das linhas importadas
+    if modo != SUBSTITUIR:
+        indice.garantir_indice(projeto)
+    
+    resultado = {'modo': modo, 'lidas': len(linhas), 'inseridas': 0, 'atualizadas': 0, 'removidas': 0}
+    registros = [indice.registro_da_linha(projeto.id, 0, linha) for _, linha in linhas]
+    
+    try:
+        ordem = 0
+        if modo == SUBSTITUIR:
+            resultado['removidas'] = Matricula.query.filter_by(projeto_id=projeto.id).delete(synchronize_session=False)
+        else:
+            ordem = indice.proxima_ordem(projeto)
+        
+        novos = registros
+        if modo == ATUALIZAR:
+            existentes = {
+                tuple(linha[1:]): linha[0]
+                for linha in db.session.execute(
+                    db.select(Matricula.id, *[getattr(Matricula, atributo) for atributo in CHAVE])
+                    .where(Matricula.projeto_id == projeto.id)
+                    .order_by(Matricula.ordem, Matricula.id)
+                )
+            }
+            # Apenas as colunas presentes no arquivo são atualizadas; o caminho extraído e o
+            # compartilhamento são recalculados na renomeação
+            atualizaveis = [
+                Matricula.COLUNAS_EXCEL[coluna] for coluna in linhas[0][1]
+                if coluna not in ('Arquivo Extraído', 'Documento Compartilhado')
+            ] if linhas else []
+            novos = []
+            atualizacoes = {}
+            for registro in registros:
+                id_ = existentes.get(tuple(registro[atributo] for atributo in CHAVE))
+                if id_ is None:
+                    novos.append(registro)
+                    continue
+                atualizacao = {atributo: registro[atributo] for atributo in atualizaveis}
+                atualizacao['id'] = id_
+                atualizacoes[id_] = atualizacao
+            if atualizacoes:
+                db.session.execute(db.update(Matricula), list(atualizacoes.values()))
+            resultado['atualizadas'] = len(atualizacoes)
+        
+        for posicao, registro in enumerate(novos):
+            registro['ordem'] = ordem + posicao
+        if novos:
+            db.session.execute(db.insert(Matricula), novos)
+        resultado['inseridas'] = len(novos)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    # Com o índice vazio, a planilha também é esvaziada para que não
+    # seja importada novamente por indice.garantir_indice
+    if projeto.matriculas.first() is None and os.path.exists(projeto.caminho_excel):
+        indice.exportar_excel(projeto)
+    
+    return resultado
@@ -0,0 +1,156 @@
+import os
+import math
+from datetime import date, datetime
+import pandas as pd
+from app import db
+from app.models import Matricula
+from app.utils import excel_cache, planilhas
+
+# Colunas da planilha de índice, na ordem em que são exportadas
+COLUNAS = list(Matricula.COLUNAS_EXCEL.keys())
+
+def valor_texto(valor):
+    """
+    Converte o valor de uma célula da planilha para o texto armazenado no banco
+    
+    Args:
+        valor: Valor lido da planilha
+    
+    Returns:
+        str: Texto correspondente, ou None para células vazias
+    """
+    if valor is None or valor is pd.NaT:
+        return None
+    if isinstance(valor, float):
+        if math.isnan(valor):
+            return None
+        # Números inteiros lidos como float (ex: volume 1.0) voltam a ser "1"
+        if valor.is_integer():
+            return str(int(valor))
+    if isinstance(valor, (datetime, date)):
+        return valor.strftime('%Y-%m-%d')
+    texto = str(valor)
+    return texto if texto.strip() else None
+
+def registro_da_linha(projeto_id, ordem, linha):
+    """
+    Monta o registro de uma matrícula a partir de uma linha da planilha
+    
+    Args:
+        projeto_id (int): ID do projeto
+        ordem (int): Posição da linha no índice
+        linha (dict): Valores da linha, indexados pelos nomes das colunas da planilha
+    
+    Returns:
+        dict: Valores dos atributos do modelo Matricula
+    """
+    registro = {'projeto_id': projeto_id, 'ordem': ordem}
+    for coluna, atributo in Matricula.COLUNAS_EXCEL.items():
+        registro[atributo] = valor_texto(linha.get(coluna))
+    registro['matricula'] = registro['matricula'] or ''
+    registro['documento_compartilhado'] = registro['documento_compartilhado'] or 'Não'
+    return registro
+
+def importar_excel(projeto, excel_path=None):
+    """
+    Substitui as matrículas do projeto pelo conteúdo de uma planilha de índice
+    
+    Args:
+        projeto (Projeto): Projeto de destino
+        excel_path (str): Caminho da planilha (padrão: planilha do projeto)
+    
+    Returns:
+        int: Número de matrículas importadas
+    """
+    df = excel_cache.read_excel(excel_path or projeto.caminho_excel)
+    registros = [
+        registro_da_linha(projeto.id, ordem, linha)
+        for ordem, linha in enumerate(df.to_dict('records'))
+    ]
+    
+    Matricula.query.filter_by(projeto_id=projeto.id).delete(synchronize_session=False)
+    if registros:
+        db.session.execute(db.insert(Matricula), registros)
+    db.session.commit()
+    return len(registros)
+
+def garantir_indice(projeto):
+    """
+    Importa a planilha de índice existente para projetos criados antes da tabela de matrículas
+    
+    Args:
+        projeto (Projeto): Projeto a ser verificado
+    
+    Returns:
+        bool: True se a planilha foi importada
+    """
+    if projeto.matriculas.first() is not None:
+        return False
+    if not os.path.exists(projeto.caminho_excel):
+        return False
+    return importar_excel(projeto) > 0
+
+def proxima_ordem(projeto):
+    """Retorna a posição para uma nova matrícula no final do índice"""
+    maior = db.session.query(db.func.max(Matricula.ordem)).filter_by(projeto_id=projeto.id).scalar()
+    return 0 if maior is None else maior + 1
+
+def carregar_dataframe(projeto):
+    """
+    Carrega o índice de matrículas do projeto no formato da planilha
+    
+    Args:
+        projeto (Projeto): Projeto
+    
+    Returns:
+        pandas.DataFrame: Linhas do índice com as colunas da planilha e a coluna "id"
+    """
+    atributos = [getattr(Matricula, atributo) for atributo in Matricula.COLUNAS_EXCEL.values()]
+    linhas = db.session.execute(
+        db.select(Matricula.id, *atributos)
+        .where(Matricula.projeto_id == projeto.id)
+        .order_by(Matricula.ordem, Matricula.id)
+    ).all()
+    return pd.DataFrame.from_records(linhas, columns=['id'] + COLUNAS)
+
+def atualizar_caminhos(projeto, df):
+    """
+    Grava no banco os caminhos calculados pelo renomeador
+    
+    Args:
+        projeto (Projeto): Projeto
+        df (pandas.DataFrame): DataFrame retornado por PathRenamer.process_dataframe
+    """
+    registros = [
+        {'id': int(id_), 'arquivo_extraido': caminho, 'documento_compartilhado': compartilhado}
+        for id_, caminho, compartilhado in zip(df['id'], df['Arquivo Extraído'], df['Documento Compartilhado'])
+    ]
+    if registros:
+        db.session.execute(db.update(Matricula), registros)
+    db.session.commit()
+
+def exportar_excel(projeto, excel_path=None):
+    """
+    Exporta o índice de matrículas para uma planilha no layout original
+    
+    As linhas são lidas do banco e gravadas uma a uma (ver
+    planilhas.write_xlsx), sem montar um DataFrame do índice inteiro.
+    
+    Args:
+        projeto (Projeto): Projeto
+        excel_path (str): Caminho da planilha (padrão: planilha do projeto)
+    
+    Returns:
+        str: Caminho da planilha gerada
+    """
+    excel_path = excel_path or projeto.caminho_excel
+    atributos = [getattr(Matricula, atributo) for atributo in Matricula.COLUNAS_EXCEL.values()]
+    linhas = db.session.execute(
+        db.select(*atributos)
+        .where(Matricula.projeto_id == projeto.id)
+        .order_by(Matricula.ordem, Matricula.id)
+        .execution_options(yield_per=1000)
+    )
+    planilhas.write_xlsx(excel_path, COLUNAS, linhas, excel_cache.cache.sidecar)
+    excel_cache.invalidate(excel_path)
+    return excel_path
@@ -0,0 +1,179 @@
+import os
+import time
+import datetime
+import threading
+
+# Tempo (segundos) em que uma listagem é usada sem consultar o disco
+DEFAULT_TTL = 10
+
+# Diretórios modificados há menos que isso (segundos) são listados novamente na próxima
+# verificação: em sistemas de arquivos de rede o mtime pode ter resolução de 1 a 2 segundos
+MARGEM_MTIME = 2
+
+# Diretórios listados: 'processos' (apenas o primeiro nível) e 'docs' (inclui subdiretórios)
+RECURSIVOS = {'processos': False, 'docs': True}
+
+def _varrer(caminho, base_dir, subpath, recursivo):
+    """
+    Lista um único diretório com os.scandir
+    
+    Returns:
+        tuple: (mtime_ns do diretório, ou None se recente demais para ser comparado; arquivos; subdiretórios)
+    """
+    # O mtime é lido antes da listagem: uma alteração durante a varredura é detectada na próxima verificação
+    mtime_ns = os.stat(caminho).st_mtime_ns
+    if time.time() - mtime_ns / 1e9 < MARGEM_MTIME:
+        mtime_ns = None
+    arquivos = []
+    subdiretorios = []
+    with os.scandir(caminho) as entradas:
+        for entrada in entradas:
+            # Arquivos ocultos (ex: envios em andamento, temporários da extração) não são listados
+            if entrada.name.startswith('.'):
+                continue
+            try:
+                if entrada.is_dir(follow_symlinks=False):
+                    if recursivo:
+                        subdiretorios.append(entrada.path)
+                    continue
+                if not entrada.is_file():
+                    continue
+                stats = entrada.stat()
+            except OSError:
+                continue
+            arquivos.append({
+                'name': entrada.name,
+                'path': os.path.join(subpath, os.path.relpath(entrada.path, base_dir)),
+                'size': stats.st_size,
+                'mtime': stats.st_mtime,
+                'modified': datetime.datetime.fromtimestamp(stats.st_mtime).strftime('%d/%m/%Y %H:%M:%S')
+            })
+    return mtime_ns, arquivos, subdiretorios
+
+class DirectoryInventory:
+    def __init__(self, ttl=DEFAULT_TTL):
+        """
+        Inicializa o inventário dos diretórios de arquivos dos projetos
+        
+        Cada diretório listado é guardado com o seu mtime. Depois de `ttl`
+        segundos, a listagem é conferida com um único stat por diretório (e não
+        por arquivo): apenas os diretórios cujo mtime mudou são listados
+        novamente. Uploads e extrações feitos pela aplicação antecipam essa
+        conferência (ver invalidate).
+        
+        Args:
+            ttl (int): Tempo (segundos) em que a listagem é usada sem consultar o disco
+        """
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+    
+    def init_app(self, app):
+        """Aplica o intervalo de verificação configurado na aplicação"""
+        self.ttl = app.config.get('INVENTORY_TTL', DEFAULT_TTL)
+    
+    def list_files(self, projeto_path, subpath):
+        """
+        Lista os arquivos de um diretório do projeto
+        
+        Args:
+            projeto_path (str): Caminho para o diretório do projeto
+            subpath (str): 'processos' ou 'docs'
+        
+        Returns:
+            list: Cópia dos arquivos, com nome, caminho relativo ao projeto, tamanho e data de modificação
+        """
+        base_dir = os.path.join(os.path.abspath(projeto_path), subpath)
+        agora = time.monotonic()
+        
+        with self._lock:
+            entry = self._entries.get(base_dir)
+            if entry is not None and agora - entry['verificado'] < self.ttl:
+                self.hits += 1
+                return [dict(arquivo) for arquivo in entry['arquivos']]
+            self.misses += 1
+            diretorios = entry['diretorios'] if entry is not None else {}
+        
+        atualizados, alterado = self._refresh(base_dir, subpath, RECURSIVOS[subpath], diretorios)
+        if alterado or entry is None:
+            arquivos = [arquivo for _, lista, _ in atualizados.values() for arquivo in lista]
+        else:
+            arquivos = entry['arquivos']
+        
+        with self._lock:
+            self._entries[base_dir] = {'verificado': agora, 'diretorios': atualizados, 'arquivos': arquivos}
+        return [dict(arquivo) for arquivo in arquivos]
+    
+    def _refresh(self, base_dir, subpath, recursivo, diretorios):
+        """
+        Confere o mtime de cada diretório e lista novamente apenas os alterados
+        
+        Returns:
+            tuple: (diretórios atualizados, se algum diretório foi listado novamente ou removido)
+        """
+        atualizados = {}
+        alterado = False
+        pendentes = [base_dir]
+        while pendentes:
+            caminho = pendentes.pop()
+            try:
+                mtime_ns = os.stat(caminho).st_mtime_ns
+                anterior = diretorios.get(caminho)
+                if anterior is None or anterior[0] != mtime_ns:
+                    anterior = _varrer(caminho, base_dir, subpath, recursivo)
+                    alterado = True
+            except OSError:
+                # Diretório removido durante a verificação
+                continue
+            atualizados[caminho] = anterior
+            pendentes.extend(sorted(anterior[2], reverse=True))
+        return atualizados, alterado or len(atualizados) != len(diretorios)
+    
+    def invalidate(self, projeto_path=None, subpath=None):
+        """
+        Faz com que a próxima listagem de um projeto (ou de todos) consulte o disco
+        
+        A listagem de 'processos' (um único diretório) é descartada, pois um
+        arquivo enviado novamente é regravado sem alterar o mtime do diretório;
+        a de 'docs' é conferida pelo mtime de cada diretório, já que os PDFs
+        extraídos são gravados por renomeação (ver arquivos.atomic_write).
+        
+        Args:
+            projeto_path (str): Caminho para o diretório do projeto; se None, vale para todos os projetos
+            subpath (str): 'processos' ou 'docs'; se None, vale para os dois
+        """
+        with self._lock:
+            for base_dir, entry in list(self._entries.items()):
+                diretorio, nome = os.path.split(base_dir)
+                if projeto_path is not None and diretorio != os.path.abspath(projeto_path):
+                    continue
+                if subpath is not None and nome != subpath:
+                    continue
+                if RECURSIVOS[nome]:
+                    entry['verificado'] = float('-inf')
+                else:
+                    del self._entries[base_dir]
+    
+    def stats(self):
+        """Retorna os contadores do inventário"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'files': sum(len(entry['arquivos']) for entry in self._entries.values()),
+                'ttl': self.ttl
+            }
+
+# Inventário único do processo
+cache = DirectoryInventory()
+
+def list_files(projeto, subpath):
+    """Lista os arquivos de 'processos' ou 'docs' de um projeto através do inventário do processo"""
+    return cache.list_files(projeto.caminho_diretorio, subpath)
+
+def invalidate(projeto_path, subpath=None):
+    """Antecipa a conferência da listagem de um projeto no inventário do processo"""
+    cache.invalidate(projeto_path, subpath)
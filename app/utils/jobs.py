@@ -0,0 +1,412 @@
+import os
+import json
+import time
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from app import db
+from app.models import Job, Log
+from app.utils import extract_pdfs, indice, inventario, origens, rename_paths, validacao
+from app.utils.eventos import progress_broker
+from app.utils.log_sink import BufferedLogSink
+from app.utils.metricas import NULL_METRICS, RunMetrics
+from app.utils.progresso import ProcessamentoCancelado
+
+# Intervalo mínimo (segundos) entre gravações do progresso de um job no banco
+PROGRESS_INTERVAL = 1.0
+
+# Intervalo mínimo (segundos) entre as consultas ao banco do pedido de cancelamento de um job
+# (pedidos feitos em outro processo: outro worker do servidor ou o job da linha de comando)
+CANCEL_CHECK_INTERVAL = 1.0
+
+def executar_processamento(projeto, renomear=True, extrair=True, callback=None,
+                           progress_callback=None, cancel_check=None, config=None, forcar=False, metrics=None,
+                           bloquear_invalidos=False):
+    """
+    Executa o processamento de um projeto (renomeação de caminhos e extração de PDFs)
+    
+    Args:
+        projeto (Projeto): Projeto a ser processado
+        renomear (bool): Se os caminhos devem ser renomeados no índice
+        extrair (bool): Se as páginas dos PDFs devem ser extraídas
+        callback (function): Função de callback para reportar progresso
+        progress_callback (function): Função chamada com (etapa, processados, total, item atual)
+        cancel_check (function): Função que retorna True quando o processamento deve ser interrompido
+        config (dict): Configuração da aplicação
+        forcar (bool): Se True, extrai novamente todos os documentos, mesmo os já atualizados
+        metrics (RunMetrics): Métricas da execução (tempo por etapa, páginas, bytes gravados)
+        bloquear_invalidos (bool): Se o processamento deve ser interrompido quando a validação encontrar problemas
+    
+    Returns:
+        str: Resumo do processamento
+    
+    Raises:
+        ProcessamentoCancelado: Se o cancelamento for solicitado durante a execução
+        ValueError: Se o índice estiver vazio, ou tiver problemas e bloquear_invalidos for True
+    """
+    callback = callback or (lambda msg, tipo='info': None)
+    progress_callback = progress_callback or (lambda etapa, atual, total, item=None: None)
+    config = config or {}
+    metrics = metrics or NULL_METRICS
+    resumo = []
+    
+    # Carregar o índice de matrículas do banco
+    with metrics.span('carregar_indice'):
+        indice.garantir_indice(projeto)
+        df = indice.carregar_dataframe(projeto)
+    if df.empty:
+        raise ValueError("O índice de matrículas do projeto está vazio")
+    
+    # Validar todas as linhas antes de iniciar: origens, intervalos de páginas e caminhos
+    if extrair:
+        with metrics.span('validar_indice'):
+            # PDFs copiados diretamente para a pasta ou alterados são indexados antes da validação
+            origens.source_indexer.sincronizar(projeto, inventario.list_files(projeto, 'processos'), aguardar=True)
+            source_index = origens.carregar_indice(projeto)
+            relatorio = validacao.validar_dataframe(df, projeto.caminho_diretorio, source_index,
+                                                    verificar_destino=not renomear)
+        if relatorio['linhas_invalidas']:
+            callback(f"Validação do índice: {relatorio['total_problemas']} problemas em "
+                     f"{relatorio['linhas_invalidas']} de {relatorio['total']} linhas", 'warning')
+            if bloquear_invalidos:
+                for problema in relatorio['problemas']:
+                    callback(f"Linha {problema['linha']} (Matrícula {problema['matricula']}): {problema['mensagem']}", 'error')
+                raise ValueError(f"Processamento bloqueado: a validação encontrou problemas em "
+                                 f"{relatorio['linhas_invalidas']} linhas do índice")
+    
+    # Processar renomeação de caminhos
+    if renomear:
+        # Garantir que o diretório docs existe
+        docs_dir = projeto.caminho_docs
+        if not os.path.exists(docs_dir):
+            os.makedirs(docs_dir)
+        
+        renamer = rename_paths.PathRenamer(
+            docs_dir,
+            callback,
+            progress_callback=lambda atual, total: progress_callback('renomear', atual, total),
+            cancel_check=cancel_check,
+            metrics=metrics
+        )
+        df = renamer.process_dataframe(df)
+        
+        # Gravar os novos caminhos no índice e atualizar a planilha exportada
+        with metrics.span('atualizar_indice'):
+            indice.atualizar_caminhos(projeto, df)
+        callback(f"Exportando planilha atualizada: {projeto.caminho_excel}", 'info')
+        with metrics.span('exportar_planilha'):
+            indice.exportar_excel(projeto)
+        resumo.append("Caminhos renomeados com sucesso no índice de matrículas")
+    
+    # Processar extração de PDFs
+    if extrair:
+        try:
+            stats = extract_pdfs.extract_from_dataframe(
+                df,
+                projeto.caminho_diretorio,
+                callback,
+                max_readers=config.get('EXTRACTION_MAX_READERS', extract_pdfs.DEFAULT_MAX_READERS),
+                progress_callback=lambda atual, total, item=None: progress_callback('extrair', atual, total, item),
+                cancel_check=cancel_check,
+                workers=config.get('EXTRACTION_WORKERS', 1),
+                force=forcar,
+                metrics=metrics,
+                mode=config.get('EXTRACTION_MODE', extract_pdfs.MODE_WRITER),
+                source_index=source_index,
+                dedup=config.get('EXTRACTION_DEDUP', 'hardlink')
+            )
+        finally:
+            # Os PDFs gravados aparecem na próxima listagem dos documentos extraídos
+            inventario.invalidate(projeto.caminho_diretorio, 'docs')
+        
+        if stats['success'] > 0 or stats.get('skipped'):
+            resumo.append(f"Extração concluída: {stats['success']} documentos extraídos com sucesso "
+                          f"({stats.get('shared', 0)} compartilhados reaproveitados), {stats['error']} erros, "
+                          f"{stats.get('skipped', 0)} já atualizados")
+        else:
+            resumo.append(f"Nenhum documento extraído com sucesso. {stats['error']} erros encontrados.")
+    
+    return ". ".join(resumo)
+
+class JobManager:
+    """
+    Fila de jobs de processamento executados em um pool local de threads
+    
+    Os jobs são persistidos na tabela `jobs`; ao iniciar, os jobs que estavam
+    na fila (ou em execução quando o servidor parou) são colocados novamente
+    na fila. Apenas um job por projeto é executado de cada vez.
+    """
+    
+    def __init__(self, app=None):
+        self.app = None
+        self._executor = None
+        self._lock = threading.Lock()
+        self._cancelamentos = set()
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """Registra o gerenciador na aplicação"""
+        self.app = app
+        self._executor = None
+        self._cancelamentos = set()
+        app.extensions['jobs'] = self
+        # O pool é iniciado na primeira requisição, para que o processo
+        # monitor do reloader do Flask não execute jobs
+        app.before_request(self.iniciar)
+    
+    def iniciar(self):
+        """Inicia o pool de workers e recoloca na fila os jobs pendentes"""
+        if self._executor is not None:
+            return
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.app.config.get('JOB_WORKERS', 2),
+                thread_name_prefix='job'
+            )
+        
+        with self.app.app_context():
+            # Jobs interrompidos por uma parada do servidor voltam para a fila
+            interrompidos = Job.query.filter_by(status=Job.EXECUTANDO).all()
+            for job in interrompidos:
+                job.status = Job.CANCELADO if job.cancelamento_solicitado else Job.PENDENTE
+            db.session.commit()
+            
+            pendentes = Job.query.filter_by(status=Job.PENDENTE).order_by(Job.id).all()
+            for job in pendentes:
+                self._executor.submit(self._executar, job.id)
+    
+    def job_ativo(self, projeto_id):
+        """Retorna o job pendente ou em execução do projeto, se houver"""
+        return Job.query.filter(
+            Job.projeto_id == projeto_id,
+            Job.status.in_(Job.ATIVOS)
+        ).order_by(Job.id).first()
+    
+    def criar(self, projeto, renomear=True, extrair=True, forcar=False, bloquear_invalidos=False):
+        """
+        Registra um novo job de processamento pendente, sem colocá-lo na fila
+        
+        Args:
+            projeto (Projeto): Projeto a ser processado
+            renomear (bool): Se os caminhos devem ser renomeados no índice
+            extrair (bool): Se as páginas dos PDFs devem ser extraídas
+            forcar (bool): Se todos os documentos devem ser extraídos novamente
+            bloquear_invalidos (bool): Se o job deve ser interrompido quando a validação do índice encontrar problemas
+        
+        Returns:
+            tuple: (job, criado) - se já houver um job ativo para o projeto,
+            ele é retornado com criado=False
+        """
+        with self._lock:
+            ativo = self.job_ativo(projeto.id)
+            if ativo is not None:
+                return ativo, False
+            
+            job = Job(projeto=projeto, renomear=renomear, extrair=extrair, forcar=forcar,
+                      bloquear_invalidos=bloquear_invalidos)
+            db.session.add(job)
+            db.session.add(Log(
+                projeto=projeto,
+                tipo='info',
+                mensagem='Processamento adicionado à fila'
+            ))
+            db.session.commit()
+        return job, True
+    
+    def submeter(self, projeto, renomear=True, extrair=True, forcar=False, bloquear_invalidos=False):
+        """
+        Coloca um novo job de processamento na fila
+        
+        Args:
+            projeto (Projeto): Projeto a ser processado
+            renomear (bool): Se os caminhos devem ser renomeados no índice
+            extrair (bool): Se as páginas dos PDFs devem ser extraídas
+            forcar (bool): Se todos os documentos devem ser extraídos novamente
+            bloquear_invalidos (bool): Se o job deve ser interrompido quando a validação do índice encontrar problemas
+        
+        Returns:
+            tuple: (job, criado) - se já houver um job ativo para o projeto,
+            ele é retornado com criado=False
+        """
+        self.iniciar()
+        
+        job, criado = self.criar(projeto, renomear, extrair, forcar, bloquear_invalidos)
+        if criado:
+            self._executor.submit(self._executar, job.id)
+        return job, criado
+    
+    def cancelar(self, job):
+        """
+        Solicita o cancelamento de um job
+        
+        O pedido é gravado no job (cancelamento_solicitado), de modo que chega
+        ao job em execução em qualquer processo; no processo atual, o job é
+        avisado imediatamente.
+        
+        Args:
+            job (Job): Job a ser cancelado
+        
+        Returns:
+            bool: True se o cancelamento foi registrado, False se o job já terminou
+        """
+        if not job.ativo:
+            return False
+        
+        job.cancelamento_solicitado = True
+        if job.status == Job.PENDENTE:
+            job.status = Job.CANCELADO
+            job.data_fim = datetime.utcnow()
+        else:
+            self._cancelamentos.add(job.id)
+        db.session.commit()
+        if job.status == Job.CANCELADO:
+            progress_broker.encerrar(job.id, job.to_dict())
+        return True
+    
+    def cancelamento_solicitado(self, job_id):
+        """Consulta no banco se o cancelamento do job foi solicitado (em uma conexão própria, fora da sessão atual)"""
+        with db.engine.connect() as conexao:
+            return bool(conexao.execute(
+                db.select(Job.cancelamento_solicitado).where(Job.id == job_id)
+            ).scalar())
+    
+    def _reservar(self, job_id):
+        """Marca o job como em execução, garantindo que seja executado uma única vez"""
+        outro = db.aliased(Job)
+        em_execucao = db.select(outro.id).where(
+            outro.projeto_id == Job.projeto_id,
+            outro.status == Job.EXECUTANDO
+        ).exists()
+        
+        resultado = db.session.execute(
+            db.update(Job)
+            .where(Job.id == job_id, Job.status == Job.PENDENTE, ~em_execucao)
+            .values(status=Job.EXECUTANDO, data_inicio=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return resultado.rowcount == 1
+    
+    def _executar(self, job_id):
+        """Executa um job no worker do pool"""
+        with self.app.app_context():
+            job = self.executar(job_id)
+            if job is None:
+                return
+            
+            # Executar jobs do mesmo projeto que aguardavam este terminar
+            pendentes = Job.query.filter_by(projeto_id=job.projeto_id, status=Job.PENDENTE).order_by(Job.id).all()
+            for pendente in pendentes:
+                self._executor.submit(self._executar, pendente.id)
+    
+    def executar(self, job_id, config=None):
+        """
+        Executa um job pendente na thread atual (requer um contexto da aplicação)
+        
+        Args:
+            job_id (int): ID do job
+            config (dict): Configuração usada no processamento (padrão: a da aplicação)
+        
+        Returns:
+            Job: Job concluído, ou None se ele já estiver em execução ou tiver sido cancelado
+        """
+        config = config if config is not None else self.app.config
+        if not self._reservar(job_id):
+            return None
+        
+        job = db.session.get(Job, job_id)
+        projeto = job.projeto
+        
+        # Métricas de tempo e volume da execução
+        metrics = RunMetrics(enabled=config.get('PROCESSING_METRICS', True))
+        
+        # Logs gravados em lote durante a execução; avisos e erros também
+        # são transmitidos imediatamente aos clientes conectados
+        log_sink = BufferedLogSink(
+            projeto.id,
+            flush_every=config.get('LOG_FLUSH_EVERY', 200),
+            flush_interval=config.get('LOG_FLUSH_INTERVAL_MS', 500) / 1000,
+            metrics=metrics
+        )
+        
+        def log_callback(mensagem, tipo='info'):
+            log_sink(mensagem, tipo)
+            if tipo != 'info':
+                progress_broker.log(job_id, mensagem, tipo)
+        
+        # Função de callback para registrar o progresso: transmitido a cada
+        # linha, gravado no banco no máximo uma vez por intervalo
+        ultima_gravacao = [0.0]
+        progress_broker.progresso(job_id, job.etapa, job.progresso, job.total)
+        
+        def progress_callback(etapa, atual, total, item=None):
+            progress_broker.progresso(job_id, etapa, atual, total, item)
+            agora = time.monotonic()
+            if atual < total and etapa == job.etapa and agora - ultima_gravacao[0] < PROGRESS_INTERVAL:
+                return
+            ultima_gravacao[0] = agora
+            job.etapa = etapa
+            job.progresso = atual
+            job.total = total
+            db.session.commit()
+        
+        ultima_verificacao = [0.0]
+        
+        def cancel_check():
+            # Cancelamento solicitado neste processo
+            if job_id in self._cancelamentos:
+                return True
+            # Cancelamento solicitado em outro processo, gravado no job
+            agora = time.monotonic()
+            if agora - ultima_verificacao[0] < CANCEL_CHECK_INTERVAL:
+                return False
+            ultima_verificacao[0] = agora
+            if self.cancelamento_solicitado(job_id):
+                self._cancelamentos.add(job_id)
+                return True
+            return False
+        
+        try:
+            job.mensagem = executar_processamento(
+                projeto,
+                renomear=job.renomear,
+                extrair=job.extrair,
+                callback=log_callback,
+                progress_callback=progress_callback,
+                cancel_check=cancel_check,
+                config=config,
+                forcar=job.forcar,
+                metrics=metrics,
+                bloquear_invalidos=bool(job.bloquear_invalidos)
+            )
+            job.status = Job.CONCLUIDO
+            log_callback(f"Processamento concluído. {job.mensagem}", 'info')
+        
+        except ProcessamentoCancelado:
+            db.session.rollback()
+            job.status = Job.CANCELADO
+            job.mensagem = "Processamento cancelado pelo usuário"
+            log_callback(job.mensagem, 'warning')
+        
+        except Exception as e:
+            db.session.rollback()
+            job.status = Job.ERRO
+            job.mensagem = str(e)
+            log_callback(f"Erro no processamento: {str(e)}", 'error')
+        
+        finally:
+            job.data_fim = datetime.utcnow()
+            log_sink.flush()
+            if metrics.enabled:
+                job.metricas = json.dumps(metrics.resumo(), ensure_ascii=False)
+            db.session.commit()
+            self._cancelamentos.discard(job_id)
+            progress_broker.encerrar(job_id, job.to_dict())
+        
+        return job
+
+# Instância única, registrada na aplicação em create_app
+job_manager = JobManager()
@@ -0,0 +1,61 @@
+import time
+from datetime import datetime
+from app import db
+from app.models import Log
+from app.utils.metricas import NULL_METRICS
+
+class BufferedLogSink:
+    """
+    Callback de log que acumula as mensagens e as grava em lote na tabela `logs`
+    
+    As mensagens são gravadas com um único INSERT em lote a cada `flush_every`
+    mensagens ou quando `flush_interval` segundos se passaram desde a última
+    gravação. Usado como gerenciador de contexto, garante a gravação do que
+    restar no buffer ao final, mesmo em caso de erro.
+    """
+    
+    def __init__(self, projeto_id, flush_every=200, flush_interval=0.5, metrics=None):
+        """
+        Inicializa o buffer de logs
+        
+        Args:
+            projeto_id (int): ID do projeto ao qual os logs pertencem
+            flush_every (int): Número de mensagens que dispara a gravação
+            flush_interval (float): Intervalo máximo (segundos) entre gravações
+            metrics (RunMetrics): Métricas da execução (tempo gasto gravando os logs)
+        """
+        self.projeto_id = projeto_id
+        self.flush_every = max(1, flush_every)
+        self.flush_interval = flush_interval
+        self.metrics = metrics or NULL_METRICS
+        self._buffer = []
+        self._ultima_gravacao = time.monotonic()
+    
+    def __call__(self, mensagem, tipo='info'):
+        self._buffer.append({
+            'projeto_id': self.projeto_id,
+            'tipo': tipo,
+            'mensagem': mensagem,
+            'data_hora': datetime.utcnow()
+        })
+        if (len(self._buffer) >= self.flush_every
+                or time.monotonic() - self._ultima_gravacao >= self.flush_interval):
+            self.flush()
+    
+    def flush(self):
+        """Grava as mensagens pendentes em um único INSERT em lote"""
+        self._ultima_gravacao = time.monotonic()
+        if not self._buffer:
+            return
+        
+        registros, self._buffer = self._buffer, []
+        with self.metrics.span('gravar_logs'):
+            db.session.execute(db.insert(Log), registros)
+            db.session.commit()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+        return False
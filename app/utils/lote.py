@@ -0,0 +1,144 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from app import db
+from app.models import Job, Projeto
+from app.utils.jobs import job_manager
+
+# Status do projeto no resumo do lote quando nenhum job foi executado
+IGNORADO = 'ignorado'
+
+def distribuir_workers(total, por_projeto):
+    """
+    Divide o orçamento de processos de extração entre os projetos
+    
+    Args:
+        total (int): Processos de extração disponíveis para o lote inteiro
+        por_projeto (int): Limite de processos de extração de cada projeto
+    
+    Returns:
+        tuple: (projetos processados simultaneamente, processos de extração por projeto)
+    """
+    total = max(1, total)
+    por_projeto = max(1, min(por_projeto, total))
+    return total // por_projeto, por_projeto
+
+def _processar_projeto(app, projeto_id, config, opcoes, jobs_ativos):
+    """Cria e executa o job de um projeto na thread atual"""
+    with app.app_context():
+        projeto = db.session.get(Projeto, projeto_id)
+        if projeto is None:
+            return {'projeto_id': projeto_id, 'nome': None, 'job_id': None, 'status': Job.ERRO,
+                    'mensagem': 'Projeto não encontrado', 'duracao': None, 'metricas': None}
+        
+        resultado = {'projeto_id': projeto.id, 'nome': projeto.nome, 'job_id': None, 'status': IGNORADO,
+                     'mensagem': None, 'duracao': None, 'metricas': None}
+        job, criado = job_manager.criar(projeto, **opcoes)
+        resultado['job_id'] = job.id
+        if not criado:
+            resultado['mensagem'] = f'O projeto já tem um job {job.status} (#{job.id})'
+            return resultado
+        
+        jobs_ativos.add(job.id)
+        try:
+            executado = job_manager.executar(job.id, config)
+        finally:
+            jobs_ativos.discard(job.id)
+        if executado is None:
+            resultado['mensagem'] = 'O job foi cancelado ou já está em execução em outro processo'
+            return resultado
+        
+        resultado.update(
+            status=executado.status,
+            mensagem=executado.mensagem,
+            duracao=(executado.data_fim - executado.data_inicio).total_seconds() if executado.data_inicio else None,
+            metricas=executado.resumo_metricas
+        )
+        return resultado
+
+def processar_lote(app, projeto_ids, workers=None, workers_por_projeto=None, renomear=True, extrair=True,
+                   forcar=False, bloquear_invalidos=False, callback=None):
+    """
+    Processa vários projetos com um orçamento único de processos de extração
+    
+    Cada projeto é processado por um job registrado na tabela `jobs` (com
+    logs e métricas visíveis na página do projeto), na thread do lote e não
+    na fila do servidor. Os projetos são executados simultaneamente até que
+    o orçamento de processos seja usado: com 8 processos e no máximo 4 por
+    projeto, 2 projetos de cada vez. Um projeto que já tem um job ativo é
+    ignorado. Uma interrupção (Ctrl+C) cancela os jobs em andamento.
+    
+    Args:
+        app (Flask): Aplicação
+        projeto_ids (list): IDs dos projetos, na ordem de processamento
+        workers (int): Processos de extração do lote inteiro (padrão: número de CPUs)
+        workers_por_projeto (int): Limite de processos de extração por projeto (padrão: EXTRACTION_WORKERS)
+        renomear (bool): Se os caminhos devem ser renomeados no índice
+        extrair (bool): Se as páginas dos PDFs devem ser extraídas
+        forcar (bool): Se todos os documentos devem ser extraídos novamente
+        bloquear_invalidos (bool): Se um projeto com problemas no índice deve ser interrompido
+        callback (function): Função chamada com o resultado de cada projeto concluído
+    
+    Returns:
+        list: Resultado de cada projeto (projeto_id, nome, job_id, status, mensagem, duracao, metricas), na ordem informada
+    """
+    callback = callback or (lambda resultado: None)
+    simultaneos, por_projeto = distribuir_workers(
+        workers or os.cpu_count() or 1,
+        workers_por_projeto or app.config.get('EXTRACTION_WORKERS', 1)
+    )
+    config = dict(app.config, EXTRACTION_WORKERS=por_projeto)
+    opcoes = {'renomear': renomear, 'extrair': extrair, 'forcar': forcar, 'bloquear_invalidos': bloquear_invalidos}
+    
+    jobs_ativos = set()
+    resultados = {}
+    futures = {}
+    executor = ThreadPoolExecutor(max_workers=min(simultaneos, len(projeto_ids)) or 1, thread_name_prefix='lote')
+    try:
+        futures = {
+            executor.submit(_processar_projeto, app, projeto_id, config, opcoes, jobs_ativos): projeto_id
+            for projeto_id in projeto_ids
+        }
+        for future in as_completed(futures):
+            resultado = future.result()
+            resultados[futures[future]] = resultado
+            callback(resultado)
+    except KeyboardInterrupt:
+        for future in futures:
+            future.cancel()
+        with app.app_context():
+            for job_id in list(jobs_ativos):
+                job = db.session.get(Job, job_id)
+                if job is not None:
+                    job_manager.cancelar(job)
+        raise
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    
+    return [resultados[projeto_id] for projeto_id in projeto_ids if projeto_id in resultados]
+
+def resumir_lote(resultados):
+    """
+    Combina os resultados dos projetos de um lote
+    
+    Args:
+        resultados (list): Resultados de processar_lote
+    
+    Returns:
+        dict: Projetos por status, duração somada e contadores somados (linhas, páginas, bytes, reaproveitados)
+    """
+    resumo = {
+        'projetos': len(resultados),
+        'status': {},
+        'duracao': 0.0,
+        'linhas_extraidas': 0,
+        'paginas': 0,
+        'bytes_escritos': 0,
+        'documentos_reaproveitados': 0
+    }
+    for resultado in resultados:
+        resumo['status'][resultado['status']] = resumo['status'].get(resultado['status'], 0) + 1
+        resumo['duracao'] += resultado['duracao'] or 0
+        contadores = (resultado['metricas'] or {}).get('contadores', {})
+        for contador in ('linhas_extraidas', 'paginas', 'bytes_escritos', 'documentos_reaproveitados'):
+            resumo[contador] += contadores.get(contador, 0)
+    return resumo
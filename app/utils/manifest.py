@@ -0,0 +1,210 @@
+import os
+import json
+import hashlib
+
+# Nome do arquivo de manifesto, gravado no diretório do projeto
+MANIFEST_NAME = '.manifest_extracao.json'
+
+# Sufixo do diário do manifesto: uma linha por arquivo registrado desde a última gravação
+JOURNAL_SUFFIX = '.journal'
+
+class ExtractionManifest:
+    def __init__(self, path):
+        """
+        Inicializa o manifesto de extração
+        
+        O manifesto registra, para cada arquivo extraído, o tamanho e a data de
+        modificação do PDF de origem, o intervalo de páginas e o hash do arquivo
+        gerado, permitindo que uma nova execução ignore as linhas cujo resultado
+        já está atualizado.
+        
+        Cada registro também é acrescentado a um diário (JOURNAL_SUFFIX) no
+        momento em que a linha termina; `save` grava o manifesto completo e
+        apaga o diário. Se a execução for interrompida, o diário é aplicado na
+        próxima carga e os arquivos registrados nele (`recovered`) são
+        conferidos pelo hash antes de serem aproveitados.
+        
+        Args:
+            path (str): Caminho do arquivo de manifesto
+        """
+        self.path = path
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.entries = {}
+        self.recovered = set()
+        self._journal = None
+        self._source_stats = {}
+        self.load()
+    
+    @classmethod
+    def for_project(cls, projeto_path):
+        """Retorna o manifesto do projeto informado"""
+        return cls(os.path.join(projeto_path, MANIFEST_NAME))
+    
+    def load(self):
+        """Carrega o manifesto do disco (um manifesto ilegível é descartado) e aplica o diário, se houver"""
+        self.entries = {}
+        self.recovered = set()
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f).get('arquivos', {})
+            except (OSError, ValueError):
+                self.entries = {}
+        self._replay_journal()
+    
+    def _replay_journal(self):
+        """Aplica os registros do diário deixado por uma execução interrompida"""
+        try:
+            f = open(self.journal_path, 'r', encoding='utf-8')
+        except OSError:
+            return
+        with f:
+            for linha in f:
+                try:
+                    registro = json.loads(linha)
+                except ValueError:
+                    # Última linha gravada pela metade
+                    break
+                output_path = registro['arquivo']
+                if registro.get('entrada') is None:
+                    self.entries.pop(output_path, None)
+                    self.recovered.discard(output_path)
+                else:
+                    self.entries[output_path] = registro['entrada']
+                    self.recovered.add(output_path)
+    
+    def _append_journal(self, output_path, entry):
+        """Acrescenta um registro ao diário (entry=None para um arquivo descartado)"""
+        if self._journal is None:
+            self._journal = open(self.journal_path, 'a', encoding='utf-8')
+        self._journal.write(json.dumps({'arquivo': output_path, 'entrada': entry}, ensure_ascii=False) + '\n')
+        self._journal.flush()
+    
+    def save(self):
+        """Grava o manifesto no disco de forma atômica e apaga o diário"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'versao': 1, 'arquivos': self.entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        try:
+            os.remove(self.journal_path)
+        except FileNotFoundError:
+            pass
+        self.recovered = set()
+    
+    def source_stat(self, input_pdf):
+        """
+        Retorna (tamanho, mtime_ns) do PDF de origem, consultando o disco uma vez por volume
+        
+        Args:
+            input_pdf (str): Caminho do PDF de origem
+        
+        Returns:
+            tuple: (tamanho, mtime_ns) ou None se o arquivo não existir
+        """
+        if input_pdf not in self._source_stats:
+            try:
+                stats = os.stat(input_pdf)
+                self._source_stats[input_pdf] = (stats.st_size, stats.st_mtime_ns)
+            except OSError:
+                self._source_stats[input_pdf] = None
+        return self._source_stats[input_pdf]
+    
+    def is_current(self, output_path, input_pdf, start_page, end_page):
+        """
+        Verifica se o arquivo extraído está atualizado em relação à origem
+        
+        Args:
+            output_path (str): Caminho do arquivo extraído
+            input_pdf (str): Caminho do PDF de origem
+            start_page (int): Página inicial
+            end_page (int): Página final
+        
+        Returns:
+            bool: True se a extração pode ser ignorada (arquivos recuperados do diário
+            também precisam ter o mesmo hash registrado)
+        """
+        entry = self.entries.get(output_path)
+        if entry is None:
+            return False
+        
+        source = self.source_stat(input_pdf)
+        if source is None:
+            return False
+        
+        if (entry['origem'] != input_pdf
+                or entry['paginas'] != [start_page, end_page]
+                or entry['origem_tamanho'] != source[0]
+                or entry['origem_mtime_ns'] != source[1]):
+            return False
+        
+        try:
+            stats = os.stat(output_path)
+        except OSError:
+            return False
+        if stats.st_size != entry['tamanho'] or stats.st_mtime_ns != entry['mtime_ns']:
+            return False
+        
+        if output_path in self.recovered:
+            try:
+                if file_sha256(output_path) != entry['sha256']:
+                    return False
+            except OSError:
+                return False
+            self.recovered.discard(output_path)
+        return True
+    
+    def record(self, output_path, input_pdf, start_page, end_page, sha256=None):
+        """
+        Registra um arquivo recém-extraído
+        
+        Args:
+            output_path (str): Caminho do arquivo extraído
+            input_pdf (str): Caminho do PDF de origem
+            start_page (int): Página inicial
+            end_page (int): Página final
+            sha256 (str): Hash do arquivo, se já conhecido (ex: cópia de outro arquivo registrado)
+        """
+        # A origem pode ter sido substituída desde a última consulta
+        self._source_stats.pop(input_pdf, None)
+        source = self.source_stat(input_pdf)
+        stats = os.stat(output_path)
+        
+        entry = self.entries[output_path] = {
+            'origem': input_pdf,
+            'paginas': [start_page, end_page],
+            'origem_tamanho': source[0] if source else None,
+            'origem_mtime_ns': source[1] if source else None,
+            'tamanho': stats.st_size,
+            'mtime_ns': stats.st_mtime_ns,
+            'sha256': sha256 or file_sha256(output_path)
+        }
+        self.recovered.discard(output_path)
+        self._append_journal(output_path, entry)
+    
+    def discard(self, output_path):
+        """Remove um arquivo do manifesto"""
+        self.recovered.discard(output_path)
+        if self.entries.pop(output_path, None) is not None:
+            self._append_journal(output_path, None)
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """
+    Calcula o hash SHA-256 de um arquivo
+    
+    Args:
+        path (str): Caminho do arquivo
+        chunk_size (int): Tamanho dos blocos lidos
+    
+    Returns:
+        str: Hash em hexadecimal
+    """
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
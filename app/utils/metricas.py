@@ -0,0 +1,317 @@
+import re
+import sys
+import time
+import heapq
+import threading
+from contextlib import nullcontext
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:  # Amostragem da memória sem /proc (opcional)
+    psutil = None
+
+# Descrição das etapas medidas, exibida no resumo do processamento
+ETAPAS = {
+    'carregar_indice': 'Carregar índice do banco',
+    'validar_indice': 'Validar origens e intervalos de páginas',
+    'ler_planilha': 'Ler planilha (pd.read_excel)',
+    'renomear_compartilhados': 'Detectar documentos compartilhados',
+    'renomear_componentes': 'Padronizar matrículas, tipos e datas',
+    'renomear_caminhos': 'Montar caminhos',
+    'atualizar_indice': 'Gravar caminhos no índice',
+    'exportar_planilha': 'Exportar planilha',
+    'verificar_manifesto': 'Verificar arquivos atualizados',
+    'criar_diretorios': 'Criar diretórios',
+    'abrir_pdf': 'Abrir PDFs de origem',
+    'montar_paginas': 'Copiar páginas (PdfWriter.add_page)',
+    'gravar_pdf': 'Gravar PDFs (PdfWriter.write)',
+    'copiar_objetos': 'Gravar PDFs por cópia direta dos objetos',
+    'reaproveitar_compartilhados': 'Gravar documentos compartilhados (hardlink/reflink/cópia)',
+    'registrar_manifesto': 'Registrar no manifesto (hash)',
+    'gravar_manifesto': 'Gravar manifesto',
+    'gravar_logs': 'Gravar logs no banco',
+}
+
+# Contexto vazio compartilhado, usado quando as métricas estão desativadas
+_SEM_MEDICAO = nullcontext()
+
+# Intervalo (segundos) entre as amostras de memória quando o pico não pode ser lido do sistema
+INTERVALO_AMOSTRA = 0.5
+
+# Escopo do pico de memória informado no resumo
+ESCOPO_EXECUCAO = 'execucao'
+ESCOPO_PROCESSO = 'processo'
+
+def _status_kb(campo):
+    """Lê um campo de /proc/self/status (Linux), em bytes, ou None se não disponível"""
+    try:
+        with open('/proc/self/status') as f:
+            encontrado = re.search(rf'^{campo}:\s+(\d+) kB', f.read(), re.MULTILINE)
+    except OSError:
+        return None
+    return int(encontrado.group(1)) * 1024 if encontrado else None
+
+def _maxrss(quem):
+    if resource is None:
+        return None
+    pico = resource.getrusage(quem).ru_maxrss
+    # ru_maxrss é informado em bytes no macOS e em kilobytes no Linux
+    return pico if sys.platform == 'darwin' else pico * 1024
+
+def reset_peak_rss():
+    """
+    Zera o pico de memória residente do processo atual (Linux: /proc/self/clear_refs)
+    
+    Returns:
+        bool: True se o pico foi zerado; a partir daí, peak_rss informa o pico desde esta chamada
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        return False
+    return _status_kb('VmHWM') is not None
+
+def current_rss():
+    """Retorna a memória residente (RSS) atual do processo, em bytes, ou None se não disponível"""
+    atual = _status_kb('VmRSS')
+    if atual is None and psutil is not None:
+        atual = psutil.Process().memory_info().rss
+    return atual
+
+def peak_rss():
+    """
+    Retorna o pico de memória residente (RSS) do processo atual, em bytes
+    
+    Returns:
+        int: Pico de RSS desde o início do processo ou desde o último reset_peak_rss,
+        ou None se não disponível (Windows)
+    """
+    pico = _status_kb('VmHWM')
+    if pico is None and resource is not None:
+        pico = _maxrss(resource.RUSAGE_SELF)
+    return pico
+
+def children_peak_rss():
+    """Retorna o maior pico de RSS entre os processos filhos já encerrados, em bytes, ou None"""
+    return _maxrss(resource.RUSAGE_CHILDREN) if resource is not None else None
+
+class _AmostradorMemoria(threading.Thread):
+    """Registra o maior RSS observado enquanto a execução não termina (sistemas sem /proc)"""
+    
+    def __init__(self):
+        super().__init__(name='amostra-memoria', daemon=True)
+        self.pico = current_rss() or 0
+        self._parar = threading.Event()
+    
+    def run(self):
+        while not self._parar.wait(INTERVALO_AMOSTRA):
+            self.pico = max(self.pico, current_rss() or 0)
+    
+    def parar(self):
+        self._parar.set()
+        self.pico = max(self.pico, current_rss() or 0)
+        return self.pico
+
+class _Span:
+    __slots__ = ('metricas', 'etapa', 'inicio')
+    
+    def __init__(self, metricas, etapa):
+        self.metricas = metricas
+        self.etapa = etapa
+    
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metricas.add_time(self.etapa, time.perf_counter() - self.inicio)
+        return False
+
+class RunMetrics:
+    """
+    Métricas de uma execução de processamento
+    
+    Acumula o tempo gasto em cada etapa (`span`), contadores (linhas, páginas,
+    bytes gravados) e as linhas mais lentas. Desativada, cada chamada retorna
+    imediatamente, sem medir nada.
+    """
+    
+    def __init__(self, enabled=True, max_slowest=10):
+        """
+        Inicializa as métricas
+        
+        Args:
+            enabled (bool): Se as métricas devem ser coletadas
+            max_slowest (int): Número de linhas mais lentas mantidas no resumo
+        """
+        self.enabled = enabled
+        self.max_slowest = max_slowest
+        self.inicio = time.perf_counter()
+        self.etapas = {}
+        self.contadores = {}
+        self._mais_lentas = []
+        self._pico_workers = None
+        self._amostrador = None
+        self._pico = None
+        self._pico_filhos_inicio = None
+        self.escopo_memoria = ESCOPO_PROCESSO
+        if enabled:
+            self._iniciar_memoria()
+    
+    def _iniciar_memoria(self):
+        """
+        Passa a medir o pico de memória desta execução
+        
+        No Linux, o pico do processo (VmHWM) é zerado no início da execução;
+        em outros sistemas, com o psutil instalado, o RSS é amostrado durante a
+        execução. Sem nenhum dos dois, o pico informado é o do processo desde o
+        seu início (escopo 'processo'). Execuções simultâneas no mesmo processo
+        (jobs em threads) compartilham o pico.
+        """
+        self._pico_filhos_inicio = children_peak_rss()
+        if reset_peak_rss():
+            self.escopo_memoria = ESCOPO_EXECUCAO
+        elif current_rss() is not None:
+            self._amostrador = _AmostradorMemoria()
+            self._amostrador.start()
+            self.escopo_memoria = ESCOPO_EXECUCAO
+    
+    def pico_memoria(self):
+        """Retorna o pico de memória desta execução (ou do processo, ver escopo_memoria), em bytes"""
+        if self._amostrador is not None:
+            if self._pico is None:
+                self._pico = self._amostrador.parar()
+            return self._pico
+        return peak_rss()
+    
+    def _pico_filhos(self):
+        """Pico dos processos de extração encerrados durante esta execução (RUSAGE_CHILDREN)"""
+        pico = children_peak_rss()
+        if pico is None or self._pico_filhos_inicio is None or pico <= self._pico_filhos_inicio:
+            return None
+        return pico
+    
+    def span(self, etapa):
+        """
+        Mede o tempo de um bloco de código
+        
+        Args:
+            etapa (str): Nome da etapa (ver ETAPAS)
+        
+        Returns:
+            Gerenciador de contexto que acumula o tempo na etapa
+        """
+        if not self.enabled:
+            return _SEM_MEDICAO
+        return _Span(self, etapa)
+    
+    def add_time(self, etapa, segundos, chamadas=1):
+        """Acumula um tempo medido externamente em uma etapa"""
+        if not self.enabled:
+            return
+        total = self.etapas.get(etapa)
+        if total is None:
+            self.etapas[etapa] = [segundos, chamadas]
+        else:
+            total[0] += segundos
+            total[1] += chamadas
+    
+    def count(self, contador, valor=1):
+        """Incrementa um contador (ex: 'paginas', 'bytes_escritos')"""
+        if not self.enabled:
+            return
+        self.contadores[contador] = self.contadores.get(contador, 0) + valor
+    
+    def row(self, descricao, segundos):
+        """Registra o tempo de uma linha, mantendo apenas as mais lentas"""
+        if not self.enabled:
+            return
+        item = (segundos, descricao)
+        if len(self._mais_lentas) < self.max_slowest:
+            heapq.heappush(self._mais_lentas, item)
+        elif item > self._mais_lentas[0]:
+            heapq.heapreplace(self._mais_lentas, item)
+    
+    def to_dict(self):
+        """Retorna os dados brutos (serializáveis), para combinar com as métricas de outro processo"""
+        return {
+            'etapas': {etapa: list(total) for etapa, total in self.etapas.items()},
+            'contadores': dict(self.contadores),
+            'mais_lentas': list(self._mais_lentas),
+            'pico_memoria': self.pico_memoria()
+        }
+    
+    def merge(self, dados):
+        """
+        Combina as métricas coletadas em outro processo
+        
+        Args:
+            dados (dict): Resultado de `to_dict` no outro processo
+        """
+        if not self.enabled or not dados:
+            return
+        for etapa, (segundos, chamadas) in dados['etapas'].items():
+            self.add_time(etapa, segundos, chamadas)
+        for contador, valor in dados['contadores'].items():
+            self.count(contador, valor)
+        for segundos, descricao in dados['mais_lentas']:
+            self.row(descricao, segundos)
+        pico = dados.get('pico_memoria')
+        if pico is not None:
+            self._pico_workers = max(pico, self._pico_workers or 0)
+    
+    def resumo(self):
+        """
+        Monta o resumo da execução
+        
+        O pico de memória é o desta execução (ver _iniciar_memoria) e o escopo
+        da medição é informado em 'pico_memoria_escopo'; o dos processos de
+        extração é o maior entre eles, medido em cada processo e pelo sistema
+        ao final (RUSAGE_CHILDREN).
+        
+        Returns:
+            dict: Duração, etapas (ordenadas pelo tempo), contadores, taxas, documentos compartilhados
+            reaproveitados, pico de memória e linhas mais lentas
+        """
+        duracao = time.perf_counter() - self.inicio
+        linhas = self.contadores.get('linhas_extraidas', 0)
+        paginas = self.contadores.get('paginas', 0)
+        
+        etapas = [
+            {
+                'etapa': etapa,
+                'descricao': ETAPAS.get(etapa, etapa),
+                'segundos': round(segundos, 4),
+                'chamadas': chamadas,
+                'percentual': round(100 * segundos / duracao, 1) if duracao else 0
+            }
+            for etapa, (segundos, chamadas) in sorted(self.etapas.items(), key=lambda item: -item[1][0])
+        ]
+        
+        return {
+            'duracao': round(duracao, 3),
+            'linhas_por_segundo': round(linhas / duracao, 1) if duracao and linhas else None,
+            'paginas_por_segundo': round(paginas / duracao, 1) if duracao and paginas else None,
+            'bytes_escritos': self.contadores.get('bytes_escritos', 0),
+            'documentos_reaproveitados': self.contadores.get('documentos_reaproveitados', 0),
+            'paginas_reaproveitadas': self.contadores.get('paginas_reaproveitadas', 0),
+            'bytes_reaproveitados': self.contadores.get('bytes_reaproveitados', 0),
+            'pico_memoria': self.pico_memoria(),
+            'pico_memoria_escopo': self.escopo_memoria,
+            'pico_memoria_workers': max(filter(None, (self._pico_workers, self._pico_filhos())), default=None),
+            'contadores': dict(self.contadores),
+            'etapas': etapas,
+            'linhas_mais_lentas': [
+                {'descricao': descricao, 'segundos': round(segundos, 4)}
+                for segundos, descricao in sorted(self._mais_lentas, reverse=True)
+            ]
+        }
+
+# Instância desativada, usada quando nenhuma métrica é informada
+NULL_METRICS = RunMetrics(enabled=False)
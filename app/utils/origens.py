@@ -0,0 +1,272 @@
+import os
+import json
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from app import db
+from app.models import ArquivoOrigem, Log
+from app.utils.extract_pdfs import open_source
+from app.utils.manifest import file_sha256
+from app.utils.page_index import index_pages
+
+def indexar_pdf(caminho):
+    """
+    Analisa um PDF de origem e monta o seu índice de páginas
+    
+    Args:
+        caminho (str): Caminho do PDF
+    
+    Returns:
+        dict: tamanho, mtime (ns), sha256, paginas, referencias, valido e mensagem (motivo da invalidade)
+    """
+    stat = os.stat(caminho)
+    resultado = {
+        'tamanho': stat.st_size,
+        'mtime': stat.st_mtime_ns,
+        'sha256': file_sha256(caminho),
+        'paginas': None,
+        'referencias': None,
+        'valido': False,
+        'mensagem': None
+    }
+    
+    mapa = None
+    try:
+        reader, mapa = open_source(caminho)
+        if reader.is_encrypted:
+            raise ValueError('PDF criptografado')
+        referencias = index_pages(reader)
+        if not referencias:
+            raise ValueError('PDF sem páginas')
+        # O conteúdo de cada página deve poder ser lido (detecta objetos corrompidos ou ausentes)
+        for numero, pagina in enumerate(reader.pages, 1):
+            conteudo = pagina.get('/Contents')
+            if conteudo is not None and conteudo.get_object() is None:
+                raise ValueError(f'conteúdo da página {numero} ausente')
+        resultado.update(paginas=len(referencias), referencias=referencias, valido=True)
+    except Exception as e:
+        resultado['mensagem'] = str(e) or e.__class__.__name__
+    finally:
+        if mapa is not None:
+            mapa.close()
+    return resultado
+
+def carregar_indice(projeto):
+    """
+    Carrega o índice de páginas dos PDFs de origem já indexados do projeto
+    
+    Args:
+        projeto (Projeto): Projeto
+    
+    Returns:
+        dict: Índice de cada PDF (ver ArquivoOrigem.entrada_indice), por nome de arquivo
+    """
+    arquivos = projeto.arquivos_origem.filter(ArquivoOrigem.status != ArquivoOrigem.PENDENTE).all()
+    return {arquivo.nome: arquivo.entrada_indice() for arquivo in arquivos}
+
+class SourceIndexer:
+    """
+    Indexação em segundo plano dos PDFs de origem enviados aos projetos
+    
+    Cada PDF enviado é analisado uma vez: número de páginas, referência e
+    posição de cada página, hash e validade são gravados na tabela
+    `arquivos_origem`. A extração usa esse índice para validar os intervalos
+    e localizar as páginas sem analisar o volume novamente, e um arquivo
+    corrompido é informado logo após o envio.
+    """
+    
+    def __init__(self, app=None):
+        self.app = None
+        self._executor = None
+        self._lock = threading.Lock()
+        self._agendados = set()
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """Registra o indexador na aplicação"""
+        self.app = app
+        self._executor = None
+        self._agendados = set()
+        app.extensions['origens'] = self
+        # Assim como a fila de jobs, o pool é iniciado na primeira requisição
+        app.before_request(self.iniciar)
+    
+    def iniciar(self):
+        """Inicia o pool de indexação e recoloca na fila os arquivos ainda não indexados"""
+        if self._executor is not None:
+            return
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.app.config.get('SOURCE_INDEX_WORKERS', 1),
+                thread_name_prefix='indexacao'
+            )
+        
+        with self.app.app_context():
+            pendentes = ArquivoOrigem.query.filter_by(status=ArquivoOrigem.PENDENTE).all()
+            for arquivo in pendentes:
+                self._submeter(arquivo.id)
+    
+    def _submeter(self, arquivo_id):
+        with self._lock:
+            if arquivo_id in self._agendados:
+                return
+            self._agendados.add(arquivo_id)
+        self._executor.submit(self._indexar, arquivo_id)
+    
+    def agendar(self, projeto, nome, aguardar=False):
+        """
+        Coloca um PDF da pasta de processos na fila de indexação
+        
+        Args:
+            projeto (Projeto): Projeto
+            nome (str): Nome do arquivo na pasta de processos
+            aguardar (bool): Se o arquivo deve ser indexado na thread atual, antes de retornar
+        
+        Returns:
+            ArquivoOrigem: Registro do arquivo (pendente, ou já indexado se aguardar), ou None se não for um PDF
+        """
+        if not nome.lower().endswith('.pdf'):
+            return None
+        self.iniciar()
+        
+        arquivo = projeto.arquivos_origem.filter_by(nome=nome).first()
+        if arquivo is None:
+            arquivo = ArquivoOrigem(projeto=projeto, nome=nome)
+            db.session.add(arquivo)
+        arquivo.status = ArquivoOrigem.PENDENTE
+        arquivo.mensagem = None
+        db.session.commit()
+        
+        if aguardar:
+            self._indexar_agora(arquivo.id)
+            db.session.refresh(arquivo)
+        else:
+            self._submeter(arquivo.id)
+        return arquivo
+    
+    def _indexar_agora(self, arquivo_id):
+        """Indexa um arquivo na thread atual, se ele já não estiver na fila do pool"""
+        with self._lock:
+            if arquivo_id in self._agendados:
+                return
+            self._agendados.add(arquivo_id)
+        self._indexar(arquivo_id)
+    
+    def consultar(self, projeto, arquivos):
+        """
+        Associa a cada arquivo listado da pasta de processos o seu índice gravado, sem gravar nada
+        
+        Usado nas páginas do projeto: arquivos ainda não indexados (ex: copiados
+        diretamente para a pasta) ou alterados desde a indexação ficam sem
+        índice até o próximo envio, validação ou processamento (ver sincronizar).
+        
+        Args:
+            projeto (Projeto): Projeto
+            arquivos (list): Arquivos da pasta de processos (ver inventario.list_files)
+        
+        Returns:
+            dict: Registro de cada arquivo (ArquivoOrigem) com índice atualizado, por nome
+        """
+        registros = {arquivo.nome: arquivo for arquivo in projeto.arquivos_origem}
+        resultado = {}
+        for item in arquivos:
+            arquivo = registros.get(item['name'])
+            if arquivo is None:
+                continue
+            # Registros pendentes ainda estão na fila; os demais valem enquanto o arquivo não mudar
+            if arquivo.status != ArquivoOrigem.PENDENTE and (
+                    arquivo.mtime is None or arquivo.tamanho != item['size']
+                    or abs(arquivo.mtime - item['mtime'] * 1e9) > 1e6):
+                continue
+            resultado[item['name']] = arquivo
+        return resultado
+    
+    def sincronizar(self, projeto, arquivos, aguardar=False):
+        """
+        Associa a cada arquivo listado da pasta de processos o seu índice
+        
+        Arquivos sem índice, ou alterados desde a indexação (ex: copiados
+        diretamente para a pasta), são indexados; os registros de arquivos
+        removidos da pasta são descartados. Grava no banco: usado na validação
+        e no processamento, e não na exibição das páginas (ver consultar).
+        
+        Args:
+            projeto (Projeto): Projeto
+            arquivos (list): Arquivos da pasta de processos (ver inventario.list_files)
+            aguardar (bool): Se os arquivos devem ser indexados na thread atual (senão, em segundo plano)
+        
+        Returns:
+            dict: Registro de cada arquivo (ArquivoOrigem), por nome
+        """
+        registros = {arquivo.nome: arquivo for arquivo in projeto.arquivos_origem}
+        
+        nomes = {item['name'] for item in arquivos}
+        removidos = [arquivo for nome, arquivo in registros.items() if nome not in nomes]
+        if removidos:
+            for arquivo in removidos:
+                del registros[arquivo.nome]
+                db.session.delete(arquivo)
+            db.session.commit()
+        
+        for nome in nomes:
+            if not nome.lower().endswith('.pdf'):
+                continue
+            arquivo = registros.get(nome)
+            if arquivo is None:
+                registros[nome] = self.agendar(projeto, nome, aguardar)
+                continue
+            if arquivo.status == ArquivoOrigem.PENDENTE:
+                continue
+            try:
+                stat = os.stat(os.path.join(projeto.caminho_processos, nome))
+            except OSError:
+                continue
+            if arquivo.tamanho != stat.st_size or arquivo.mtime != stat.st_mtime_ns:
+                registros[nome] = self.agendar(projeto, nome, aguardar)
+        return registros
+    
+    def _indexar(self, arquivo_id):
+        """Indexa um arquivo no worker atual"""
+        with self.app.app_context():
+            try:
+                arquivo = db.session.get(ArquivoOrigem, arquivo_id)
+                if arquivo is None:
+                    return
+                try:
+                    resultado = indexar_pdf(arquivo.caminho)
+                except OSError:
+                    # Arquivo removido da pasta de processos
+                    db.session.delete(arquivo)
+                    db.session.commit()
+                    return
+                
+                arquivo.tamanho = resultado['tamanho']
+                arquivo.mtime = resultado['mtime']
+                arquivo.sha256 = resultado['sha256']
+                arquivo.paginas = resultado['paginas']
+                arquivo.referencias = json.dumps(resultado['referencias']) if resultado['referencias'] else None
+                arquivo.status = ArquivoOrigem.VALIDO if resultado['valido'] else ArquivoOrigem.INVALIDO
+                arquivo.mensagem = resultado['mensagem']
+                arquivo.data_indexacao = datetime.utcnow()
+                if resultado['valido']:
+                    db.session.add(Log(
+                        projeto_id=arquivo.projeto_id,
+                        tipo='info',
+                        mensagem=f'Arquivo "{arquivo.nome}" indexado: {arquivo.paginas} páginas'
+                    ))
+                else:
+                    db.session.add(Log(
+                        projeto_id=arquivo.projeto_id,
+                        tipo='error',
+                        mensagem=f'Arquivo "{arquivo.nome}" inválido: {arquivo.mensagem}'
+                    ))
+                db.session.commit()
+            finally:
+                with self._lock:
+                    self._agendados.discard(arquivo_id)
+
+# Instância única, registrada na aplicação em create_app
+source_indexer = SourceIndexer()
@@ -0,0 +1,281 @@
+import io
+import os
+import time
+import zlib
+import bisect
+import struct
+import hashlib
+import threading
+from collections import OrderedDict
+from app.models import Matricula
+from app.utils import inventario
+
+# Tamanho dos blocos lidos dos documentos ao montar o pacote
+BLOCO = 1024 * 1024
+
+# Número máximo de CRC-32 guardados em memória (um por documento)
+MAX_CRCS = 100000
+
+# Limites dos campos do formato ZIP original; acima deles são usados os campos ZIP64
+LIMITE_32 = 0xFFFFFFFF
+LIMITE_16 = 0xFFFF
+
+# Estruturas do formato ZIP (APPNOTE.TXT)
+LOCAL = struct.Struct('<IHHHHHIIIHH')
+CENTRAL = struct.Struct('<IHHHHHHIIIHHHHHII')
+FIM = struct.Struct('<IHHHHIIH')
+FIM_ZIP64 = struct.Struct('<IQHHIIQQQQ')
+LOCALIZADOR_ZIP64 = struct.Struct('<IIQI')
+
+# Versões do formato: 2.0 (entradas armazenadas) e 4.5 (ZIP64); criado em sistema Unix
+VERSAO = 20
+VERSAO_ZIP64 = 45
+SISTEMA_UNIX = 3 << 8
+
+# Nomes em UTF-8
+FLAG_UTF8 = 0x800
+
+# Tipos de segmento do pacote
+_LOCAL, _DADOS, _CENTRAL, _FIM = range(4)
+
+_crcs = OrderedDict()
+_crcs_lock = threading.Lock()
+
+def crc32_arquivo(caminho, tamanho, mtime):
+    """
+    Calcula o CRC-32 de um arquivo, reaproveitando o resultado enquanto o arquivo não mudar
+    
+    Args:
+        caminho (str): Caminho do arquivo
+        tamanho (int): Tamanho esperado do arquivo
+        mtime (float): Data de modificação do arquivo (identifica o conteúdo junto com o tamanho)
+    
+    Returns:
+        int: CRC-32 do conteúdo
+    
+    Raises:
+        OSError: Se o arquivo não tiver o tamanho esperado
+    """
+    chave = (caminho, tamanho, mtime)
+    with _crcs_lock:
+        if chave in _crcs:
+            _crcs.move_to_end(chave)
+            return _crcs[chave]
+    
+    crc = 0
+    lidos = 0
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(BLOCO), b''):
+            crc = zlib.crc32(bloco, crc)
+            lidos += len(bloco)
+    if lidos != tamanho:
+        raise OSError(f"Arquivo alterado durante a montagem do pacote: {caminho}")
+    
+    with _crcs_lock:
+        _crcs[chave] = crc
+        while len(_crcs) > MAX_CRCS:
+            _crcs.popitem(last=False)
+    return crc
+
+def _data_dos(mtime):
+    """Converte uma data de modificação para os campos (hora, data) do formato ZIP"""
+    data = time.localtime(mtime)
+    if data.tm_year < 1980:
+        return 0, (1 << 5) | 1
+    return (
+        (data.tm_hour << 11) | (data.tm_min << 5) | (data.tm_sec // 2),
+        ((data.tm_year - 1980) << 9) | (data.tm_mon << 5) | data.tm_mday
+    )
+
+class PacoteZip(io.RawIOBase):
+    def __init__(self, entradas):
+        """
+        Arquivo ZIP montado sob demanda a partir de arquivos do disco
+        
+        As entradas são armazenadas sem compressão, de modo que a posição de
+        cada byte do pacote é conhecida antes da leitura: o tamanho total é
+        informado de antemão e a leitura pode começar em qualquer posição
+        (downloads retomados com Range). Apenas os cabeçalhos são montados em
+        memória; o conteúdo é lido do disco à medida que o pacote é lido. O
+        CRC-32 de cada arquivo é calculado ao montar o seu cabeçalho (uma
+        leitura a mais do arquivo, em geral servida pelo cache do sistema) e
+        guardado para os downloads seguintes. Pacotes ou arquivos acima de
+        4 GB usam os campos ZIP64.
+        
+        Args:
+            entradas (list): Arquivos do pacote, como dicionários com 'nome' (caminho dentro
+                do pacote), 'caminho' (no disco), 'tamanho' e 'mtime'
+        """
+        super().__init__()
+        self._entradas = []
+        self._segmentos = []
+        posicao = 0
+        for entrada in entradas:
+            nome = entrada['nome'].replace(os.sep, '/').encode('utf-8')
+            entrada = dict(entrada, nome_bytes=nome, offset=posicao, zip64=entrada['tamanho'] >= LIMITE_32)
+            self._entradas.append(entrada)
+            posicao = self._adicionar(posicao, LOCAL.size + len(nome) + (20 if entrada['zip64'] else 0), _LOCAL, entrada)
+            posicao = self._adicionar(posicao, entrada['tamanho'], _DADOS, entrada)
+        
+        self._inicio_central = posicao
+        for entrada in self._entradas:
+            posicao = self._adicionar(posicao, CENTRAL.size + len(entrada['nome_bytes']) + self._tamanho_extra_central(entrada),
+                                      _CENTRAL, entrada)
+        self._tamanho_central = posicao - self._inicio_central
+        
+        self._zip64 = (len(self._entradas) >= LIMITE_16 or self._inicio_central >= LIMITE_32
+                       or self._tamanho_central >= LIMITE_32)
+        tamanho_fim = FIM.size + ((FIM_ZIP64.size + LOCALIZADOR_ZIP64.size) if self._zip64 else 0)
+        posicao = self._adicionar(posicao, tamanho_fim, _FIM, None)
+        
+        self.tamanho = posicao
+        self._inicios = [segmento[0] for segmento in self._segmentos]
+        self._posicao = 0
+        self._arquivo = None
+        self._cabecalho = None
+    
+    def _adicionar(self, posicao, tamanho, tipo, entrada):
+        if tamanho:
+            self._segmentos.append((posicao, tamanho, tipo, entrada))
+        return posicao + tamanho
+    
+    @staticmethod
+    def _tamanho_extra_central(entrada):
+        campos = (2 if entrada['zip64'] else 0) + (1 if entrada['offset'] >= LIMITE_32 else 0)
+        return 4 + 8 * campos if campos else 0
+    
+    @property
+    def etag(self):
+        """Identificador do conteúdo do pacote (nomes, tamanhos e datas dos arquivos)"""
+        sha = hashlib.sha1()
+        for entrada in self._entradas:
+            sha.update(entrada['nome_bytes'])
+            sha.update(f"\0{entrada['tamanho']}\0{entrada['mtime']!r}\0".encode())
+        return sha.hexdigest()
+    
+    @property
+    def mtime(self):
+        """Data de modificação do arquivo mais recente do pacote"""
+        return max((entrada['mtime'] for entrada in self._entradas), default=None)
+    
+    def _crc(self, entrada):
+        return crc32_arquivo(entrada['caminho'], entrada['tamanho'], entrada['mtime'])
+    
+    def _montar(self, tipo, entrada):
+        """Monta os bytes de um cabeçalho do pacote"""
+        if tipo == _FIM:
+            total = len(self._entradas)
+            fim = b''
+            if self._zip64:
+                fim += FIM_ZIP64.pack(0x06064b50, FIM_ZIP64.size - 12, SISTEMA_UNIX | VERSAO_ZIP64, VERSAO_ZIP64,
+                                      0, 0, total, total, self._tamanho_central, self._inicio_central)
+                fim += LOCALIZADOR_ZIP64.pack(0x07064b50, 0, self._inicio_central + self._tamanho_central, 1)
+            return fim + FIM.pack(0x06054b50, 0, 0, min(total, LIMITE_16), min(total, LIMITE_16),
+                                  min(self._tamanho_central, LIMITE_32), min(self._inicio_central, LIMITE_32), 0)
+        
+        hora, data = _data_dos(entrada['mtime'])
+        tamanho = LIMITE_32 if entrada['zip64'] else entrada['tamanho']
+        if tipo == _LOCAL:
+            versao = VERSAO_ZIP64 if entrada['zip64'] else VERSAO
+            extra = struct.pack('<HHQQ', 1, 16, entrada['tamanho'], entrada['tamanho']) if entrada['zip64'] else b''
+            return LOCAL.pack(0x04034b50, versao, FLAG_UTF8, 0, hora, data, self._crc(entrada), tamanho, tamanho,
+                              len(entrada['nome_bytes']), len(extra)) + entrada['nome_bytes'] + extra
+        
+        campos = [entrada['tamanho'], entrada['tamanho']] if entrada['zip64'] else []
+        if entrada['offset'] >= LIMITE_32:
+            campos.append(entrada['offset'])
+        extra = struct.pack(f'<HH{len(campos)}Q', 1, 8 * len(campos), *campos) if campos else b''
+        versao = VERSAO_ZIP64 if campos else VERSAO
+        return CENTRAL.pack(0x02014b50, SISTEMA_UNIX | versao, versao, FLAG_UTF8, 0, hora, data, self._crc(entrada),
+                            tamanho, tamanho, len(entrada['nome_bytes']), len(extra), 0, 0, 0, 0o100644 << 16,
+                            min(entrada['offset'], LIMITE_32)) + entrada['nome_bytes'] + extra
+    
+    def readable(self):
+        return True
+    
+    def seekable(self):
+        return True
+    
+    def tell(self):
+        return self._posicao
+    
+    def seek(self, posicao, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            posicao += self._posicao
+        elif whence == io.SEEK_END:
+            posicao += self.tamanho
+        if posicao < 0:
+            raise ValueError('Posição negativa')
+        self._posicao = posicao
+        return posicao
+    
+    def readinto(self, buffer):
+        if self._posicao >= self.tamanho or not len(buffer):
+            return 0
+        
+        indice = bisect.bisect_right(self._inicios, self._posicao) - 1
+        inicio, tamanho, tipo, entrada = self._segmentos[indice]
+        deslocamento = self._posicao - inicio
+        quantidade = min(len(buffer), tamanho - deslocamento)
+        
+        if tipo == _DADOS:
+            if self._arquivo is None or self._arquivo[0] is not entrada:
+                self._fechar_arquivo()
+                self._arquivo = (entrada, open(entrada['caminho'], 'rb'))
+            arquivo = self._arquivo[1]
+            arquivo.seek(deslocamento)
+            lidos = arquivo.readinto(memoryview(buffer)[:quantidade])
+            if not lidos:
+                raise OSError(f"Arquivo alterado durante a montagem do pacote: {entrada['caminho']}")
+            quantidade = lidos
+        else:
+            if self._cabecalho is None or self._cabecalho[0] != indice:
+                self._cabecalho = (indice, self._montar(tipo, entrada))
+            buffer[:quantidade] = self._cabecalho[1][deslocamento:deslocamento + quantidade]
+        
+        self._posicao += quantidade
+        return quantidade
+    
+    def _fechar_arquivo(self):
+        if self._arquivo is not None:
+            self._arquivo[1].close()
+            self._arquivo = None
+    
+    def close(self):
+        self._fechar_arquivo()
+        super().close()
+
+def documentos_do_projeto(projeto, pastas=None, compartilhados=False):
+    """
+    Seleciona os documentos extraídos de um projeto para um pacote ZIP
+    
+    Args:
+        projeto (Projeto): Projeto
+        pastas (list): Subdiretórios de 'docs' a incluir (ex: 'Livro2A_fls123_Mat4567'); se vazio, todos
+        compartilhados (bool): Se apenas os documentos compartilhados entre matrículas devem ser incluídos
+    
+    Returns:
+        list: Entradas de PacoteZip, com os caminhos relativos a 'docs', em ordem alfabética
+    """
+    projeto_dir = os.path.abspath(projeto.caminho_diretorio)
+    prefixos = tuple(pasta.strip('/') + '/' for pasta in pastas or [] if pasta.strip('/'))
+    
+    selecionados = None
+    if compartilhados:
+        selecionados = {
+            os.path.abspath(caminho)
+            for caminho, in Matricula.query.with_entities(Matricula.arquivo_extraido)
+            .filter_by(projeto_id=projeto.id, documento_compartilhado='Sim')
+            if caminho
+        }
+    
+    entradas = []
+    for arquivo in inventario.list_files(projeto, 'docs'):
+        nome = arquivo['path'].replace(os.sep, '/').split('/', 1)[1]
+        if prefixos and not nome.startswith(prefixos):
+            continue
+        caminho = os.path.join(projeto_dir, arquivo['path'])
+        if selecionados is not None and caminho not in selecionados:
+            continue
+        entradas.append({'nome': nome, 'caminho': caminho, 'tamanho': arquivo['size'], 'mtime': arquivo['mtime']})
+    return sorted(entradas, key=lambda entrada: entrada['nome'])
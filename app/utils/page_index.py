@@ -0,0 +1,97 @@
+from PyPDF2 import PageObject
+from PyPDF2.generic import IndirectObject, NameObject
+
+# Atributos que uma página herda dos nós da árvore de páginas quando não os define
+ATRIBUTOS_HERDADOS = ('/Resources', '/MediaBox', '/CropBox', '/Rotate')
+
+def index_pages(reader):
+    """
+    Monta o índice das páginas de um PDF: a referência e a posição no arquivo de cada página
+    
+    Args:
+        reader (PdfReader): Leitor do PDF
+    
+    Returns:
+        list: [número do objeto, geração, posição no arquivo (ou None, se em object stream)] por página
+    
+    Raises:
+        ValueError: Se alguma página não tiver referência indireta
+    """
+    referencias = []
+    for numero, pagina in enumerate(reader.pages, 1):
+        referencia = pagina.indirect_reference
+        if referencia is None:
+            raise ValueError(f'página {numero} sem referência indireta')
+        posicao = reader.xref.get(referencia.generation, {}).get(referencia.idnum)
+        referencias.append([referencia.idnum, referencia.generation, posicao])
+    return referencias
+
+def is_current(entrada, stat):
+    """
+    Verifica se o índice de páginas corresponde ao PDF de origem atual
+    
+    Args:
+        entrada (dict): Índice do PDF (ver ArquivoOrigem.entrada_indice)
+        stat (os.stat_result): Estado atual do PDF de origem
+    
+    Returns:
+        bool: True se o tamanho e a data de modificação não mudaram desde a indexação
+    """
+    return entrada.get('tamanho') == stat.st_size and entrada.get('mtime') == stat.st_mtime_ns
+
+def matches_reader(entrada, reader):
+    """Verifica se as páginas do índice estão nas mesmas posições na tabela xref do PDF aberto"""
+    for idnum, geracao, posicao in entrada['referencias']:
+        if reader.xref.get(geracao, {}).get(idnum) != posicao:
+            return False
+    return True
+
+class IndexedPages:
+    """
+    Páginas de um PDF de origem obtidas a partir do índice gravado no upload
+    
+    Equivale a `reader.pages`, mas cada página é lida diretamente pela sua
+    referência, sem percorrer a árvore de páginas inteira do volume. Os
+    atributos herdados (recursos, dimensões, rotação) são copiados dos nós
+    ancestrais da página, como faz o PdfReader.
+    """
+    
+    def __init__(self, reader, referencias):
+        """
+        Args:
+            reader (PdfReader): Leitor do PDF de origem
+            referencias (list): Referências das páginas (ver index_pages)
+        """
+        self.reader = reader
+        self.referencias = referencias
+    
+    def __len__(self):
+        return len(self.referencias)
+    
+    def __getitem__(self, numero):
+        idnum, geracao, _ = self.referencias[numero]
+        referencia = IndirectObject(idnum, geracao, self.reader)
+        dicionario = referencia.get_object()
+        pagina = PageObject(self.reader, referencia)
+        pagina.update(dicionario)
+        
+        herdados = [atributo for atributo in ATRIBUTOS_HERDADOS if atributo not in pagina]
+        nodo = dicionario.get('/Parent')
+        vistos = set()
+        while herdados and isinstance(nodo, IndirectObject) and nodo.idnum not in vistos:
+            vistos.add(nodo.idnum)
+            nodo = nodo.get_object()
+            for atributo in list(herdados):
+                if atributo in nodo:
+                    pagina[NameObject(atributo)] = nodo.raw_get(atributo)
+                    herdados.remove(atributo)
+            nodo = nodo.get('/Parent')
+        return pagina
+    
+    def __iter__(self):
+        for numero in range(len(self.referencias)):
+            yield self[numero]
+    
+    def references(self):
+        """Retorna as referências (número do objeto, geração) das páginas, na ordem do documento"""
+        return [(idnum, geracao) for idnum, geracao, _ in self.referencias]
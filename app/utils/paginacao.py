@@ -0,0 +1,105 @@
+# Tamanho padrão e máximo de uma página de resultados
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 500
+
+def parametros(args, colunas, ordem_padrao, direcao_padrao='asc'):
+    """
+    Lê os parâmetros de paginação, ordenação e filtro de uma requisição
+    
+    Args:
+        args (dict): Parâmetros da requisição (request.args)
+        colunas (iterable): Colunas aceitas para ordenação
+        ordem_padrao (str): Coluna usada quando nenhuma (ou uma inválida) é informada
+        direcao_padrao (str): Direção padrão da ordenação ('asc' ou 'desc')
+    
+    Returns:
+        dict: offset, limit, sort, dir e q (texto do filtro, em minúsculas)
+    """
+    try:
+        offset = max(int(args.get('offset', 0)), 0)
+    except (TypeError, ValueError):
+        offset = 0
+    
+    try:
+        limite = min(max(int(args.get('limit', LIMITE_PADRAO)), 1), LIMITE_MAXIMO)
+    except (TypeError, ValueError):
+        limite = LIMITE_PADRAO
+    
+    ordem = args.get('sort', ordem_padrao)
+    if ordem not in colunas:
+        ordem = ordem_padrao
+    
+    direcao = args.get('dir', direcao_padrao)
+    if direcao not in ('asc', 'desc'):
+        direcao = direcao_padrao
+    
+    return {
+        'offset': offset,
+        'limit': limite,
+        'sort': ordem,
+        'dir': direcao,
+        'q': (args.get('q') or '').strip().lower()
+    }
+
+def paginar_consulta(consulta, params, colunas, desempate):
+    """
+    Aplica ordenação e paginação a uma consulta do SQLAlchemy
+    
+    Args:
+        consulta: Consulta já filtrada
+        params (dict): Parâmetros retornados por `parametros`
+        colunas (dict): Correspondência entre o nome da coluna e o atributo do modelo
+        desempate: Atributo usado como segundo critério, para uma ordem estável entre páginas
+    
+    Returns:
+        tuple: (itens da página, total de itens da consulta)
+    """
+    total = consulta.order_by(None).count()
+    
+    coluna = colunas[params['sort']]
+    if params['dir'] == 'desc':
+        consulta = consulta.order_by(coluna.desc(), desempate.desc())
+    else:
+        consulta = consulta.order_by(coluna.asc(), desempate.asc())
+    
+    itens = consulta.offset(params['offset']).limit(params['limit']).all()
+    return itens, total
+
+def paginar_lista(itens, params, campos_filtro, campos_ordenacao=None):
+    """
+    Aplica filtro, ordenação e paginação a uma lista de dicionários
+    
+    Args:
+        itens (list): Itens a paginar
+        params (dict): Parâmetros retornados por `parametros`
+        campos_filtro (list): Campos em que o texto do filtro é procurado
+        campos_ordenacao (dict): Campo usado para ordenar cada coluna, quando diferente do nome da coluna
+    
+    Returns:
+        tuple: (itens da página, total de itens após o filtro)
+    """
+    if params['q']:
+        itens = [
+            item for item in itens
+            if any(params['q'] in str(item.get(campo) or '').lower() for campo in campos_filtro)
+        ]
+    
+    campo = (campos_ordenacao or {}).get(params['sort'], params['sort'])
+    itens = sorted(
+        itens,
+        key=lambda item: (item.get(campo) is None, item.get(campo)),
+        reverse=params['dir'] == 'desc'
+    )
+    inicio = params['offset']
+    return itens[inicio:inicio + params['limit']], len(itens)
+
+def resposta(itens, total, params):
+    """Monta o corpo JSON de uma página de resultados"""
+    return {
+        'items': itens,
+        'total': total,
+        'offset': params['offset'],
+        'limit': params['limit'],
+        'sort': params['sort'],
+        'dir': params['dir']
+    }
@@ -0,0 +1,379 @@
+import re
+from io import BytesIO
+from collections import deque
+from PyPDF2.generic import DictionaryObject, IndirectObject, NameObject, ArrayObject
+from app.utils.page_index import IndexedPages
+
+# Tamanho dos blocos lidos do PDF de origem
+BLOCO = 64 * 1024
+
+# Cabeçalho de um objeto ("12 0 obj"), referência indireta ("12 0 R") e início dos dados de um stream
+OBJ_HEADER_PATTERN = re.compile(rb'\s*(\d+)\s+(\d+)\s+obj')
+REF_PATTERN = re.compile(rb'(?<![\d.+-])(\d+)\s+(\d+)\s+R\b')
+STREAM_PATTERN = re.compile(rb'>>\s*stream(?:\r\n|\n|\r)')
+LENGTH_PATTERN = re.compile(rb'/Length\s+(\d+)(?:\s+(\d+)\s+R\b)?')
+ENDOBJ = b'endobj'
+
+# Início de uma referência indireta, string ("(...)" ou "<...>") ou comentário ("%...") no corpo de um objeto
+TOKEN_PATTERN = re.compile(rb'[(<%]|' + REF_PATTERN.pattern)
+STRING_PATTERN = re.compile(rb'[()\\]')
+EOL_PATTERN = re.compile(rb'[\r\n]')
+
+# Nomes de XObjects usados no conteúdo de uma página ("/Im0 Do")
+DO_PATTERN = re.compile(rb'/([^\s/\[\]<>(){}%]+)\s+Do\b')
+
+# Número da árvore de páginas (/Pages) nos PDFs gravados (1 = catálogo)
+ARVORE = 2
+
+class UnsupportedSource(Exception):
+    """PDF de origem que não pode ser fatiado por cópia direta dos objetos"""
+    pass
+
+def _referencias(corpo):
+    """
+    Localiza as referências indiretas no corpo de um objeto, fora de strings e comentários
+    
+    Textos como "(ver 12 0 R)" em anotações e metadados não são referências
+    e são copiados como estão.
+    
+    Args:
+        corpo (bytes): Dicionário ou valor do objeto, sem os dados do stream
+    
+    Returns:
+        list: (início, fim, (número, geração)) de cada referência, na ordem do corpo
+    
+    Raises:
+        UnsupportedSource: Se uma string não for fechada
+    """
+    referencias = []
+    posicao = 0
+    while True:
+        token = TOKEN_PATTERN.search(corpo, posicao)
+        if token is None:
+            return referencias
+        inicio = token.start()
+        simbolo = corpo[inicio:inicio + 1]
+        
+        if token.group(1) is not None:
+            referencias.append((inicio, token.end(), (int(token.group(1)), int(token.group(2)))))
+            posicao = token.end()
+        elif simbolo == b'%':
+            fim = EOL_PATTERN.search(corpo, inicio)
+            posicao = fim.end() if fim is not None else len(corpo)
+        elif simbolo == b'<':
+            if corpo[inicio + 1:inicio + 2] == b'<':
+                posicao = inicio + 2
+                continue
+            fim = corpo.find(b'>', inicio)
+            if fim == -1:
+                raise UnsupportedSource('string hexadecimal sem fechamento')
+            posicao = fim + 1
+        else:
+            # String literal: parênteses balanceados, exceto os escapados com "\\"
+            nivel = 1
+            posicao = inicio + 1
+            while nivel:
+                caractere = STRING_PATTERN.search(corpo, posicao)
+                if caractere is None:
+                    raise UnsupportedSource('string sem fechamento')
+                posicao = caractere.end()
+                if caractere.group() == b'\\':
+                    posicao += 1
+                else:
+                    nivel += 1 if caractere.group() == b'(' else -1
+
+def _renumerar(corpo, referencias, numeros):
+    """Substitui as referências do corpo pelos números do PDF gravado (null se o objeto não for copiado)"""
+    partes = []
+    posicao = 0
+    for inicio, fim, referencia in referencias:
+        numero = numeros.get(referencia)
+        partes.append(corpo[posicao:inicio])
+        partes.append(b'%d 0 R' % numero if numero is not None else b'null')
+        posicao = fim
+    partes.append(corpo[posicao:])
+    return b''.join(partes)
+
+class RawPageSlicer:
+    """
+    Grava intervalos de páginas de um PDF copiando os bytes dos objetos de origem
+    
+    Em vez de reconstruir cada objeto com o PdfWriter, cada PDF de saída é
+    montado com os bytes originais dos objetos usados pelas páginas do
+    intervalo (imagens, fontes, conteúdo), copiados uma única vez por arquivo
+    e gravados diretamente no disco. Apenas o dicionário de cada página é
+    regravado, com /Parent apontando para a árvore de páginas da saída e os
+    XObjects limitados aos usados no conteúdo, para que recursos
+    compartilhados por todo o volume não sejam copiados em cada documento.
+    
+    A posição e os dados de cada objeto são lidos uma única vez por volume
+    e reaproveitados em todos os documentos extraídos dele.
+    """
+    
+    def __init__(self, reader, pages=None):
+        """
+        Prepara o PDF de origem para o fatiamento
+        
+        Args:
+            reader (PdfReader): Leitor do PDF de origem
+            pages: Páginas do PDF (ex: IndexedPages, a partir do índice gravado no upload); padrão: reader.pages
+        
+        Raises:
+            UnsupportedSource: Se o PDF for criptografado ou tiver uma estrutura não suportada
+        """
+        if reader.is_encrypted:
+            raise UnsupportedSource('PDF criptografado')
+        
+        self.reader = reader
+        self.stream = reader.stream
+        self.stream.seek(0)
+        cabecalho = self.stream.read(16)
+        versao = re.match(rb'%PDF-(\d\.\d)', cabecalho)
+        self.versao = versao.group(1) if versao else b'1.4'
+        
+        # Páginas (por referência) e objetos da estrutura do documento, que não são copiados
+        self.pages = reader.pages if pages is None else pages
+        self._paginas = {}
+        if isinstance(self.pages, IndexedPages):
+            referencias = self.pages.references()
+        else:
+            referencias = []
+            for pagina in self.pages:
+                if pagina.indirect_reference is None:
+                    raise UnsupportedSource('página sem referência indireta')
+                referencias.append((pagina.indirect_reference.idnum, pagina.indirect_reference.generation))
+        for numero, referencia in enumerate(referencias):
+            self._paginas[referencia] = numero
+        raiz = reader.trailer.raw_get('/Root')
+        self._estrutura = {(raiz.idnum, raiz.generation)}
+        self._arvore(reader.trailer['/Root'].raw_get('/Pages'))
+        
+        self._objetos = {}
+    
+    def _arvore(self, nodo):
+        """Registra os nós intermediários da árvore de páginas (/Pages)"""
+        pendentes = [nodo]
+        while pendentes:
+            nodo = pendentes.pop()
+            if not isinstance(nodo, IndirectObject):
+                raise UnsupportedSource('árvore de páginas sem referências indiretas')
+            referencia = (nodo.idnum, nodo.generation)
+            if referencia in self._paginas or referencia in self._estrutura:
+                continue
+            self._estrutura.add(referencia)
+            pendentes.extend(nodo.get_object().get('/Kids', []))
+    
+    def _existe(self, referencia):
+        """Verifica se o objeto referenciado está presente no PDF de origem"""
+        idnum, geracao = referencia
+        if geracao == 0 and idnum in self.reader.xref_objStm:
+            return True
+        if idnum not in self.reader.xref.get(geracao, {}):
+            return False
+        return not self.reader.xref_free_entry.get(geracao, {}).get(idnum, False)
+    
+    def _objeto(self, referencia):
+        """
+        Retorna o dicionário (bytes) de um objeto, a posição dos seus dados e as referências que ele contém
+        
+        Objetos gravados diretamente no arquivo são lidos como estão; objetos
+        dentro de object streams (PDF 1.5+) são serializados pelo PyPDF2.
+        
+        Returns:
+            tuple: (bytes do objeto, (início, fim) dos dados do stream ou None, referências (ver _referencias))
+        """
+        objeto = self._objetos.get(referencia)
+        if objeto is not None:
+            return objeto
+        
+        idnum, geracao = referencia
+        if geracao == 0 and idnum in self.reader.xref_objStm:
+            saida = BytesIO()
+            self.reader.get_object(IndirectObject(idnum, 0, self.reader)).write_to_stream(saida, None)
+            corpo, dados = saida.getvalue(), None
+        else:
+            corpo, dados = self._ler_objeto(idnum, self.reader.xref[geracao][idnum])
+        
+        objeto = self._objetos[referencia] = (corpo, dados, _referencias(corpo))
+        return objeto
+    
+    def _ler_objeto(self, idnum, offset):
+        """Lê o cabeçalho de um objeto no arquivo de origem e localiza os dados do stream, se houver"""
+        self.stream.seek(offset)
+        janela = self.stream.read(BLOCO)
+        cabecalho = OBJ_HEADER_PATTERN.match(janela)
+        if cabecalho is None or int(cabecalho.group(1)) != idnum:
+            raise UnsupportedSource(f'objeto {idnum} fora da posição indicada na tabela xref')
+        inicio = cabecalho.end()
+        
+        while True:
+            fim = janela.find(ENDOBJ, inicio)
+            stream = STREAM_PATTERN.search(janela, inicio, fim if fim != -1 else len(janela))
+            if stream is not None or fim != -1:
+                break
+            bloco = self.stream.read(BLOCO)
+            if not bloco:
+                raise UnsupportedSource(f'objeto {idnum} sem "endobj"')
+            janela += bloco
+        
+        if stream is None:
+            return janela[inicio:fim], None
+        
+        # Dados do stream: copiados sem decodificar, a partir do /Length
+        corpo = janela[inicio:stream.start() + 2]
+        comprimento = LENGTH_PATTERN.search(corpo)
+        if comprimento is None:
+            raise UnsupportedSource(f'stream {idnum} sem /Length')
+        if comprimento.group(2) is not None:
+            tamanho = self.reader.get_object(
+                IndirectObject(int(comprimento.group(1)), int(comprimento.group(2)), self.reader)
+            )
+        else:
+            tamanho = comprimento.group(1)
+        dados_inicio = offset + stream.end()
+        dados_fim = dados_inicio + int(tamanho)
+        
+        self.stream.seek(dados_fim)
+        if not self.stream.read(64).lstrip().startswith(b'endstream'):
+            raise UnsupportedSource(f'/Length incorreto no stream {idnum}')
+        return corpo, (dados_inicio, dados_fim)
+    
+    def _pagina(self, pagina):
+        """Serializa o dicionário de uma página, com /Parent na árvore de páginas da saída e apenas os XObjects usados"""
+        dicionario = DictionaryObject()
+        dicionario[NameObject('/Parent')] = IndirectObject(ARVORE, 0, None)
+        for chave, valor in pagina.items():
+            if chave != '/Parent':
+                dicionario[NameObject(chave)] = valor
+        recursos = self._recursos_usados(pagina)
+        if recursos is not None:
+            dicionario[NameObject('/Resources')] = recursos
+        
+        saida = BytesIO()
+        dicionario.write_to_stream(saida, None)
+        corpo = saida.getvalue()
+        # A primeira referência é /Parent, já numerada no PDF gravado
+        return corpo, None, _referencias(corpo)[1:]
+    
+    def _recursos_usados(self, pagina):
+        """
+        Retorna os recursos da página limitados aos XObjects usados no conteúdo
+        
+        Returns:
+            DictionaryObject: Novos recursos, ou None se os recursos originais devem ser mantidos
+        """
+        recursos = pagina.get('/Resources')
+        if not isinstance(recursos, DictionaryObject):
+            return None
+        xobjects = recursos.get('/XObject')
+        if not isinstance(xobjects, DictionaryObject) or len(xobjects) <= 1:
+            return None
+        
+        try:
+            conteudo = pagina.get('/Contents')
+            if conteudo is None:
+                usados = set()
+            else:
+                partes = conteudo if isinstance(conteudo, ArrayObject) else [conteudo]
+                usados = set()
+                for parte in partes:
+                    usados.update(m.group(1).decode('latin-1') for m in DO_PATTERN.finditer(parte.get_object().get_data()))
+        except Exception:
+            return None
+        
+        nomes = {chave[1:] for chave in xobjects}
+        if not usados <= nomes or len(usados) == len(nomes):
+            return None
+        
+        novos = DictionaryObject()
+        for chave, valor in recursos.items():
+            novos[NameObject(chave)] = valor
+        novos[NameObject('/XObject')] = DictionaryObject(
+            (NameObject(chave), valor) for chave, valor in xobjects.items() if chave[1:] in usados
+        )
+        return novos
+    
+    def write(self, start_page, end_page, output_file):
+        """
+        Grava as páginas do intervalo em um novo PDF
+        
+        Args:
+            start_page (int): Página inicial (a partir de 1)
+            end_page (int): Página final (inclusive)
+            output_file: Arquivo de saída, aberto em modo binário
+        
+        Returns:
+            int: Bytes gravados
+        """
+        paginas = [self.pages[numero] for numero in range(start_page - 1, end_page)]
+        selecionadas = {(p.indirect_reference.idnum, p.indirect_reference.generation): p for p in paginas}
+        
+        # Objetos renumerados na ordem em que são encontrados (1 = catálogo, 2 = árvore de páginas)
+        numeros = {}
+        fila = deque()
+        for referencia in selecionadas:
+            numeros[referencia] = len(numeros) + 3
+            fila.append(referencia)
+        
+        def copiado(referencia):
+            if referencia in numeros:
+                return True
+            if (referencia in self._estrutura or referencia in self._paginas
+                    or not self._existe(referencia)):
+                return False
+            numeros[referencia] = len(numeros) + 3
+            fila.append(referencia)
+            return True
+        
+        inicio = output_file.tell()
+        posicoes = {}
+        output_file.write(b'%PDF-' + self.versao + b'\n%\xe2\xe3\xcf\xd3\n')
+        
+        while fila:
+            referencia = fila.popleft()
+            if referencia in selecionadas:
+                corpo, dados, referencias = self._pagina(selecionadas[referencia])
+            else:
+                corpo, dados, referencias = self._objeto(referencia)
+            
+            # Referências a páginas fora do intervalo e à estrutura de origem viram null
+            for _, _, referencia_interna in referencias:
+                copiado(referencia_interna)
+            
+            numero = numeros[referencia]
+            posicoes[numero] = output_file.tell() - inicio
+            output_file.write(b'%d 0 obj\n' % numero)
+            output_file.write(_renumerar(corpo, referencias, numeros).strip())
+            if dados is not None:
+                output_file.write(b'\nstream\n')
+                self._copiar(dados, output_file)
+                output_file.write(b'\nendstream')
+            output_file.write(b'\nendobj\n')
+        
+        # Uma página listada mais de uma vez na árvore de origem é repetida em /Kids, como no PdfWriter
+        kids = [b'%d 0 R' % numeros[(p.indirect_reference.idnum, p.indirect_reference.generation)] for p in paginas]
+        posicoes[1] = output_file.tell() - inicio
+        output_file.write(b'1 0 obj\n<< /Type /Catalog /Pages %d 0 R >>\nendobj\n' % ARVORE)
+        posicoes[ARVORE] = output_file.tell() - inicio
+        output_file.write(b'%d 0 obj\n<< /Type /Pages /Kids [ %s ] /Count %d >>\nendobj\n'
+                          % (ARVORE, b' '.join(kids), len(kids)))
+        
+        # Tabela xref com uma entrada de 20 bytes por objeto
+        total = len(numeros) + 3
+        xref = output_file.tell() - inicio
+        linhas = [b'xref\n0 %d\n' % total, b'0000000000 65535 f\r\n']
+        linhas.extend(b'%010d 00000 n\r\n' % posicoes[numero] for numero in range(1, total))
+        linhas.append(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (total, xref))
+        output_file.write(b''.join(linhas))
+        return output_file.tell() - inicio
+    
+    def _copiar(self, dados, output_file):
+        """Copia os dados de um stream do PDF de origem para o arquivo de saída, em blocos"""
+        posicao, fim = dados
+        self.stream.seek(posicao)
+        while posicao < fim:
+            bloco = self.stream.read(min(BLOCO, fim - posicao))
+            if not bloco:
+                raise UnsupportedSource('stream truncado no PDF de origem')
+            output_file.write(bloco)
+            posicao += len(bloco)
@@ -0,0 +1,158 @@
+import io
+import os
+import csv
+import json
+import math
+from contextlib import ExitStack
+import pandas as pd
+from openpyxl import Workbook
+from app.utils.arquivos import atomic_write
+
+try:
+    import pyarrow
+except ImportError:  # Parquet é opcional
+    pyarrow = None
+
+# Cópia do índice gravada ao lado da planilha, lida no lugar dela enquanto estiver atualizada
+SIDECAR_CSV = 'csv'
+SIDECAR_PARQUET = 'parquet'
+SIDECAR_OFF = 'off'
+SIDECARS = (SIDECAR_CSV, SIDECAR_PARQUET)
+
+def sidecar_path(excel_path, formato):
+    """Retorna o caminho da cópia CSV/Parquet de uma planilha (arquivo oculto no mesmo diretório)"""
+    diretorio, nome = os.path.split(excel_path)
+    return os.path.join(diretorio, f'.{nome}.{formato}')
+
+def _estado_path(excel_path, formato):
+    """Retorna o caminho do arquivo que identifica a planilha a partir da qual a cópia foi gravada"""
+    return sidecar_path(excel_path, formato) + '.json'
+
+def _remover_sidecar(excel_path, formato):
+    for caminho in (sidecar_path(excel_path, formato), _estado_path(excel_path, formato)):
+        if os.path.exists(caminho):
+            os.remove(caminho)
+
+def _celula(valor):
+    """Converte um valor do DataFrame para uma célula (células vazias como None)"""
+    if valor is None or valor is pd.NaT:
+        return None
+    if isinstance(valor, float) and math.isnan(valor):
+        return None
+    return valor
+
+def write_xlsx(excel_path, colunas, linhas, sidecar=SIDECAR_OFF):
+    """
+    Grava uma planilha linha a linha no modo somente escrita do openpyxl
+    
+    As células não recebem estilos nem ficam em memória até a gravação, de
+    modo que a memória usada não cresce com o número de linhas. A cópia CSV
+    é gravada na mesma passagem; a Parquet (requer o pyarrow, senão é
+    gravada em CSV) é montada com os valores das linhas. Cópias em outros
+    formatos são removidas. Os arquivos são substituídos de uma só vez ao
+    final (ver arquivos.atomic_write).
+    
+    Args:
+        excel_path (str): Caminho da planilha
+        colunas (list): Cabeçalho
+        linhas (iterable): Valores de cada linha, na ordem das colunas
+        sidecar (str): Formato da cópia lida no lugar da planilha: 'csv', 'parquet' ou 'off'
+    
+    Returns:
+        int: Número de linhas gravadas
+    """
+    colunas = list(colunas)
+    if sidecar == SIDECAR_PARQUET and pyarrow is None:
+        sidecar = SIDECAR_CSV
+    # A cópia anterior deixa de valer antes de a planilha ser substituída
+    for formato in SIDECARS:
+        _remover_sidecar(excel_path, formato)
+    
+    workbook = Workbook(write_only=True)
+    planilha = workbook.create_sheet()
+    planilha.append(colunas)
+    valores = [] if sidecar == SIDECAR_PARQUET else None
+    total = 0
+    
+    with ExitStack() as pilha:
+        escritor = None
+        if sidecar == SIDECAR_CSV:
+            arquivo_csv = pilha.enter_context(atomic_write(sidecar_path(excel_path, sidecar)))
+            texto = pilha.enter_context(io.TextIOWrapper(arquivo_csv, encoding='utf-8', newline=''))
+            escritor = csv.writer(texto)
+            escritor.writerow(colunas)
+        
+        for linha in linhas:
+            celulas = [_celula(valor) for valor in linha]
+            planilha.append(celulas)
+            if escritor is not None:
+                escritor.writerow(celulas)
+            elif valores is not None:
+                valores.append([None if valor is None else str(valor) for valor in celulas])
+            total += 1
+        
+        with atomic_write(excel_path) as arquivo:
+            workbook.save(arquivo)
+        
+        if valores is not None:
+            with atomic_write(sidecar_path(excel_path, sidecar)) as arquivo:
+                pd.DataFrame(valores, columns=colunas, dtype='string').to_parquet(arquivo, index=False)
+            valores = None
+    
+    # A cópia vale enquanto a planilha tiver o tamanho e a data de modificação gravados (ver read_sidecar)
+    if sidecar in SIDECARS:
+        stats = os.stat(excel_path)
+        with atomic_write(_estado_path(excel_path, sidecar)) as arquivo:
+            arquivo.write(json.dumps({'tamanho': stats.st_size, 'mtime_ns': stats.st_mtime_ns}).encode())
+    return total
+
+def write_dataframe(excel_path, df, sidecar=SIDECAR_OFF):
+    """
+    Grava um DataFrame como planilha, no modo somente escrita, e a sua cópia CSV/Parquet
+    
+    Args:
+        excel_path (str): Caminho da planilha
+        df (pandas.DataFrame): Conteúdo
+        sidecar (str): Formato da cópia: 'csv', 'parquet' ou 'off'
+    
+    Returns:
+        str: Caminho da planilha gravada
+    """
+    write_xlsx(excel_path, df.columns, df.itertuples(index=False, name=None), sidecar)
+    return excel_path
+
+def read_sidecar(excel_path, stats=None):
+    """
+    Lê a cópia CSV/Parquet de uma planilha, se ela foi gravada a partir da planilha atual
+    
+    A cópia só é usada se a planilha tiver exatamente o tamanho e o mtime (em
+    nanossegundos) registrados quando a cópia foi gravada: uma planilha
+    editada ou substituída fora da aplicação volta a ser lida diretamente,
+    mesmo que o seu mtime seja anterior ao da cópia. As células são lidas
+    como texto, como o índice é tratado no restante da aplicação (ver
+    indice.valor_texto); células vazias são lidas como NaN.
+    
+    Args:
+        excel_path (str): Caminho da planilha
+        stats (os.stat_result): Estado atual da planilha (evita um novo stat)
+    
+    Returns:
+        pandas.DataFrame: Conteúdo da planilha, ou None se não houver cópia atualizada
+    """
+    stats = stats or os.stat(excel_path)
+    for formato in SIDECARS:
+        caminho = sidecar_path(excel_path, formato)
+        try:
+            with open(_estado_path(excel_path, formato), 'rb') as arquivo:
+                estado = json.loads(arquivo.read())
+            if (estado.get('tamanho'), estado.get('mtime_ns')) != (stats.st_size, stats.st_mtime_ns):
+                continue
+            if formato == SIDECAR_PARQUET:
+                if pyarrow is None:
+                    continue
+                df = pd.read_parquet(caminho).astype(object)
+                return df.where(df.notna(), float('nan'))
+            return pd.read_csv(caminho, dtype=str, keep_default_na=False, na_values=[''])
+        except (OSError, ValueError):
+            continue
+    return None
@@ -0,0 +1,3 @@
+class ProcessamentoCancelado(Exception):
+    """Exceção lançada quando o cancelamento de um processamento é solicitado"""
+    pass
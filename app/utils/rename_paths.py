@@ -2,18 +2,54 @@ import os
 import re
 from datetime import datetime
 import unicodedata
+from app.utils.metricas import NULL_METRICS
+from app.utils.progresso import ProcessamentoCancelado
+
+# Expressões regulares compiladas uma única vez
+FOLDER_PATTERN = re.compile(r"Livro ([\w-]+)[,\s]+[fF]ls\.?\s*(\d+)[,\s]+Mat\. (\d+)(?:\s*\(Restauração\))?")
+MAT_NUMBER_PATTERN = re.compile(r"Mat\. (\d+)")
+NON_WORD_PATTERN = re.compile(r"[^\w\d]")
+
+def _map_unique(values, func):
+    """
+    Aplica uma função uma única vez por valor distinto de uma coluna
+    
+    Args:
+        values (pandas.Series): Valores da coluna
+        func (function): Função aplicada a cada valor distinto (valores ausentes são passados como None)
+    
+    Returns:
+        numpy.ndarray: Resultados na ordem original da coluna
+    """
+    import numpy as np
+    import pandas as pd
+    
+    codes, uniques = pd.factorize(values)
+    # O código -1 (valor ausente) indexa o último elemento
+    results = np.empty(len(uniques) + 1, dtype=object)
+    for i, value in enumerate(uniques):
+        results[i] = func(value)
+    if (codes == -1).any():
+        results[-1] = func(None)
+    return results[codes]
 
 class PathRenamer:
-    def __init__(self, base_dir=None, callback=None):
+    def __init__(self, base_dir=None, callback=None, progress_callback=None, cancel_check=None, metrics=None):
         """
         Inicializa o renomeador de caminhos
         
         Args:
             base_dir (str): Diretório base para os documentos extraídos
             callback (function): Função de callback para reportar progresso
+            progress_callback (function): Função chamada com (processados, total) a cada linha
+            cancel_check (function): Função que retorna True quando o processamento deve ser interrompido
+            metrics (RunMetrics): Métricas da execução (tempo por etapa)
         """
         self.base_dir = base_dir
         self.callback = callback or (lambda msg, tipo='info': None)
+        self.progress_callback = progress_callback or (lambda atual, total: None)
+        self.cancel_check = cancel_check or (lambda: False)
+        self.metrics = metrics or NULL_METRICS
         
         # Mapeamento de tipos de documentos
         self.doc_type_mapping = {
@@ -27,6 +63,18 @@ class PathRenamer:
             "Certidão de Titulo": "CertidaoTitulo",
             "Certidão Iterpa": "CertidaoIterpa"
         }
+        self.normalize_mapping()
+    
+    def normalize_mapping(self):
+        """
+        Pré-calcula as chaves do mapeamento de tipos sem acentos e em minúsculas
+        
+        Deve ser chamado novamente se `doc_type_mapping` for alterado.
+        """
+        self._normalized_mapping = [
+            (self.remove_accents(key).lower(), value)
+            for key, value in self.doc_type_mapping.items()
+        ]
     
     def remove_accents(self, text):
         """
@@ -34,7 +82,7 @@ class PathRenamer:
         
         Args:
             text (str): Texto com acentos
-            
+        
         Returns:
             str: Texto sem acentos
         """
@@ -46,20 +94,20 @@ class PathRenamer:
         
         Args:
             matricula_str (str): String da matrícula
-            
+        
         Returns:
             tuple: (nome da pasta, identificador da matrícula)
         """
         if not isinstance(matricula_str, str):
             matricula_str = str(matricula_str)
         matricula_str = matricula_str.replace("Ma.", "Mat.").strip()
-        match = re.match(r"Livro ([\w-]+)[,\s]+[fF]ls\.?\s*(\d+)[,\s]+Mat\. (\d+)(?:\s*\(Restauração\))?", matricula_str)
+        match = FOLDER_PATTERN.match(matricula_str)
         if match:
             livro = match.group(1).replace("-", "")
             folhas = match.group(2)
             matricula = match.group(3)
             return f"Livro{livro}_fls{folhas}_Mat{matricula}", f"Mat{matricula}"
-        clean_name = re.sub(r"[^\w\d]", "_", matricula_str)
+        clean_name = NON_WORD_PATTERN.sub("_", matricula_str)
         return clean_name, clean_name
     
     def extract_mat_number(self, matricula_str):
@@ -68,13 +116,13 @@ class PathRenamer:
         
         Args:
             matricula_str (str): String da matrícula
-            
+        
         Returns:
             str: Número da matrícula formatado
         """
         if not isinstance(matricula_str, str):
             matricula_str = str(matricula_str)
-        match = re.search(r"Mat\. (\d+)", matricula_str)
+        match = MAT_NUMBER_PATTERN.search(matricula_str)
         return f"Mat.{match.group(1)}" if match else matricula_str
     
     def standardize_doc_type(self, doc_name):
@@ -83,7 +131,7 @@ class PathRenamer:
         
         Args:
             doc_name (str): Nome do documento
-            
+        
         Returns:
             str: Tipo de documento padronizado
         """
@@ -93,8 +141,8 @@ class PathRenamer:
             return "Desconhecido"
         doc_name = str(doc_name)
         doc_name_clean = self.remove_accents(doc_name).lower()
-        for key, value in self.doc_type_mapping.items():
-            if self.remove_accents(key).lower() in doc_name_clean:
+        for key, value in self._normalized_mapping:
+            if key in doc_name_clean:
                 return value
         # Se não mapeado, remover caracteres não alfanuméricos e limitar ao essencial
         clean_name = doc_name.split(",")[0].split("nº")[0].strip()
@@ -107,7 +155,7 @@ class PathRenamer:
         
         Args:
             date_str (str): String da data
-            
+        
         Returns:
             str: Data padronizada no formato YYYY-MM-DD
         """
@@ -129,85 +177,82 @@ class PathRenamer:
         """
         Processa um DataFrame pandas para renomear os caminhos
         
+        O cálculo é feito por coluna: matrículas, nomes de documentos e datas
+        são padronizados uma única vez por valor distinto, e os documentos
+        compartilhados são detectados agrupando as linhas por (Páginas, Volume).
+        
         Args:
             df (pandas.DataFrame): DataFrame com os dados
-            
+        
         Returns:
             pandas.DataFrame: DataFrame atualizado
         """
-        import pandas as pd
+        import numpy as np
         
         self.callback("Iniciando processamento de caminhos...", 'info')
-        
-        # Detectar documentos compartilhados
-        shared_docs = {}
-        mat_to_shared = {}  # Mapear matrículas mencionadas em Obs
-        
-        for index, row in df.iterrows():
-            pages = str(row["Páginas"]).strip()
-            volume = str(row["Volume"]).strip()
-            obs = str(row["Obs"]) if pd.notna(row["Obs"]) else ""
-            matricula = row["Matrícula"]
-            key = (pages, volume)
-            mat_number = self.extract_mat_number(matricula)
-            if key not in shared_docs:
-                shared_docs[key] = {"matriculas": [mat_number], "index": index}
-            else:
-                shared_docs[key]["matriculas"].append(mat_number)
-            # Processar Obs para encontrar matrículas mencionadas
-            mat_matches = re.findall(r"Mat\. (\d+)", obs)
-            if mat_matches:
-                for mat in mat_matches:
-                    mat_to_shared[f"Mat.{mat}"] = key
-        
-        # Lista para novos caminhos e indicador de compartilhamento
-        new_file_paths = []
-        is_shared = []
-        
-        # Processar cada linha da planilha
         total_rows = len(df)
-        for index, row in df.iterrows():
-            self.callback(f"Processando item {index+1}/{total_rows}: Matrícula {row['Matrícula']}", 'info')
-            
-            matricula = row["Matrícula"]
-            doc_name = row["Nome do Documento"]
-            date_str = row["Data"]
-            pages = str(row["Páginas"]).strip()
-            volume = str(row["Volume"]).strip()
-            obs = str(row["Obs"]) if pd.notna(row["Obs"]) else ""
-            
-            # Extrair componentes da pasta e matrícula
-            folder_name, matricula_id = self.extract_folder_components(matricula)
+        self.progress_callback(0, total_rows)
+        self._check_cancel()
+        
+        matriculas = df["Matrícula"].astype(str)
+        pages = df["Páginas"].astype(str).str.strip()
+        volumes = df["Volume"].astype(str).str.strip()
+        obs = df["Obs"].where(df["Obs"].notna(), "").astype(str)
+        
+        # Detectar documentos compartilhados: mesmo intervalo de páginas e volume
+        # em mais de uma linha, ou matrícula mencionada nas observações de outra linha
+        with self.metrics.span('renomear_compartilhados'):
+            mat_numbers = matriculas.str.extract(MAT_NUMBER_PATTERN, expand=False)
+            mat_numbers = ("Mat." + mat_numbers).fillna(matriculas)
+            group_sizes = pages.groupby([pages, volumes], sort=False).transform("size")
+            mentioned = set("Mat." + obs.str.findall(MAT_NUMBER_PATTERN).explode().dropna())
+            is_shared = (group_sizes > 1) | mat_numbers.isin(mentioned)
+        
+        self._check_cancel()
+        
+        with self.metrics.span('renomear_componentes'):
+            # Extrair componentes da pasta e matrícula (uma vez por matrícula distinta)
+            folders = _map_unique(matriculas, self.extract_folder_components)
+            folder_names = [folder for folder, _ in folders]
+            matricula_ids = [matricula_id for _, matricula_id in folders]
             
             # Padronizar tipo de documento e data
-            doc_type = self.standardize_doc_type(doc_name)
-            date_formatted = self.standardize_date(date_str)
-            
+            doc_types = _map_unique(df["Nome do Documento"], self.standardize_doc_type)
+            dates = _map_unique(df["Data"], self.standardize_date)
+        
+        with self.metrics.span('renomear_caminhos'):
             # Adicionar prefixo para documentos incompletos
-            prefix = "INCOMPLETO_" if "incompleto" in obs.lower() else ""
+            prefixes = np.where(obs.str.lower().str.contains("incompleto", regex=False), "INCOMPLETO_", "")
             
             # Criar novo caminho do arquivo
-            new_file_name = f"{prefix}{date_formatted}_{doc_type}_{matricula_id}.pdf"
-            new_file_path = os.path.join(self.base_dir, folder_name, new_file_name).replace("\\", "/")
-            
-            # Verificar se o documento é compartilhado
-            shared_key = (pages, volume)
-            mat_number = self.extract_mat_number(matricula)
-            shared_info = shared_docs.get(shared_key, {"matriculas": [mat_number]})
-            is_shared_doc = len(shared_info["matriculas"]) > 1 or mat_number in mat_to_shared
-            
-            new_file_paths.append(new_file_path)
-            is_shared.append("Sim" if is_shared_doc else "Não")
+            folder_paths = _map_unique(
+                folder_names,
+                lambda folder: os.path.join(self.base_dir, folder, "").replace("\\", "/")
+            )
+            new_file_paths = [
+                f"{folder_path}{prefix}{date_formatted}_{doc_type}_{matricula_id}.pdf"
+                for folder_path, prefix, date_formatted, doc_type, matricula_id
+                in zip(folder_paths, prefixes, dates, doc_types, matricula_ids)
+            ]
+        self.metrics.count('linhas_renomeadas', total_rows)
         
         # Atualizar DataFrame
         df["Arquivo Extraído"] = new_file_paths
-        df["Documento Compartilhado"] = is_shared
+        df["Documento Compartilhado"] = np.where(is_shared.to_numpy(), "Sim", "Não")
         
+        self.progress_callback(total_rows, total_rows)
         self.callback(f"Processamento concluído. {total_rows} entradas atualizadas.", 'info')
         
         return df
+    
+    def _check_cancel(self):
+        """Interrompe o processamento se o cancelamento foi solicitado"""
+        if self.cancel_check():
+            self.callback("Renomeação de caminhos cancelada.", 'warning')
+            raise ProcessamentoCancelado("Renomeação cancelada")
 
-def rename_paths_in_excel(excel_path, output_excel_path, base_dir, callback=None):
+def rename_paths_in_excel(excel_path, output_excel_path, base_dir, callback=None,
+                          progress_callback=None, cancel_check=None, metrics=None):
     """
     Função auxiliar para renomear caminhos em um arquivo Excel
     
@@ -216,20 +261,24 @@ def rename_paths_in_excel(excel_path, output_excel_path, base_dir, callback=None
         output_excel_path (str): Caminho para o arquivo Excel de saída
         base_dir (str): Diretório base para os documentos extraídos
         callback (function): Função de callback para reportar progresso
-        
+        progress_callback (function): Função chamada com (processados, total) a cada linha
+        cancel_check (function): Função que retorna True quando o processamento deve ser interrompido
+        metrics (RunMetrics): Métricas da execução
+    
     Returns:
         bool: True se o processamento foi bem-sucedido, False caso contrário
     """
     try:
-        import pandas as pd
+        from app.utils import excel_cache
         
         # Inicializar renomeador
-        renamer = PathRenamer(base_dir, callback)
+        renamer = PathRenamer(base_dir, callback, progress_callback, cancel_check, metrics)
         
         # Carregar planilha
         if callback:
             callback(f"Carregando planilha: {excel_path}", 'info')
-        df = pd.read_excel(excel_path)
+        with renamer.metrics.span('ler_planilha'):
+            df = excel_cache.read_excel(excel_path)
         
         # Processar DataFrame
         df_updated = renamer.process_dataframe(df)
@@ -237,13 +286,17 @@ def rename_paths_in_excel(excel_path, output_excel_path, base_dir, callback=None
         # Salvar planilha atualizada
         if callback:
             callback(f"Salvando planilha atualizada: {output_excel_path}", 'info')
-        df_updated.to_excel(output_excel_path, index=False)
+        with renamer.metrics.span('exportar_planilha'):
+            excel_cache.write_excel(output_excel_path, df_updated)
         
         if callback:
             callback(f"Planilha atualizada salva com sucesso.", 'info')
         
         return True
     
+    except ProcessamentoCancelado:
+        raise
+    
     except Exception as e:
         if callback:
             callback(f"Erro ao processar arquivo Excel: {e}", 'error')
@@ -0,0 +1,258 @@
+import os
+import hashlib
+import threading
+from datetime import datetime
+from werkzeug.utils import secure_filename
+from app import db
+from app.models import Log, Upload
+from app.utils import inventario
+from app.utils.manifest import file_sha256
+from app.utils.origens import source_indexer
+
+# Tamanho dos blocos copiados do corpo da requisição para o disco
+BLOCO_COPIA = 1024 * 1024
+
+class ErroUpload(Exception):
+    """Erro em um envio em partes, com o código HTTP correspondente"""
+    def __init__(self, mensagem, status=400):
+        super().__init__(mensagem)
+        self.status = status
+
+# Um envio recebe apenas uma parte de cada vez
+_locks = {}
+_locks_lock = threading.Lock()
+
+def _lock_upload(upload_id):
+    with _locks_lock:
+        return _locks.setdefault(upload_id, threading.Lock())
+
+# Hash dos bytes já recebidos de cada envio em andamento: {upload_id: (bytes, hashlib.sha256)}
+_hashes = {}
+
+def _encerrar(upload_id):
+    """
+    Descarta o lock e o hash em memória de um envio finalizado, cancelado ou com erro
+    
+    Requisições que ainda aguardam o lock descartado o recebem normalmente e
+    encontram o envio finalizado; as seguintes criam um novo lock.
+    """
+    with _locks_lock:
+        _locks.pop(upload_id, None)
+    _hashes.pop(upload_id, None)
+
+def _hash_recebido(upload, atual):
+    """
+    Retorna o hash acumulado dos `atual` primeiros bytes do envio
+    
+    O hash é mantido em memória entre as partes; se não estiver disponível
+    (outro processo, reinício do servidor ou parte descartada), é recalculado
+    a partir do arquivo parcial.
+    """
+    estado = _hashes.pop(upload.id, None)
+    if estado is not None and estado[0] == atual:
+        return estado[1]
+    sha = hashlib.sha256()
+    if atual:
+        with open(upload.caminho_parcial, 'rb') as f:
+            restante = atual
+            while restante:
+                bloco = f.read(min(BLOCO_COPIA, restante))
+                if not bloco:
+                    break
+                sha.update(bloco)
+                restante -= len(bloco)
+    return sha
+
+def recebido(upload):
+    """Retorna quantos bytes do envio já estão gravados no disco"""
+    try:
+        return os.path.getsize(upload.caminho_parcial)
+    except OSError:
+        return 0
+
+def iniciar(projeto, nome, tamanho, sha256=None):
+    """
+    Inicia (ou retoma) o envio de um arquivo para a pasta de processos
+    
+    Um envio pendente do mesmo arquivo (nome, tamanho e hash) é reaproveitado,
+    permitindo continuar a partir dos bytes já recebidos.
+    
+    Args:
+        projeto (Projeto): Projeto de destino
+        nome (str): Nome do arquivo
+        tamanho (int): Tamanho total do arquivo em bytes
+        sha256 (str): Hash SHA-256 esperado do arquivo completo (opcional)
+    
+    Returns:
+        Upload: Envio criado ou retomado
+    """
+    nome = secure_filename(nome or '')
+    if not nome:
+        raise ErroUpload('Nome de arquivo inválido')
+    try:
+        tamanho = int(tamanho)
+    except (TypeError, ValueError):
+        raise ErroUpload(f'Tamanho inválido para o arquivo "{nome}"')
+    if tamanho < 0:
+        raise ErroUpload(f'Tamanho inválido para o arquivo "{nome}"')
+    sha256 = sha256.lower() if sha256 else None
+    
+    upload = Upload.query.filter_by(
+        projeto_id=projeto.id,
+        nome=nome,
+        tamanho=tamanho,
+        sha256=sha256,
+        status=Upload.PENDENTE
+    ).order_by(Upload.id.desc()).first()
+    
+    if upload is None:
+        upload = Upload(projeto=projeto, nome=nome, tamanho=tamanho, sha256=sha256)
+        db.session.add(upload)
+        db.session.commit()
+    
+    os.makedirs(projeto.caminho_processos, exist_ok=True)
+    upload.recebido = recebido(upload)
+    db.session.commit()
+    
+    # Arquivos vazios não recebem partes
+    if tamanho == 0:
+        open(upload.caminho_parcial, 'ab').close()
+        finalizar(upload)
+    return upload
+
+def receber_parte(upload, stream, offset, tamanho_parte=None, sha256_parte=None):
+    """
+    Grava uma parte do arquivo a partir do corpo da requisição
+    
+    A parte é copiada diretamente para o arquivo parcial, na posição informada,
+    sem cópias intermediárias. Quando o último byte é recebido, o arquivo é
+    verificado e movido para a pasta de processos.
+    
+    Args:
+        upload (Upload): Envio em andamento
+        stream: Corpo da requisição (request.stream)
+        offset (int): Posição da parte no arquivo; deve ser igual aos bytes já recebidos
+        tamanho_parte (int): Tamanho da parte (Content-Length), se conhecido
+        sha256_parte (str): Hash SHA-256 esperado da parte (opcional)
+    
+    Returns:
+        Upload: Envio atualizado
+    """
+    with _lock_upload(upload.id):
+        # O status pode ter mudado em outra requisição enquanto esta aguardava
+        db.session.refresh(upload)
+        if upload.status != Upload.PENDENTE:
+            raise ErroUpload(f'O envio de "{upload.nome}" já foi finalizado', 409)
+        
+        atual = recebido(upload)
+        if offset != atual:
+            # Posição gravada no disco, informada ao cliente para que retome a partir dela
+            upload.recebido = atual
+            db.session.commit()
+            raise ErroUpload(f'Posição inválida: esperado {atual}, recebido {offset}', 409)
+        
+        restante = upload.tamanho - atual
+        if tamanho_parte is not None and tamanho_parte > restante:
+            raise ErroUpload(f'A parte ultrapassa o tamanho declarado do arquivo "{upload.nome}"', 413)
+        
+        sha = hashlib.sha256()
+        sha_arquivo = _hash_recebido(upload, atual)
+        gravados = 0
+        with open(upload.caminho_parcial, 'r+b' if atual else 'wb') as f:
+            f.seek(atual)
+            try:
+                while True:
+                    bloco = stream.read(BLOCO_COPIA)
+                    if not bloco:
+                        break
+                    gravados += len(bloco)
+                    if gravados > restante:
+                        raise ErroUpload(f'A parte ultrapassa o tamanho declarado do arquivo "{upload.nome}"', 413)
+                    sha.update(bloco)
+                    sha_arquivo.update(bloco)
+                    f.write(bloco)
+                
+                if tamanho_parte is not None and gravados != tamanho_parte:
+                    raise ErroUpload('A parte foi recebida incompleta', 400)
+                if sha256_parte and sha.hexdigest() != sha256_parte.lower():
+                    raise ErroUpload('O hash da parte recebida não confere', 422)
+            except Exception:
+                # Descartar a parte inválida; o envio continua da posição anterior
+                f.truncate(atual)
+                raise
+        
+        upload.recebido = atual + gravados
+        if upload.recebido == upload.tamanho:
+            upload.sha256_recebido = sha_arquivo.hexdigest()
+        else:
+            _hashes[upload.id] = (upload.recebido, sha_arquivo)
+        db.session.commit()
+        
+        if upload.recebido == upload.tamanho:
+            finalizar(upload)
+    return upload
+
+def finalizar(upload):
+    """
+    Verifica o arquivo completo e o move para a pasta de processos
+    
+    O hash SHA-256 do arquivo é sempre calculado pelo servidor (acumulado
+    durante o recebimento das partes) e gravado no envio; quando o cliente
+    informou o hash esperado, os dois são comparados.
+    
+    Args:
+        upload (Upload): Envio com todos os bytes recebidos
+    """
+    _encerrar(upload.id)
+    if not upload.sha256_recebido:
+        upload.sha256_recebido = file_sha256(upload.caminho_parcial)
+    if upload.sha256 and upload.sha256_recebido != upload.sha256:
+        os.remove(upload.caminho_parcial)
+        upload.status = Upload.ERRO
+        upload.recebido = 0
+        upload.mensagem = 'O hash do arquivo recebido não confere'
+        upload.data_conclusao = datetime.utcnow()
+        db.session.add(Log(
+            projeto=upload.projeto,
+            tipo='error',
+            mensagem=f'Falha na verificação do arquivo "{upload.nome}": o hash não confere'
+        ))
+        db.session.commit()
+        raise ErroUpload(upload.mensagem, 422)
+    
+    os.replace(upload.caminho_parcial, upload.caminho_destino)
+    inventario.invalidate(upload.projeto.caminho_diretorio, 'processos')
+    upload.status = Upload.CONCLUIDO
+    upload.data_conclusao = datetime.utcnow()
+    db.session.add(Log(
+        projeto=upload.projeto,
+        tipo='info',
+        mensagem=f'Arquivo "{upload.nome}" enviado com sucesso'
+    ))
+    db.session.commit()
+    
+    # Indexar as páginas do PDF em segundo plano
+    source_indexer.agendar(upload.projeto, upload.nome)
+
+def cancelar(upload):
+    """
+    Cancela um envio pendente, descartando os bytes recebidos
+    
+    Args:
+        upload (Upload): Envio a ser cancelado
+    
+    Returns:
+        bool: True se o envio foi cancelado, False se já estava finalizado
+    """
+    with _lock_upload(upload.id):
+        db.session.refresh(upload)
+        if upload.status != Upload.PENDENTE:
+            return False
+        if os.path.exists(upload.caminho_parcial):
+            os.remove(upload.caminho_parcial)
+        _encerrar(upload.id)
+        upload.status = Upload.CANCELADO
+        upload.recebido = 0
+        upload.data_conclusao = datetime.utcnow()
+        db.session.commit()
+        return True
@@ -0,0 +1,139 @@
+import os
+from app.utils.extract_pdfs import PDFExtractor, open_source
+from app.utils.page_index import is_current
+
+# Número máximo de problemas detalhados no relatório (o total é sempre informado)
+MAX_PROBLEMAS = 1000
+
+def contar_paginas(input_pdf):
+    """
+    Conta as páginas de um PDF de origem que ainda não foi indexado
+    
+    Args:
+        input_pdf (str): Caminho do PDF
+    
+    Returns:
+        tuple: (número de páginas, None) ou (None, motivo da falha ao abrir o PDF)
+    """
+    mapa = None
+    try:
+        reader, mapa = open_source(input_pdf)
+        return len(reader.pages), None
+    except Exception as e:
+        return None, str(e) or e.__class__.__name__
+    finally:
+        if mapa is not None:
+            mapa.close()
+
+def _texto(valor):
+    """Converte o valor de uma célula em texto, com células vazias como ''"""
+    if valor is None or valor != valor:  # None ou NaN
+        return ''
+    return str(valor).strip()
+
+def validar_dataframe(df, projeto_path, source_index=None, verificar_destino=False):
+    """
+    Verifica todas as linhas do índice antes da extração, em uma única passagem
+    
+    Cada volume de origem (Origem_Volume.pdf) é verificado uma vez: se existe
+    na pasta de processos, se é válido e quantas páginas tem, a partir do
+    índice de páginas gravado no upload (o PDF só é aberto se ainda não foi
+    indexado). Cada intervalo distinto de páginas é interpretado uma vez.
+    
+    Args:
+        df (pandas.DataFrame): Índice de matrículas (colunas da planilha e, opcionalmente, "id")
+        projeto_path (str): Caminho para o diretório do projeto
+        source_index (dict): Índice de páginas dos PDFs de origem, por nome de arquivo
+        verificar_destino (bool): Se o caminho do arquivo extraído também deve estar preenchido
+    
+    Returns:
+        dict: Total de linhas, linhas com problema, problemas (até MAX_PROBLEMAS) e situação de cada volume
+    """
+    source_index = source_index or {}
+    extractor = PDFExtractor(projeto_path)
+    processos_dir = extractor.processos_dir
+    try:
+        existentes = {entrada.name for entrada in os.scandir(processos_dir) if entrada.is_file()}
+    except OSError:
+        existentes = set()
+    
+    volumes = {}
+    intervalos = {}
+    problemas = []
+    total_problemas = 0
+    linhas_invalidas = 0
+    
+    def volume(nome):
+        """Situação de um volume de origem, verificada uma única vez"""
+        situacao = volumes.get(nome)
+        if situacao is not None:
+            return situacao
+        situacao = volumes[nome] = {'nome': nome, 'linhas': 0, 'paginas': None, 'indexado': False, 'erro': None}
+        if nome not in existentes:
+            situacao['erro'] = f"Arquivo de origem '{nome}' não encontrado"
+            return situacao
+        caminho = os.path.join(processos_dir, nome)
+        entrada = source_index.get(nome)
+        if entrada is not None and is_current(entrada, os.stat(caminho)):
+            situacao['indexado'] = True
+            if entrada['valido']:
+                situacao['paginas'] = entrada['paginas']
+            else:
+                situacao['erro'] = f"Arquivo de origem '{nome}' inválido ({entrada['mensagem']})"
+        else:
+            situacao['paginas'], erro = contar_paginas(caminho)
+            if erro:
+                situacao['erro'] = f"Arquivo de origem '{nome}' inválido ({erro})"
+        return situacao
+    
+    ids = df['id'] if 'id' in df.columns else [None] * len(df)
+    destinos = df['Arquivo Extraído'] if verificar_destino else [None] * len(df)
+    colunas = zip(ids, df['Matrícula'], df['Origem'], df['Volume'], df['Páginas'], destinos)
+    for linha, (id_, matricula, origem, volume_, paginas, destino) in enumerate(colunas, 1):
+        origem, volume_, paginas = _texto(origem), _texto(volume_), _texto(paginas)
+        mensagens = []
+        
+        if not origem or not volume_:
+            mensagens.append('Origem ou volume não informado')
+        else:
+            situacao = volume(extractor.get_input_pdf_name(origem, volume_))
+            situacao['linhas'] += 1
+            if situacao['erro']:
+                mensagens.append(situacao['erro'])
+        
+        if paginas not in intervalos:
+            intervalos[paginas] = extractor.parse_page_range(paginas) if paginas else (None, None)
+        inicio, fim = intervalos[paginas]
+        if inicio is None:
+            mensagens.append(f"Intervalo de páginas inválido '{paginas}'")
+        elif inicio < 1:
+            mensagens.append(f"Intervalo de páginas inválido ({inicio}-{fim})")
+        elif origem and volume_ and situacao['paginas'] is not None and fim > situacao['paginas']:
+            mensagens.append(f"Intervalo ({inicio}-{fim}) excede o total de páginas ({situacao['paginas']}) "
+                             f"em '{situacao['nome']}'")
+        
+        if verificar_destino and not _texto(destino):
+            mensagens.append('Caminho do arquivo extraído não definido (execute a renomeação)')
+        
+        if mensagens:
+            linhas_invalidas += 1
+            total_problemas += len(mensagens)
+            for mensagem in mensagens:
+                if len(problemas) < MAX_PROBLEMAS:
+                    problemas.append({
+                        'linha': linha,
+                        'id': int(id_) if id_ is not None else None,
+                        'matricula': _texto(matricula),
+                        'origem': origem,
+                        'volume': volume_,
+                        'paginas': paginas,
+                        'mensagem': mensagem
+                    })
+    
+    return {
+        'total': len(df),
+        'linhas_invalidas': linhas_invalidas,
+        'problemas': problemas,
+        'total_problemas': total_problemas,
+        'volumes': sorted(volumes.values(), key=lambda situacao: situacao['nome'])
+    }
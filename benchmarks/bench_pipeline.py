@@ -0,0 +1,225 @@
+"""
+Benchmark das etapas de processamento de um projeto
+
+Gera um projeto sintético em um PROJETOS_DIR temporário e mede o tempo de
+cada etapa (leitura da planilha, renomeação, extração, extração incremental,
+importação do índice, processamento completo) e da renderização das páginas.
+Os resultados são gravados em JSON, com o commit atual, para que execuções
+em commits diferentes possam ser comparadas.
+
+Uso:
+    python benchmarks/bench_pipeline.py [--matriculas 2000] [--volumes 10] [--paginas 300]
+    python benchmarks/bench_pipeline.py --comparar resultados/anterior.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from sintetico import gerar_projeto
+
+def commit_atual():
+    """Retorna o commit atual do repositório (ou None fora de um repositório git)"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def cronometrar(funcao):
+    """Executa a função e retorna (segundos, resultado)"""
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return time.perf_counter() - inicio, resultado
+
+def medir_requisicao(client, url, repeticoes):
+    """Mede uma requisição GET várias vezes e retorna a mediana, o máximo e o tamanho da resposta"""
+    tempos = []
+    tamanho = 0
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resposta = client.get(url)
+        tempos.append(time.perf_counter() - inicio)
+        if resposta.status_code != 200:
+            raise RuntimeError(f"{url} retornou {resposta.status_code}")
+        tamanho = len(resposta.data)
+    return {
+        'segundos': statistics.median(tempos),
+        'max_segundos': max(tempos),
+        'bytes': tamanho,
+        'repeticoes': repeticoes
+    }
+
+def executar(args, base_dir):
+    """Gera o projeto sintético e mede cada etapa"""
+    projetos_dir = os.path.join(base_dir, 'projetos')
+    os.makedirs(projetos_dir)
+    
+    class BenchmarkConfig(Config):
+        PROJETOS_DIR = projetos_dir
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(base_dir, 'app.db')
+        EXTRACTION_WORKERS = args.workers
+        
+        @staticmethod
+        def init_app(app):
+            pass
+    
+    from app import create_app, db
+    from app.models import Projeto
+    from app.utils import excel_cache, extract_pdfs, indice, rename_paths
+    from app.utils.jobs import executar_processamento
+    
+    etapas = {}
+    mensagens = []
+    callback = lambda msg, tipo='info': mensagens.append(tipo)
+    
+    segundos, projeto_info = cronometrar(lambda: gerar_projeto(
+        projetos_dir, 'benchmark', args.matriculas, args.volumes, args.paginas, seed=args.seed
+    ))
+    etapas['gerar_projeto'] = {'segundos': segundos}
+    excel = projeto_info['excel']
+    docs_dir = os.path.join(projeto_info['diretorio'], 'docs')
+    
+    # Leitura da planilha sem cache
+    excel_cache.invalidate()
+    segundos, df = cronometrar(lambda: pd.read_excel(excel))
+    etapas['ler_planilha'] = {'segundos': segundos, 'linhas': len(df)}
+    
+    # Renomeação (planilha -> planilha)
+    segundos, _ = cronometrar(lambda: rename_paths.rename_paths_in_excel(excel, excel, docs_dir, callback))
+    etapas['renomear_excel'] = {'segundos': segundos, 'linhas_por_segundo': len(df) / segundos}
+    
+    # Extração completa e incremental (planilha -> PDFs)
+    segundos, stats = cronometrar(lambda: extract_pdfs.extract_from_excel(
+        excel, projeto_info['diretorio'], callback, workers=args.workers
+    ))
+    etapas['extrair_excel'] = {
+        'segundos': segundos,
+        'linhas_por_segundo': stats['total'] / segundos if segundos else None,
+        'sucesso': stats['success'],
+        'erros': stats['error']
+    }
+    
+    segundos, stats = cronometrar(lambda: extract_pdfs.extract_from_excel(
+        excel, projeto_info['diretorio'], callback, workers=args.workers
+    ))
+    etapas['extrair_incremental'] = {'segundos': segundos, 'ignorados': stats.get('skipped', 0)}
+    
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        projeto = Projeto(
+            nome='Benchmark',
+            caminho_diretorio=projeto_info['diretorio'],
+            caminho_excel=excel
+        )
+        db.session.add(projeto)
+        db.session.commit()
+        projeto_id = projeto.id
+        
+        # Importação do índice para o banco
+        segundos, importadas = cronometrar(lambda: indice.importar_excel(projeto))
+        etapas['importar_indice'] = {'segundos': segundos, 'linhas': importadas}
+        
+        # Processamento completo, como executado pelos jobs
+        segundos, _ = cronometrar(lambda: executar_processamento(
+            projeto, callback=callback, config=app.config, forcar=True
+        ))
+        etapas['processamento_completo'] = {
+            'segundos': segundos,
+            'linhas_por_segundo': importadas / segundos,
+            'paginas_por_segundo': projeto_info['paginas'] / segundos
+        }
+    
+    # Renderização das páginas e respostas das tabelas
+    client = app.test_client()
+    etapas['pagina_projeto'] = medir_requisicao(client, f'/projeto/{projeto_id}', args.repeticoes)
+    etapas['pagina_inicial'] = medir_requisicao(client, '/', args.repeticoes)
+    etapas['listar_matriculas'] = medir_requisicao(client, f'/projeto/{projeto_id}/listar_matriculas', args.repeticoes)
+    etapas['listar_documentos'] = medir_requisicao(client, f'/projeto/{projeto_id}/listar_arquivos/docs', args.repeticoes)
+    etapas['listar_logs'] = medir_requisicao(client, f'/projeto/{projeto_id}/listar_logs', args.repeticoes)
+    
+    return etapas
+
+def comparar(anterior, atual):
+    """Imprime a variação de tempo de cada etapa em relação a uma execução anterior"""
+    print(f"\nComparação com {anterior.get('commit')} ({anterior.get('data')}):")
+    if anterior.get('parametros') != atual['parametros']:
+        print(f"  Atenção: parâmetros diferentes ({anterior.get('parametros')})")
+    for etapa, dados in atual['etapas'].items():
+        base = anterior.get('etapas', {}).get(etapa)
+        if not base:
+            print(f"  {etapa:24s} {dados['segundos']:9.3f} s   (nova etapa)")
+            continue
+        variacao = (dados['segundos'] - base['segundos']) / base['segundos'] * 100 if base['segundos'] else 0
+        print(f"  {etapa:24s} {base['segundos']:9.3f} s -> {dados['segundos']:9.3f} s  ({variacao:+.1f}%)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das etapas de processamento de um projeto")
+    parser.add_argument('--matriculas', type=int, default=2000, help="Linhas do índice sintético")
+    parser.add_argument('--volumes', type=int, default=10, help="Volumes de origem")
+    parser.add_argument('--paginas', type=int, default=300, help="Páginas por volume")
+    parser.add_argument('--workers', type=int, default=1, help="Processos de extração")
+    parser.add_argument('--repeticoes', type=int, default=5, help="Repetições de cada requisição medida")
+    parser.add_argument('--seed', type=int, default=42, help="Semente do gerador")
+    parser.add_argument('--saida', help="Arquivo JSON de resultados (padrão: benchmarks/resultados/<data>_<commit>.json)")
+    parser.add_argument('--comparar', help="Arquivo JSON de uma execução anterior para comparação")
+    parser.add_argument('--manter', action='store_true', help="Não apagar o diretório temporário do projeto")
+    args = parser.parse_args()
+    
+    base_dir = tempfile.mkdtemp(prefix='bench_docs_')
+    try:
+        etapas = executar(args, base_dir)
+    finally:
+        if args.manter:
+            print(f"Projeto sintético mantido em {base_dir}")
+        else:
+            shutil.rmtree(base_dir, ignore_errors=True)
+    
+    commit = commit_atual()
+    resultado = {
+        'commit': commit,
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'parametros': {
+            'matriculas': args.matriculas,
+            'volumes': args.volumes,
+            'paginas': args.paginas,
+            'workers': args.workers,
+            'seed': args.seed
+        },
+        'etapas': etapas
+    }
+    
+    for etapa, dados in etapas.items():
+        print(f"{etapa:24s} {dados['segundos']:9.3f} s")
+    
+    saida = args.saida or os.path.join(
+        RAIZ, 'benchmarks', 'resultados', f"{datetime.now():%Y%m%d_%H%M%S}_{commit or 'sem_commit'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados gravados em {saida}")
+    
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            comparar(json.load(f), resultado)
+
+if __name__ == '__main__':
+    main()
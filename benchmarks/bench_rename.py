@@ -0,0 +1,176 @@
+"""
+Benchmark da renomeação de caminhos (PathRenamer.process_dataframe)
+
+Compara a implementação por colunas com a implementação anterior, linha a
+linha (df.iterrows), em um índice sintético, e verifica que as colunas
+"Arquivo Extraído" e "Documento Compartilhado" são idênticas.
+
+Uso:
+    python benchmarks/bench_rename.py [--linhas 100000] [--repeticoes 3]
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.rename_paths import PathRenamer
+
+NOMES_DOCUMENTOS = [
+    "Escritura de Venda e Compra",
+    "Ecritura de Venda e Compra",
+    "Título Definitivo",
+    "Título Definitvo",
+    "Certidão Inteiro Teor",
+    "Inteiro Teor da Matrícula",
+    "Certidão de Titulo",
+    "Certidão Iterpa",
+    "Procuração nº 15, lavrada em cartório",
+    "Memorial Descritivo, 2 vias",
+    "   ",
+    None,
+]
+
+def gerar_indice(linhas, seed=42):
+    """
+    Gera um índice de matrículas sintético
+    
+    Args:
+        linhas (int): Número de linhas
+        seed (int): Semente do gerador aleatório
+    
+    Returns:
+        pandas.DataFrame: Índice com as colunas da planilha
+    """
+    rnd = random.Random(seed)
+    registros = []
+    for i in range(linhas):
+        mat = rnd.randint(1, linhas // 4 + 1)
+        formato = rnd.random()
+        if formato < 0.80:
+            matricula = f"Livro 2-{rnd.choice('ABC')}, fls. {rnd.randint(1, 300)}, Mat. {mat}"
+        elif formato < 0.88:
+            matricula = f"Livro 3 Fls {rnd.randint(1, 300)} Ma. {mat} (Restauração)"
+        elif formato < 0.95:
+            matricula = f"Transcrição {mat}"
+        else:
+            matricula = f"Mat. {mat}"
+        
+        sorteio = rnd.random()
+        if sorteio < 0.6:
+            data = f"{rnd.randint(1, 28):02d}-{rnd.randint(1, 12):02d}-{rnd.randint(1950, 2020)}"
+        elif sorteio < 0.8:
+            data = f"{rnd.randint(1950, 2020)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}"
+        elif sorteio < 0.9:
+            data = rnd.choice(["-", "", "31/02/1990"])
+        else:
+            data = None
+        
+        inicio = rnd.randint(1, 2000)
+        paginas = str(inicio) if rnd.random() < 0.3 else f"{inicio}-{inicio + rnd.randint(0, 10)}"
+        
+        sorteio = rnd.random()
+        if sorteio < 0.1:
+            obs = f"ver Mat. {rnd.randint(1, linhas // 4 + 1)}"
+        elif sorteio < 0.15:
+            obs = "Documento incompleto"
+        else:
+            obs = None
+        
+        registros.append({
+            "Matrícula": matricula,
+            "Nome do Documento": rnd.choice(NOMES_DOCUMENTOS),
+            "Data": data,
+            "Origem": "CRI",
+            "Volume": rnd.randint(1, 40),
+            "Páginas": paginas,
+            "Obs": obs,
+            "Arquivo Extraído": None,
+            "Documento Compartilhado": None,
+        })
+    return pd.DataFrame(registros)
+
+def processar_por_linha(renamer, df):
+    """Implementação anterior de PathRenamer.process_dataframe, linha a linha (referência)"""
+    shared_docs = {}
+    mat_to_shared = {}
+    
+    for index, row in df.iterrows():
+        pages = str(row["Páginas"]).strip()
+        volume = str(row["Volume"]).strip()
+        obs = str(row["Obs"]) if pd.notna(row["Obs"]) else ""
+        key = (pages, volume)
+        mat_number = renamer.extract_mat_number(row["Matrícula"])
+        if key not in shared_docs:
+            shared_docs[key] = {"matriculas": [mat_number], "index": index}
+        else:
+            shared_docs[key]["matriculas"].append(mat_number)
+        for mat in re.findall(r"Mat\. (\d+)", obs):
+            mat_to_shared[f"Mat.{mat}"] = key
+    
+    new_file_paths = []
+    is_shared = []
+    for index, row in df.iterrows():
+        matricula = row["Matrícula"]
+        pages = str(row["Páginas"]).strip()
+        volume = str(row["Volume"]).strip()
+        obs = str(row["Obs"]) if pd.notna(row["Obs"]) else ""
+        
+        folder_name, matricula_id = renamer.extract_folder_components(matricula)
+        doc_type = renamer.standardize_doc_type(row["Nome do Documento"])
+        date_formatted = renamer.standardize_date(row["Data"])
+        prefix = "INCOMPLETO_" if "incompleto" in obs.lower() else ""
+        
+        new_file_name = f"{prefix}{date_formatted}_{doc_type}_{matricula_id}.pdf"
+        new_file_paths.append(os.path.join(renamer.base_dir, folder_name, new_file_name).replace("\\", "/"))
+        
+        mat_number = renamer.extract_mat_number(matricula)
+        shared_info = shared_docs.get((pages, volume), {"matriculas": [mat_number]})
+        is_shared.append("Sim" if len(shared_info["matriculas"]) > 1 or mat_number in mat_to_shared else "Não")
+    
+    df["Arquivo Extraído"] = new_file_paths
+    df["Documento Compartilhado"] = is_shared
+    return df
+
+def cronometrar(funcao, df, repeticoes):
+    """Executa a função sobre cópias do DataFrame e retorna (melhor tempo, resultado)"""
+    melhor = None
+    resultado = None
+    for _ in range(repeticoes):
+        copia = df.copy()
+        inicio = time.perf_counter()
+        resultado = funcao(copia)
+        decorrido = time.perf_counter() - inicio
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor, resultado
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da renomeação de caminhos")
+    parser.add_argument("--linhas", type=int, default=100000, help="Número de linhas do índice sintético")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Execuções de cada implementação (vale o melhor tempo)")
+    args = parser.parse_args()
+    
+    df = gerar_indice(args.linhas)
+    renamer = PathRenamer("/projetos/benchmark/docs")
+    print(f"Índice sintético: {len(df)} linhas ({datetime.now():%d/%m/%Y %H:%M:%S})")
+    
+    tempo_linhas, esperado = cronometrar(lambda d: processar_por_linha(renamer, d), df, args.repeticoes)
+    tempo_colunas, obtido = cronometrar(renamer.process_dataframe, df, args.repeticoes)
+    
+    for coluna in ("Arquivo Extraído", "Documento Compartilhado"):
+        if list(esperado[coluna]) != list(obtido[coluna]):
+            print(f"ERRO: a coluna '{coluna}' difere da implementação de referência")
+            sys.exit(1)
+    
+    print(f"Linha a linha: {tempo_linhas:8.3f} s ({len(df) / tempo_linhas:10.0f} linhas/s)")
+    print(f"Por colunas:   {tempo_colunas:8.3f} s ({len(df) / tempo_colunas:10.0f} linhas/s)")
+    print(f"Ganho: {tempo_linhas / tempo_colunas:.1f}x (resultados idênticos)")
+
+if __name__ == "__main__":
+    main()
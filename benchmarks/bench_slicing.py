@@ -0,0 +1,126 @@
+"""
+Benchmark dos modos de gravação dos PDFs extraídos (PdfWriter x cópia direta dos objetos)
+
+Gera um volume digitalizado sintético (uma imagem por página e uma camada de
+texto com fonte compartilhada), extrai todos os documentos do volume nos dois
+modos e compara o tempo e o tamanho total dos arquivos gravados. O volume é
+gerado em duas variantes: recursos próprios em cada página e um único
+dicionário de recursos herdado por todas as páginas.
+
+Os arquivos gravados por cópia são verificados: mesmo número de páginas, cada
+página ligada à árvore de páginas do arquivo (/Parent), e o conteúdo e as
+imagens de cada página idênticos aos do volume de origem.
+
+Uso:
+    python benchmarks/bench_slicing.py [--paginas 500] [--largura 200] [--altura 250]
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+from PyPDF2 import PdfReader
+from PyPDF2.generic import IndirectObject
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.extract_pdfs import PDFExtractor, MODE_BYTES, MODE_WRITER
+from sintetico import gerar_pdf_digitalizado
+
+VARIANTES = [
+    ('recursos por página', False),
+    ('recursos compartilhados', True),
+]
+
+def gerar_documentos(paginas, saida_dir, seed=42):
+    """Divide o volume em documentos consecutivos de 1 a 8 páginas"""
+    rnd = random.Random(seed)
+    documentos = []
+    inicio = 1
+    while inicio <= paginas:
+        fim = min(inicio + rnd.randint(0, 7), paginas)
+        documentos.append({
+            'Matrícula': f"Mat. {len(documentos) + 1}",
+            'Origem': 'CRI',
+            'Volume': '1',
+            'Páginas': f"{inicio}-{fim}",
+            'Arquivo Extraído': os.path.join(saida_dir, f"doc_{len(documentos) + 1:04d}.pdf")
+        })
+        inicio = fim + 1
+    return documentos
+
+def extrair(projeto_dir, documentos, modo):
+    """Extrai os documentos no modo informado e retorna (segundos, bytes gravados)"""
+    extractor = PDFExtractor(projeto_dir, mode=modo)
+    inicio = time.perf_counter()
+    for documento in documentos:
+        sucesso, mensagem = extractor.extract_pages(documento)
+        if not sucesso:
+            raise RuntimeError(mensagem)
+    segundos = time.perf_counter() - inicio
+    extractor.close_readers()
+    return segundos, sum(os.path.getsize(documento['Arquivo Extraído']) for documento in documentos)
+
+def imagens_usadas(pagina):
+    """Dados das imagens desenhadas na página, na ordem do conteúdo"""
+    xobjects = pagina['/Resources']['/XObject']
+    conteudo = pagina.get_contents().get_data()
+    return [xobjects[nome].get_data() for nome in xobjects if nome.encode() + b' Do' in conteudo]
+
+def verificar(origem, documentos):
+    """Compara as páginas de cada documento gravado com as páginas do volume de origem"""
+    for documento in documentos:
+        inicio, fim = (int(p) for p in documento['Páginas'].split('-'))
+        saida = PdfReader(documento['Arquivo Extraído'], strict=True)
+        if len(saida.pages) != fim - inicio + 1:
+            raise RuntimeError(f"{documento['Arquivo Extraído']}: número de páginas incorreto")
+        arvore = saida.trailer['/Root'].raw_get('/Pages')
+        for pagina in saida.pages:
+            parent = pagina.raw_get('/Parent') if '/Parent' in pagina else None
+            if not isinstance(parent, IndirectObject) or parent.idnum != arvore.idnum:
+                raise RuntimeError(f"{documento['Arquivo Extraído']}: página sem /Parent na árvore de páginas")
+        for pagina, original in zip(saida.pages, origem.pages[inicio - 1:fim]):
+            if (pagina.get_contents().get_data() != original.get_contents().get_data()
+                    or imagens_usadas(pagina) != imagens_usadas(original)):
+                raise RuntimeError(f"{documento['Arquivo Extraído']}: página diferente da origem")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos modos de gravação dos PDFs extraídos")
+    parser.add_argument('--paginas', type=int, default=500, help="Páginas do volume digitalizado")
+    parser.add_argument('--largura', type=int, default=200, help="Largura das imagens (pixels)")
+    parser.add_argument('--altura', type=int, default=250, help="Altura das imagens (pixels)")
+    args = parser.parse_args()
+    
+    base_dir = tempfile.mkdtemp(prefix='bench_slicing_')
+    try:
+        for descricao, compartilhados in VARIANTES:
+            projeto_dir = os.path.join(base_dir, 'compartilhados' if compartilhados else 'proprios')
+            os.makedirs(os.path.join(projeto_dir, 'processos'))
+            volume = os.path.join(projeto_dir, 'processos', 'CRI_1.pdf')
+            gerar_pdf_digitalizado(volume, args.paginas, compartilhados, args.largura, args.altura)
+            
+            resultados = {}
+            for modo in (MODE_WRITER, MODE_BYTES):
+                saida_dir = os.path.join(projeto_dir, 'docs', modo)
+                os.makedirs(saida_dir)
+                documentos = gerar_documentos(args.paginas, saida_dir)
+                resultados[modo] = extrair(projeto_dir, documentos, modo)
+                if modo == MODE_BYTES:
+                    verificar(PdfReader(volume), documentos)
+            
+            print(f"Volume de {args.paginas} páginas ({os.path.getsize(volume) / 1e6:.1f} MB), "
+                  f"{descricao}, {len(documentos)} documentos:")
+            for modo, (segundos, tamanho) in resultados.items():
+                print(f"  {modo:8s} {segundos:8.3f} s  {tamanho / 1e6:10.1f} MB")
+            (tempo_writer, tamanho_writer), (tempo_bytes, tamanho_bytes) = resultados[MODE_WRITER], resultados[MODE_BYTES]
+            print(f"  cópia direta: {tempo_writer / tempo_bytes:.1f}x mais rápida, "
+                  f"{tamanho_writer / tamanho_bytes:.1f}x menor (páginas verificadas)\n")
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
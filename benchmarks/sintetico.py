@@ -0,0 +1,213 @@
+"""
+Geração de projetos sintéticos para os benchmarks
+
+Um projeto sintético tem a mesma estrutura de um projeto real: PDFs de origem
+em `processos/` (nomeados "<Origem>_<Volume>.pdf"), a pasta `docs/` vazia e a
+planilha de índice com matrículas no formato "Livro 2-A, fls 123, Mat. 4567".
+"""
+import os
+import random
+
+import pandas as pd
+from PyPDF2 import PdfWriter
+
+NOME_PLANILHA = 'Índice Documentos Matrículas_Atualizado.xlsx'
+
+TIPOS_DOCUMENTO = [
+    "Escritura de Venda e Compra",
+    "Título Definitivo",
+    "Certidão Inteiro Teor",
+    "Certidão de Titulo",
+    "Certidão Iterpa",
+    "Procuração nº 12, lavrada em cartório",
+    "Memorial Descritivo",
+]
+
+def gerar_pdf(caminho, paginas, largura=595, altura=842):
+    """
+    Grava um PDF de origem com o número de páginas informado
+    
+    Args:
+        caminho (str): Caminho do arquivo
+        paginas (int): Número de páginas
+        largura (int): Largura das páginas em pontos
+        altura (int): Altura das páginas em pontos
+    """
+    writer = PdfWriter()
+    for _ in range(paginas):
+        writer.add_blank_page(largura, altura)
+    with open(caminho, 'wb') as f:
+        writer.write(f)
+
+def gerar_pdf_digitalizado(caminho, paginas, recursos_compartilhados=False, largura_imagem=200,
+                           altura_imagem=250, seed=42):
+    """
+    Grava um volume "digitalizado": cada página com uma imagem e uma camada de texto (OCR)
+    
+    As imagens são bytes aleatórios (incompressíveis, como um JPEG) e a fonte da
+    camada de texto é compartilhada por todas as páginas. Com
+    `recursos_compartilhados`, os recursos ficam em um único dicionário na
+    árvore de páginas, listando as imagens de todo o volume, como fazem alguns
+    softwares de digitalização.
+    
+    Args:
+        caminho (str): Caminho do arquivo
+        paginas (int): Número de páginas
+        recursos_compartilhados (bool): Se as páginas herdam um único dicionário de recursos
+        largura_imagem (int): Largura das imagens em pixels (tons de cinza)
+        altura_imagem (int): Altura das imagens em pixels
+        seed (int): Semente do gerador aleatório
+    """
+    rnd = random.Random(seed)
+    tamanho_imagem = largura_imagem * altura_imagem
+    
+    # Objetos: 1 catálogo, 2 árvore de páginas, 3 fonte, 4 programa da fonte,
+    # 5 recursos compartilhados; depois página, conteúdo e imagem de cada página
+    def numero(pagina, parte):
+        return 6 + 3 * pagina + parte
+    
+    objetos = {
+        1: b'<< /Type /Catalog /Pages 2 0 R >>',
+        3: b'<< /Type /Font /Subtype /TrueType /BaseFont /GlyphLessFont /FirstChar 32 /LastChar 126 '
+           b'/FontDescriptor << /Type /FontDescriptor /FontName /GlyphLessFont /Flags 5 '
+           b'/FontBBox [0 0 500 1000] /ItalicAngle 0 /Ascent 1000 /Descent 0 /CapHeight 1000 '
+           b'/StemV 80 /FontFile2 4 0 R >> >>',
+        4: (b'<< /Length %d >>' % 20000, rnd.randbytes(20000)),
+    }
+    xobjects = b' '.join(b'/Im%d %d 0 R' % (i, numero(i, 2)) for i in range(paginas))
+    recursos_volume = b'<< /XObject << ' + xobjects + b' >> /Font << /F1 3 0 R >> >>'
+    if recursos_compartilhados:
+        objetos[5] = recursos_volume
+    
+    kids = b' '.join(b'%d 0 R' % numero(i, 0) for i in range(paginas))
+    objetos[2] = (b'<< /Type /Pages /Kids [' + kids + b'] /Count %d /MediaBox [0 0 595 842]' % paginas
+                  + (b' /Resources 5 0 R' if recursos_compartilhados else b'') + b' >>')
+    
+    for i in range(paginas):
+        recursos = b'' if recursos_compartilhados else b' /Resources << /XObject << /Im%d %d 0 R >> /Font << /F1 3 0 R >> >>' % (i, numero(i, 2))
+        objetos[numero(i, 0)] = b'<< /Type /Page /Parent 2 0 R /Contents %d 0 R%s >>' % (numero(i, 1), recursos)
+        conteudo = b'q 595 0 0 842 0 0 cm /Im%d Do Q BT 3 Tr /F1 12 Tf 72 720 Td (Pagina %d do volume) Tj ET' % (i, i + 1)
+        objetos[numero(i, 1)] = (b'<< /Length %d >>' % len(conteudo), conteudo)
+        objetos[numero(i, 2)] = (
+            b'<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray '
+            b'/BitsPerComponent 8 /Length %d >>' % (largura_imagem, altura_imagem, tamanho_imagem),
+            rnd.randbytes(tamanho_imagem)
+        )
+    
+    total = max(objetos) + 1
+    posicoes = {}
+    with open(caminho, 'wb') as f:
+        f.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        for numero_objeto in sorted(objetos):
+            objeto = objetos[numero_objeto]
+            posicoes[numero_objeto] = f.tell()
+            f.write(b'%d 0 obj\n' % numero_objeto)
+            if isinstance(objeto, tuple):
+                f.write(objeto[0] + b'\nstream\n' + objeto[1] + b'\nendstream')
+            else:
+                f.write(objeto)
+            f.write(b'\nendobj\n')
+        xref = f.tell()
+        f.write(b'xref\n0 %d\n0000000000 65535 f\r\n' % total)
+        for numero_objeto in range(1, total):
+            if numero_objeto in posicoes:
+                f.write(b'%010d 00000 n\r\n' % posicoes[numero_objeto])
+            else:
+                f.write(b'0000000000 65535 f\r\n')
+        f.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (total, xref))
+
+def gerar_indice(matriculas, volumes, paginas_por_volume, origem='CRI', seed=42):
+    """
+    Gera as linhas de um índice de matrículas consistente com os volumes de origem
+    
+    Cada volume é dividido em documentos de 1 a 8 páginas, atribuídos a
+    matrículas sorteadas. Uma parte dos documentos é compartilhada (mesmo
+    intervalo de páginas em mais de uma matrícula) ou citada nas observações.
+    
+    Args:
+        matriculas (int): Número de linhas do índice
+        volumes (int): Número de volumes de origem
+        paginas_por_volume (int): Páginas de cada volume
+        origem (str): Nome da origem dos volumes
+        seed (int): Semente do gerador aleatório
+    
+    Returns:
+        pandas.DataFrame: Índice com as colunas da planilha
+    """
+    rnd = random.Random(seed)
+    numeros = rnd.sample(range(1, max(matriculas * 10, 10)), matriculas)
+    livros = {numero: f"{rnd.randint(1, 3)}-{rnd.choice('ABCDE')}" for numero in numeros}
+    
+    registros = []
+    volume = 1
+    pagina = 1
+    for i in range(matriculas):
+        numero = numeros[i]
+        tamanho = rnd.randint(1, 8)
+        if pagina + tamanho - 1 > paginas_por_volume:
+            volume = volume % volumes + 1
+            pagina = 1
+        inicio, fim = pagina, min(pagina + tamanho - 1, paginas_por_volume)
+        
+        # Cerca de 5% dos documentos repetem o intervalo anterior (documento compartilhado)
+        if registros and rnd.random() < 0.05:
+            anterior = registros[-1]
+            volume_linha, paginas = anterior['Volume'], anterior['Páginas']
+        else:
+            volume_linha = volume
+            paginas = f"{inicio}-{fim}" if fim > inicio else str(inicio)
+            pagina = fim + 1
+        
+        sorteio = rnd.random()
+        if sorteio < 0.08 and i > 0:
+            obs = f"Ver Mat. {numeros[rnd.randrange(i)]}"
+        elif sorteio < 0.11:
+            obs = "Documento incompleto"
+        else:
+            obs = None
+        
+        registros.append({
+            'Matrícula': f"Livro {livros[numero]}, fls {rnd.randint(1, 300)}, Mat. {numero}",
+            'Nome do Documento': rnd.choice(TIPOS_DOCUMENTO),
+            'Data': f"{rnd.randint(1, 28):02d}-{rnd.randint(1, 12):02d}-{rnd.randint(1950, 2020)}" if rnd.random() < 0.85 else None,
+            'Origem': origem,
+            'Volume': volume_linha,
+            'Páginas': paginas,
+            'Obs': obs,
+            'Arquivo Extraído': None,
+            'Documento Compartilhado': None,
+        })
+    return pd.DataFrame(registros)
+
+def gerar_projeto(projetos_dir, nome, matriculas, volumes, paginas_por_volume, origem='CRI', seed=42):
+    """
+    Cria um projeto sintético no disco
+    
+    Args:
+        projetos_dir (str): Diretório de projetos (PROJETOS_DIR)
+        nome (str): Nome do diretório do projeto
+        matriculas (int): Número de linhas do índice
+        volumes (int): Número de volumes de origem
+        paginas_por_volume (int): Páginas de cada volume
+        origem (str): Nome da origem dos volumes
+        seed (int): Semente do gerador aleatório
+    
+    Returns:
+        dict: Caminhos do projeto ('diretorio', 'excel') e número de páginas geradas
+    """
+    diretorio = os.path.join(projetos_dir, nome)
+    processos_dir = os.path.join(diretorio, 'processos')
+    os.makedirs(processos_dir)
+    os.makedirs(os.path.join(diretorio, 'docs'))
+    
+    for volume in range(1, volumes + 1):
+        gerar_pdf(os.path.join(processos_dir, f"{origem}_{volume}.pdf"), paginas_por_volume)
+    
+    excel = os.path.join(diretorio, NOME_PLANILHA)
+    gerar_indice(matriculas, volumes, paginas_por_volume, origem, seed).to_excel(excel, index=False)
+    
+    return {
+        'diretorio': diretorio,
+        'excel': excel,
+        'paginas': volumes * paginas_por_volume
+    }
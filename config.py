@@ -15,9 +15,29 @@ class Config:
     
     # Configuração de upload
     MAX_CONTENT_LENGTH = 500 * 1024 * 1024  # 500MB limite para upload
+    UPLOAD_CHUNK_MB = int(os.environ.get('UPLOAD_CHUNK_MB', 8))  # Tamanho das partes no envio de arquivos grandes
+    SOURCE_INDEX_WORKERS = int(os.environ.get('SOURCE_INDEX_WORKERS', 1))  # PDFs de origem indexados simultaneamente após o envio
+    
+    # Configuração de extração
+    EXTRACTION_MAX_READERS = int(os.environ.get('EXTRACTION_MAX_READERS', 4))  # PDFs de origem abertos simultaneamente
+    EXTRACTION_WORKERS = int(os.environ.get('EXTRACTION_WORKERS', 1))  # Processos de extração (1 = sem paralelismo)
+    EXTRACTION_MODE = os.environ.get('EXTRACTION_MODE', 'writer')  # 'writer' (PdfWriter) ou 'bytes' (cópia direta dos objetos do PDF)
+    EXTRACTION_DEDUP = os.environ.get('EXTRACTION_DEDUP', 'hardlink')  # Documentos compartilhados: 'hardlink', 'reflink', 'copy' ou 'off' (extrair cada linha)
+    PROCESSING_METRICS = os.environ.get('PROCESSING_METRICS', '1') != '0'  # Medir o tempo de cada etapa do processamento
+    
+    # Configuração do cache de planilhas
+    EXCEL_CACHE_MAX_MB = int(os.environ.get('EXCEL_CACHE_MAX_MB', 256))  # Memória máxima das planilhas em cache
+    EXCEL_SIDECAR = os.environ.get('EXCEL_SIDECAR', 'csv')  # Cópia do índice lida no lugar da planilha: 'csv', 'parquet' (requer pyarrow) ou 'off'
+    INVENTORY_TTL = int(os.environ.get('INVENTORY_TTL', 10))  # Segundos em que a lista de arquivos é usada sem conferir os diretórios
+    
+    # Configuração da fila de jobs
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))  # Jobs de processamento executados simultaneamente
+    SSE_HEARTBEAT = int(os.environ.get('SSE_HEARTBEAT', 15))  # Intervalo máximo (segundos) sem mensagens na transmissão do progresso
     
     # Configuração de logs
     LOG_TO_STDOUT = os.environ.get('LOG_TO_STDOUT')
+    LOG_FLUSH_EVERY = int(os.environ.get('LOG_FLUSH_EVERY', 200))  # Mensagens acumuladas antes de gravar no banco
+    LOG_FLUSH_INTERVAL_MS = int(os.environ.get('LOG_FLUSH_INTERVAL_MS', 500))  # Intervalo máximo entre gravações
     
     @staticmethod
     def init_app(app):